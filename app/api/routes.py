@@ -1,30 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
-from fastapi import Request
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.applications import Starlette
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, StreamingResponse
 from starlette.routing import Route
 import icecream as ic
 from app.db.models import (
     EmployeeCreate, ShiftCreate, ScheduleCreate, ScheduleAssignmentCreate,
     EmployeeCategoryCreate, EmployeeCategoryResponse, WorkCenterCreate, WorkCenterResponse,
     Employee, EmployeeResponse, Tasks, TaskCreate, TaskUpdate, TaskResponse,
-    EmployeeCategory, WorkCenter  # Add these two imports
+    EmployeeCategory, WorkCenter,  # Add these two imports
+    FINISHED_JOB_STATUSES, ScheduleJobCreate, ScheduleJobResponse, ScheduleJobResult, ScheduleJobStatus, RescheduleRequest
 )
 from app.db.database import get_db
 from app.db import models as db_models
-from worker import generate_schedule_task
+from app.api.schedule_stream import MEDIA_TYPES, ScheduleStream
+from worker import celery, generate_schedule_task, job_store
+from app.core.config import settings
+from app.scheduling.incremental import ChangeSet, reschedule
+from app.scheduling.result_cache import schedule_request_key
+from app.scheduling.lns import LNSOptions
+from app.scheduling.optimization import GeneticOptions
+from app.scheduling.solvers import SolverOptions
+from app.scheduling.validation import validate_work, work_array
 from app.core.security import get_current_user
 from app.core.cache import redis_client, USE_REDIS
+from app.core.jobs import seconds_since_update
 import json
 from sqlalchemy import select, text
 from datetime import datetime
 import os
-from typing import List
+from typing import List, Optional
+from uuid import uuid4
 import random
-from sqlalchemy.orm import selectinload
 from app.utils.fake_data import generate_fake_tasks
-from app.custom_encoder import custom_jsonable_encoder
 from app.db import crud  # Adjust the import path as needed
 import traceback
 
@@ -59,7 +70,7 @@ async def create_employee(employee: db_models.EmployeeCreate, db: AsyncSession =
         session.add(db_employee)
         await session.commit()
         await session.refresh(db_employee)
-        return db_models.EmployeeResponse.model_validate(db_employee)
+        return db_models.EmployeeResponse.model_validate(db_employee, from_attributes=True)
 
 @router.get("/employees/{employee_id}", response_model=db_models.EmployeeResponse)
 async def get_employee(employee_id: int, db: AsyncSession = Depends(get_db)):
@@ -67,7 +78,7 @@ async def get_employee(employee_id: int, db: AsyncSession = Depends(get_db)):
         employee = await session.get(db_models.Employee, employee_id)
         if not employee:
             raise HTTPException(status_code=404, detail="Employee not found")
-        return db_models.EmployeeResponse.model_validate(employee)
+        return db_models.EmployeeResponse.model_validate(employee, from_attributes=True)
 
     # if USE_REDIS and redis_client:
     #     cache_key = f"employee:{employee_id}"
@@ -95,29 +106,169 @@ async def create_schedule(schedule: ScheduleCreate, db: AsyncSession = Depends(g
     return db_schedule
 
 @router.get("/schedules/{schedule_id}")
-async def get_schedule(schedule_id: int, db: AsyncSession = Depends(get_db)):
+async def get_schedule(schedule_id: int, format: str = Query("json", pattern="^(json|ndjson)$"), db: AsyncSession = Depends(get_db)):
+    """The schedule with its assignments, streamed as one JSON object or as NDJSON (schedule line first)."""
+    stream = await ScheduleStream.open(db, schedule_id)
+    if stream is None:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    body = stream.ndjson() if format == "ndjson" else stream.json()
+    # Also releases the connection when the body is never iterated
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], background=BackgroundTask(stream.close))
+
+@router.post("/schedules/{schedule_id}/reschedule")
+async def reschedule_schedule(schedule_id: int, request: RescheduleRequest, db: AsyncSession = Depends(get_db), current_user: str = Depends(get_current_user)):
+    query = select(db_models.Schedule).where(db_models.Schedule.id == schedule_id)
+    schedule = (await db.execute(query)).scalar_one_or_none()
+    if schedule is None:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    changes = ChangeSet(
+        call_offs={c.employee_id: c.dates for c in request.call_offs},
+        demand={(c.work_center_id, c.date): c.demand for c in request.demand_changes},
+        slack_days=request.slack_days,
+    )
     try:
-        query = select(db_models.Schedule).options(selectinload(db_models.Schedule.assignments)).where(db_models.Schedule.id == schedule_id)
-        result = await db.execute(query)
-        schedule = result.scalar_one_or_none()
+        result = await reschedule(db, schedule, changes)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return result.summary()
 
-        if schedule is None:
-            raise HTTPException(status_code=404, detail="Schedule not found")
+# Schedule generation runs on the Celery workers; job store calls are
+# blocking, so they run in FastAPI's threadpool
+ACTIVE_JOB_STATUSES = {ScheduleJobStatus.QUEUED.value, ScheduleJobStatus.RUNNING.value}
 
-        print(f"Schedule found: {schedule}")
-        print(f"Schedule assignments: {schedule.assignments}")
+def get_schedule_job_or_404(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Schedule job not found")
+    return job
 
-        encoded_schedule = custom_jsonable_encoder(schedule, max_depth=5)
-        print(f"Encoded schedule: {encoded_schedule}")
-        return JSONResponse(content=encoded_schedule)
+def enqueue_schedule_job(request: ScheduleJobCreate, request_key: str):
+    """Start a job for ``request`` unless an identical one is queued, running or done; returns the job."""
+    job_id = uuid4().hex
+    job = job_store.create(
+        job_id,
+        status=ScheduleJobStatus.QUEUED.value,
+        progress=0.0,
+        message="Queued",
+        start_date=request.start_date.isoformat(),
+        end_date=request.end_date.isoformat(),
+        request_key=request_key,
+    )
+    while True:
+        owner = job_store.claim(request_key, job_id)
+        if owner == job_id:
+            break
+        existing = job_store.get(owner)
+        if existing is not None and existing["status"] in ACTIVE_JOB_STATUSES and seconds_since_update(existing) > settings.JOB_STALE_SECONDS:
+            # No progress or heartbeat: its worker died or the broker lost the task
+            job_store.update(owner, unless_status=FINISHED_JOB_STATUSES, status=ScheduleJobStatus.FAILED.value,
+                             error="No heartbeat from the worker", message="Failed")
+            existing = job_store.get(owner)
+        if existing is not None and existing["status"] not in (ScheduleJobStatus.FAILED.value, ScheduleJobStatus.CANCELLED.value):
+            job_store.delete(job_id)
+            return existing
+        # A failed, cancelled or expired job does not answer the request
+        job_store.release(request_key, owner)
+    try:
+        generate_schedule_task.apply_async(
+            args=[job_id, request.start_date.isoformat(), request.end_date.isoformat(), request.window_days, request.window_overlap],
+            task_id=job_id,
+        )
     except Exception as e:
-        print(f"Error in get_schedule: {str(e)}")
-        print(f"Error type: {type(e)}")
-        print(f"Error traceback: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+        # Nothing will run the job, so it must not hold the request
+        job_store.release(request_key, job_id)
+        job_store.update(job_id, status=ScheduleJobStatus.FAILED.value, error=f"{type(e).__name__}: {e}", message="Could not be queued")
+        raise
+    return job
+
+@router.post("/schedule-jobs", status_code=202, response_model=ScheduleJobResponse)
+async def create_schedule_job(request: ScheduleJobCreate, response: Response, db: AsyncSession = Depends(get_db), current_user: str = Depends(get_current_user)):
+    if request.end_date < request.start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    window_days = settings.ROLLING_WINDOW_DAYS if request.window_days is None else request.window_days
+    window_overlap = settings.ROLLING_WINDOW_OVERLAP if request.window_overlap is None else request.window_overlap
+    request_key = await schedule_request_key(
+        db, request.start_date, request.end_date, SolverOptions.from_settings(settings),
+        GeneticOptions.from_settings(settings), LNSOptions.from_settings(settings), window_days, window_overlap
+    )
+    # Identical requests share one job: an in-flight one is joined, a finished one answers at once
+    try:
+        job = await run_in_threadpool(enqueue_schedule_job, request, request_key)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"The schedule job could not be queued: {e}")
+    if job["status"] == ScheduleJobStatus.SUCCEEDED.value:
+        response.status_code = 200
+    response.headers["Location"] = f"/schedule-jobs/{job['id']}"
+    return job
+
+@router.get("/schedule-jobs/{job_id}", response_model=ScheduleJobResponse)
+def get_schedule_job(job_id: str):
+    return get_schedule_job_or_404(job_id)
+
+@router.get("/schedule-jobs/{job_id}/result", response_model=ScheduleJobResult)
+def get_schedule_job_result(job_id: str):
+    job = get_schedule_job_or_404(job_id)
+    if job["status"] != ScheduleJobStatus.SUCCEEDED.value:
+        raise HTTPException(status_code=409, detail=f"Schedule job is {job['status']}")
+    return job["result"]
+
+@router.delete("/schedule-jobs/{job_id}", status_code=202, response_model=ScheduleJobResponse)
+def cancel_schedule_job(job_id: str, current_user: str = Depends(get_current_user)):
+    job = get_schedule_job_or_404(job_id)
+    if job["status"] in FINISHED_JOB_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Schedule job is already {job['status']}")
+    # A running job notices the flag and stops its solve; a queued one is
+    # revoked so no worker picks it up
+    job_store.update(job_id, cancel_requested=True)
+    if job["status"] == ScheduleJobStatus.QUEUED.value:
+        celery.control.revoke(job_id)
+        job_store.update(job_id, unless_status=FINISHED_JOB_STATUSES, status=ScheduleJobStatus.CANCELLED.value, message="Cancelled")
+    return get_schedule_job_or_404(job_id)
+
+async def schedule_shift_rows(db: AsyncSession, schedule_id: int, employee_id: Optional[int] = None):
+    """The schedule's dates and its (employee_id, work_center_id, start_time) shift rows, optionally of one employee."""
+    schedule = (await db.execute(
+        select(db_models.Schedule.start_date, db_models.Schedule.end_date).where(db_models.Schedule.id == schedule_id)
+    )).one_or_none()
+    if schedule is None:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    query = (
+        select(db_models.Shift.employee_id, db_models.Shift.work_center_id, db_models.Shift.start_time)
+        .join(db_models.ScheduleAssignment, db_models.ScheduleAssignment.shift_id == db_models.Shift.id)
+        .where(db_models.ScheduleAssignment.schedule_id == schedule_id)
+    )
+    if employee_id is not None:
+        query = query.where(db_models.Shift.employee_id == employee_id)
+    return schedule, (await db.execute(query)).all()
+
+def schedule_work_array(schedule, rows):
+    return work_array(rows, schedule.start_date, (schedule.end_date - schedule.start_date).days + 1)
+
+@router.get("/schedules/{schedule_id}/violations")
+async def get_schedule_violations(schedule_id: int, limit: int = Query(1000, ge=0), db: AsyncSession = Depends(get_db)):
+    work = schedule_work_array(*await schedule_shift_rows(db, schedule_id))
+    violations = validate_work(work)
+    return {"schedule_id": schedule_id, "valid": not len(violations), "counts": violations.counts(), "violations": violations.records(work.start_date, limit)}
 
 @router.post("/schedule-assignments")
 async def create_schedule_assignment(assignment: ScheduleAssignmentCreate, db: AsyncSession = Depends(get_db), current_user: str = Depends(get_current_user)):
+    shift = (await db.execute(
+        select(db_models.Shift.employee_id, db_models.Shift.work_center_id, db_models.Shift.start_time).where(db_models.Shift.id == assignment.shift_id)
+    )).one_or_none()
+    if shift is None:
+        raise HTTPException(status_code=404, detail="Shift not found")
+    # Only the shift's employee changes, so only their days are checked, and
+    # only violations the new shift adds are refused
+    schedule, rows = await schedule_shift_rows(db, assignment.schedule_id, shift.employee_id)
+    if not schedule.start_date <= shift.start_time.date() <= schedule.end_date:
+        raise HTTPException(status_code=400, detail="The shift falls outside the schedule's dates")
+    before = validate_work(schedule_work_array(schedule, rows))
+    work = schedule_work_array(schedule, rows + [shift])
+    added = validate_work(work).difference(before)
+    if len(added):
+        raise HTTPException(status_code=409, detail={"message": "The assignment breaks scheduling rules", "violations": added.records(schedule.start_date)})
     db_assignment = db_models.ScheduleAssignment(**assignment.model_dump())
     db.add(db_assignment)
     await db.commit()
@@ -0,0 +1,143 @@
+import json
+from datetime import date, datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.db.models import Schedule, ScheduleAssignment, Shift
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - requirements pin orjson
+    orjson = None
+
+BATCH_SIZE = 1000  # assignments per streamed chunk and per fetch from the server-side cursor
+
+ASSIGNMENT_FIELDS = ("id", "shift_id", "employee_id", "work_center_id", "start_time", "end_time")
+MEDIA_TYPES = {"json": "application/json", "ndjson": "application/x-ndjson"}
+
+
+def schedule_rows_query(schedule_id: int):
+    """The schedule and its assignments with their shifts, one row per assignment, in one outer join.
+
+    A schedule without assignments gives a single row whose assignment
+    columns are NULL.
+    """
+    return (
+        select(
+            Schedule.id,
+            Schedule.start_date,
+            Schedule.end_date,
+            ScheduleAssignment.id,
+            ScheduleAssignment.shift_id,
+            Shift.employee_id,
+            Shift.work_center_id,
+            Shift.start_time,
+            Shift.end_time,
+        )
+        .outerjoin(ScheduleAssignment, ScheduleAssignment.schedule_id == Schedule.id)
+        .outerjoin(Shift, Shift.id == ScheduleAssignment.shift_id)
+        .where(Schedule.id == schedule_id)
+        .order_by(ScheduleAssignment.id)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+
+
+def _default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    """Compact JSON; dates and datetimes as ISO strings, like ``jsonable_encoder``."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":"), default=_default).encode()
+
+
+def _assignments(rows):
+    # Rows are flat tuples, so each assignment is a zip over fixed field names
+    return [dict(zip(ASSIGNMENT_FIELDS, row[3:])) for row in rows if row[3] is not None]
+
+
+class ScheduleStream:
+    """The rows of one schedule read through a server-side cursor and encoded chunk by chunk.
+
+    :meth:`open` runs :func:`schedule_rows_query` and reads the first row,
+    so a missing schedule is known before any byte is sent.  The stream
+    holds its own connection of the session's engine, because the request's
+    session is closed before a streamed body is sent; the connection is
+    released when the body ends or the client goes away.  A response that
+    never runs its body must close the stream itself, e.g. with
+    ``BackgroundTask(stream.close)``; closing twice is harmless.
+    """
+
+    def __init__(self, connection, result, first, owns_connection: bool):
+        self.connection = connection
+        self.result = result
+        self.first = first
+        self.owns_connection = owns_connection
+        self.closed = False
+
+    @classmethod
+    async def open(cls, db: AsyncSession, schedule_id: int):
+        engine = db.bind
+        owns_connection = isinstance(engine, AsyncEngine)
+        connection = await engine.connect() if owns_connection else await db.connection()
+        try:
+            result = await connection.stream(schedule_rows_query(schedule_id))
+            first = await result.fetchone()
+        except BaseException:
+            if owns_connection:
+                await connection.close()
+            raise
+        stream = cls(connection, result, first, owns_connection)
+        if first is None:
+            await stream.close()
+            return None
+        return stream
+
+    @property
+    def schedule(self):
+        return {"id": self.first[0], "start_date": self.first[1], "end_date": self.first[2]}
+
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        await self.result.close()
+        if self.owns_connection:
+            await self.connection.close()
+
+    async def batches(self):
+        """Assignment dicts, ``BATCH_SIZE`` rows at a time."""
+        first = [self.first]
+        async for rows in self.result.partitions(BATCH_SIZE):
+            yield _assignments(first + rows)
+            first = []
+        if first:
+            yield _assignments(first)
+
+    async def json(self):
+        """The schedule as one JSON object, its assignments as an array."""
+        try:
+            yield dumps(self.schedule)[:-1] + b',"assignments":['
+            separator = b""
+            async for assignments in self.batches():
+                if assignments:
+                    yield separator + dumps(assignments)[1:-1]
+                    separator = b","
+            yield b"]}"
+        finally:
+            await self.close()
+
+    async def ndjson(self):
+        """The schedule on the first line, then one assignment per line."""
+        try:
+            yield dumps(self.schedule) + b"\n"
+            async for assignments in self.batches():
+                if assignments:
+                    yield b"".join(dumps(assignment) + b"\n" for assignment in assignments)
+        finally:
+            await self.close()
@@ -1,5 +1,6 @@
 # from pydantic import BaseSettings
 import os, sys
+from typing import Optional
 from pydantic_settings import BaseSettings
 # from typing import AsyncGenerator
 # import asyncio
@@ -48,6 +49,32 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     SERVER_HOST: str
     SERVER_PORT: int
+    SOLVER_BACKEND: str = "highs"  # highs, scipy or cbc
+    SOLVER_THREADS: int = 1
+    SOLVER_TIME_LIMIT: Optional[float] = None
+    SOLVER_MIP_GAP: Optional[float] = None
+    SOLVER_IN_MEMORY: bool = True
+    SOLVER_PARALLEL_WORKERS: int = 1  # > 1 solves categories speculatively, this many at a time
+    SOLVER_POOL_SIZE: int = 2  # warm solver worker processes shared by all generations
+    SCHEDULE_ENGINE: str = "mip"  # mip, genetic, or auto: genetic for categories above GENETIC_AUTO_SIZE candidates
+    GENETIC_AUTO_SIZE: int = 20_000_000  # employee x day x work center x shift
+    GENETIC_POPULATION: int = 64
+    GENETIC_GENERATIONS: int = 500
+    GENETIC_TIME_LIMIT: Optional[float] = 60.0  # per category and window
+    GENETIC_WORKERS: int = 1  # > 1 evaluates fitness in this many processes
+    LNS_TIME_LIMIT: Optional[float] = None  # LNS improvement budget per category and window, None turns it off
+    LNS_BLOCK_EMPLOYEES: int = 8
+    LNS_BLOCK_DAYS: int = 14
+    LNS_NEIGHBOURHOODS: int = 2  # blocks re-solved at the same time on the solver pool
+    ROLLING_WINDOW_DAYS: Optional[int] = None  # rolling-horizon window, None solves the whole period at once
+    ROLLING_WINDOW_OVERLAP: int = 7
+    MODEL_CACHE_MAX_BYTES: int = 256 * 1024 ** 2
+    MODEL_CACHE_DIR: Optional[str] = None  # on-disk tier for compiled models, off when unset
+    MODEL_CACHE_DISK_MAX_BYTES: int = 1024 ** 3
+    PERSIST_BATCH_SIZE: int = 1000  # rows per multi-row INSERT when saving a schedule
+    JOB_STORE_URL: Optional[str] = None  # redis://... or sqlite:///path, None uses db 1 of REDIS_HOST
+    JOB_TTL_SECONDS: int = 7 * 24 * 3600
+    JOB_STALE_SECONDS: int = 600  # a queued or running job not updated for this long no longer answers its request
 # Load environment variables
 settings = Settings(
     DB_USER=local_env["DB_USER"],
@@ -0,0 +1,218 @@
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from redis import Redis
+
+JOB_KEY_PREFIX = "schedule-job:"
+REQUEST_KEY_PREFIX = "schedule-request:"
+
+# Deletes a request claim only while it still belongs to the given job
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Writes ARGV[3 + n]... as field/value pairs, with the TTL ARGV[1], unless the
+# record is gone or its status is one of the n statuses ARGV[3]..ARGV[2 + n]
+_UPDATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local n = tonumber(ARGV[2])
+local status = redis.call('HGET', KEYS[1], 'status')
+for i = 3, 2 + n do
+    if status == ARGV[i] then
+        return 0
+    end
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3 + n))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def seconds_since_update(job: Dict[str, Any]) -> float:
+    """Age of the job record's last update; a running worker refreshes it with heartbeats."""
+    return (datetime.now(timezone.utc) - datetime.fromisoformat(job["updated_at"])).total_seconds()
+
+
+class JobStore(ABC):
+    """Status, progress and results of schedule-generation jobs.
+
+    A job is a flat record of JSON values.  The API creates it when the job
+    is enqueued and reads it on every poll; the Celery worker updates it as
+    the generation runs.  :meth:`update` only writes the given fields, so the
+    worker's progress updates never overwrite a cancellation requested by
+    the API in the meantime, and it never writes to a record that is gone,
+    so a deleted or expired job stays gone.
+
+    Identical generation requests are deduplicated through claims: the first
+    job to :meth:`claim` a request key owns it, and later requests with the
+    same key are pointed at that job until the claim is released.
+    """
+
+    def create(self, job_id: str, **fields) -> Dict[str, Any]:
+        now = _now()
+        self._write(job_id, {**fields, "id": job_id, "created_at": now, "updated_at": now})
+        return self.get(job_id)
+
+    def update(self, job_id: str, unless_status: Iterable[str] = (), **fields) -> bool:
+        """Write ``fields`` of an existing job whose status is not one of ``unless_status``; returns whether it did."""
+        return self._update(job_id, {**fields, "updated_at": _now()}, tuple(unless_status))
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def delete(self, job_id: str):
+        ...
+
+    @abstractmethod
+    def claim(self, request_key: str, job_id: str) -> str:
+        """Make ``job_id`` the owner of ``request_key`` unless another job already is; returns the owner."""
+
+    @abstractmethod
+    def release(self, request_key: str, job_id: str):
+        """Drop the claim on ``request_key`` if ``job_id`` still holds it."""
+
+    @abstractmethod
+    def _write(self, job_id: str, fields: Dict[str, Any]):
+        ...
+
+    @abstractmethod
+    def _update(self, job_id: str, fields: Dict[str, Any], unless_status: Tuple[str, ...]) -> bool:
+        ...
+
+
+class RedisJobStore(JobStore):
+    """Jobs as Redis hashes, expiring ``ttl`` seconds after their last update."""
+
+    def __init__(self, client: Redis, ttl: int = 7 * 24 * 3600):
+        self.client = client
+        self.ttl = ttl
+
+    def get(self, job_id):
+        record = self.client.hgetall(JOB_KEY_PREFIX + job_id)
+        if not record:
+            return None
+        return {key.decode(): json.loads(value) for key, value in record.items()}
+
+    def delete(self, job_id):
+        self.client.delete(JOB_KEY_PREFIX + job_id)
+
+    def claim(self, request_key, job_id):
+        key = REQUEST_KEY_PREFIX + request_key
+        while not self.client.set(key, job_id, nx=True, ex=self.ttl):
+            owner = self.client.get(key)
+            if owner is not None:  # otherwise it expired in between
+                return owner.decode()
+        return job_id
+
+    def release(self, request_key, job_id):
+        self.client.eval(_RELEASE_SCRIPT, 1, REQUEST_KEY_PREFIX + request_key, job_id)
+
+    def _write(self, job_id, fields):
+        key = JOB_KEY_PREFIX + job_id
+        with self.client.pipeline() as pipe:
+            pipe.hset(key, mapping={name: json.dumps(value, default=str) for name, value in fields.items()})
+            pipe.expire(key, self.ttl)
+            pipe.execute()
+
+    def _update(self, job_id, fields, unless_status):
+        values = [item for name, value in fields.items() for item in (name, json.dumps(value, default=str))]
+        statuses = [json.dumps(status) for status in unless_status]
+        return bool(self.client.eval(_UPDATE_SCRIPT, 1, JOB_KEY_PREFIX + job_id, self.ttl, len(statuses), *statuses, *values))
+
+
+class SQLiteJobStore(JobStore):
+    """Jobs in a local SQLite file, a stand-in for Redis in development and tests.
+
+    Each field is its own row, so concurrent writers of different fields
+    never clobber each other, as with a Redis hash.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS schedule_jobs "
+                "(job_id TEXT NOT NULL, field TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (job_id, field))"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS schedule_requests (request_key TEXT PRIMARY KEY, job_id TEXT NOT NULL)"
+            )
+
+    def get(self, job_id):
+        with self._connect() as connection:
+            rows = connection.execute("SELECT field, value FROM schedule_jobs WHERE job_id = ?", (job_id,)).fetchall()
+        if not rows:
+            return None
+        return {field: json.loads(value) for field, value in rows}
+
+    def delete(self, job_id):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM schedule_jobs WHERE job_id = ?", (job_id,))
+
+    def claim(self, request_key, job_id):
+        with self._connect() as connection:
+            connection.execute("INSERT OR IGNORE INTO schedule_requests (request_key, job_id) VALUES (?, ?)", (request_key, job_id))
+            return connection.execute("SELECT job_id FROM schedule_requests WHERE request_key = ?", (request_key,)).fetchone()[0]
+
+    def release(self, request_key, job_id):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM schedule_requests WHERE request_key = ? AND job_id = ?", (request_key, job_id))
+
+    def _write(self, job_id, fields):
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO schedule_jobs (job_id, field, value) VALUES (?, ?, ?)",
+                [(job_id, name, json.dumps(value, default=str)) for name, value in fields.items()],
+            )
+
+    def _update(self, job_id, fields, unless_status):
+        with self._connect() as connection:
+            # Check and write in one write transaction, so no delete or status change comes in between
+            connection.execute("BEGIN IMMEDIATE")
+            record = dict(connection.execute("SELECT field, value FROM schedule_jobs WHERE job_id = ?", (job_id,)).fetchall())
+            if not record or json.loads(record.get("status", "null")) in unless_status:
+                return False
+            connection.executemany(
+                "INSERT OR REPLACE INTO schedule_jobs (job_id, field, value) VALUES (?, ?, ?)",
+                [(job_id, name, json.dumps(value, default=str)) for name, value in fields.items()],
+            )
+            return True
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:  # commits, or rolls back on error
+                yield connection
+        finally:
+            connection.close()
+
+
+def job_store_from_settings(settings) -> JobStore:
+    """``JOB_STORE_URL`` is ``redis://...`` or ``sqlite:///path``; unset uses db 1 of the app's Redis."""
+    url = settings.JOB_STORE_URL or f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/1"
+    if url.startswith("sqlite:///"):
+        return SQLiteJobStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisJobStore(Redis.from_url(url), ttl=settings.JOB_TTL_SECONDS)
+    raise ValueError(f"Unsupported job store URL: {url}")
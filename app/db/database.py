@@ -7,7 +7,6 @@ from icecream import ic
 import aiomysql
 from aiomysql import DictCursor
 from dotenv import load_dotenv
-from contextlib import asynccontextmanager
 import contextlib
 from typing import AsyncIterator
 from fastapi import Depends
@@ -67,7 +66,6 @@ sessionmanager = DatabaseSessionManager()
 #         # Closing the session after use...
 #         await session.close()
 
-@asynccontextmanager
 async def get_db():
     async with sessionmanager.SessionLocal() as session:
         try:
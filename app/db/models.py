@@ -26,6 +26,7 @@ from typing import Optional
 # from sqlmodel import Field, SQLModel  
 from enum import Enum as PyEnum  
 from datetime import datetime, timezone  
+from datetime import date
 # from app.db.database import Base
 import logging
 logging.basicConfig()    
@@ -72,8 +73,10 @@ class Employee(Base):
     work_center_preferences = Column(JSON)
     delta = Column(Float)
 
-    category = relationship("EmployeeCategory", lazy="selectin")
-    shifts = relationship("Shift", back_populates="employee", lazy="selectin")
+    # Relationships raise on access unless the query loads them, e.g. with
+    # selectinload(Employee.shifts), so every query states what it fetches
+    category = relationship("EmployeeCategory", lazy="raise")
+    shifts = relationship("Shift", back_populates="employee", lazy="raise")
 
 class Shift(Base):
     __tablename__ = "shifts"
@@ -84,9 +87,9 @@ class Shift(Base):
     employee_id: Mapped[int] = mapped_column(Integer, ForeignKey("employees.id"))
     work_center_id: Mapped[int] = mapped_column(Integer, ForeignKey("work_centers.id"))
     
-    employee = relationship("Employee", back_populates="shifts", lazy="selectin")
-    work_center = relationship("WorkCenter", lazy="selectin")
-    assignment = relationship("ScheduleAssignment", back_populates="shift", uselist=False, lazy="selectin")
+    employee = relationship("Employee", back_populates="shifts", lazy="raise")
+    work_center = relationship("WorkCenter", lazy="raise")
+    assignment = relationship("ScheduleAssignment", back_populates="shift", uselist=False, lazy="raise")
 
 class ScheduleStatus(str, PyEnum):  
     DRAFT = "draft"  
@@ -99,7 +102,7 @@ class Schedule(Base):
     id = Column(Integer, primary_key=True, index=True)
     start_date = Column(Date)
     end_date = Column(Date)
-    assignments = relationship("ScheduleAssignment", back_populates="schedule", lazy="selectin")
+    assignments = relationship("ScheduleAssignment", back_populates="schedule", lazy="raise")
 
 class ScheduleAssignment(Base):
     __tablename__ = "schedule_assignments"
@@ -108,8 +111,8 @@ class ScheduleAssignment(Base):
     schedule_id = Column(Integer, ForeignKey("schedules.id"), nullable=False)
     shift_id = Column(Integer, ForeignKey("shifts.id"), nullable=False)
 
-    schedule = relationship("Schedule", back_populates="assignments", lazy="selectin")
-    shift = relationship("Shift", back_populates="assignment", lazy="selectin")
+    schedule = relationship("Schedule", back_populates="assignments", lazy="raise")
+    shift = relationship("Shift", back_populates="assignment", lazy="raise")
 
 class EmployeeCategoryCreate(BaseModel):
     name: str   
@@ -149,6 +152,54 @@ class ScheduleCreate(BaseModel):
 class ScheduleAssignmentCreate(BaseModel):
     schedule_id: int
     shift_id: int
+
+class CallOff(BaseModel):
+    employee_id: int
+    dates: List[date]
+
+class DemandChange(BaseModel):
+    work_center_id: int
+    date: date
+    demand: Dict[str, List[int]]  # per category, as in WorkCenter.demand
+
+class RescheduleRequest(BaseModel):
+    call_offs: List[CallOff] = []
+    demand_changes: List[DemandChange] = []
+    slack_days: int = 1
+
+class ScheduleJobStatus(str, PyEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+FINISHED_JOB_STATUSES = {ScheduleJobStatus.SUCCEEDED.value, ScheduleJobStatus.FAILED.value, ScheduleJobStatus.CANCELLED.value}
+
+class ScheduleJobCreate(BaseModel):
+    start_date: date
+    end_date: date
+    window_days: Optional[int] = None
+    window_overlap: Optional[int] = None
+
+class ScheduleJobResponse(BaseModel):
+    id: str
+    status: ScheduleJobStatus
+    progress: float = 0.0
+    message: Optional[str] = None
+    error: Optional[str] = None
+    start_date: date
+    end_date: date
+    cancel_requested: bool = False
+    created_at: datetime
+    updated_at: datetime
+
+class ScheduleJobResult(BaseModel):
+    job_id: str
+    schedule_id: int
+    start_date: date
+    end_date: date
+    assignments: int
     
 class EmployeeResponse(BaseModel):
     id: int
@@ -263,8 +314,8 @@ class GeneratedSchedule(Base):
     shift_start = Column(DateTime, nullable=False)
     shift_end = Column(DateTime, nullable=False)
 
-    schedule = relationship("Schedule", back_populates="generated_assignments")
-    employee = relationship("Employee")
-    work_center = relationship("WorkCenter")
+    schedule = relationship("Schedule", back_populates="generated_assignments", lazy="raise")
+    employee = relationship("Employee", lazy="raise")
+    work_center = relationship("WorkCenter", lazy="raise")
 
-Schedule.generated_assignments = relationship("GeneratedSchedule", back_populates="schedule")
\ No newline at end of file
+Schedule.generated_assignments = relationship("GeneratedSchedule", back_populates="schedule", lazy="raise")
\ No newline at end of file
@@ -0,0 +1,66 @@
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+@dataclass
+class CostTensors:
+    """Preference costs of one category pass, aligned with ``Phi_k``.
+
+    ``C1`` ranks shifts by ``shift_preferences``, ``C2`` ranks work centers by
+    ``work_center_preferences`` (0 for the first choice, 1 when not listed)
+    and ``C3`` weighs each day by ``off_day_preferences`` (1 for the most
+    wanted day off, 0 when not listed).  Day 0 is a Monday, as in the
+    weekday/weekend demand split.
+    """
+
+    C1: np.ndarray  # (employee, work center, shift)
+    C2: np.ndarray  # (employee, work center, shift)
+    C3: np.ndarray  # (employee, day)
+    hourly_rate: np.ndarray  # (employee,)
+
+    @property
+    def C_combined(self):
+        return self.C1 + self.C2
+
+
+def employee_version(e):
+    """Everything the costs of ``e`` depend on; changes whenever the employee is edited."""
+    return (
+        e.id,
+        tuple(e.shift_preferences or ()),
+        tuple(e.work_center_preferences or ()),
+        tuple(sorted((e.off_day_preferences or {}).items())),
+        float(e.category.hourly_rate),
+    )
+
+
+def _rank_costs(preferences, choices):
+    # 0 for the first preference, increasing by rank, 1 for choices that are not listed
+    rank = {choice: i for i, choice in enumerate(preferences)}
+    return np.array([rank[c] / len(preferences) if c in rank else 1.0 for c in choices])
+
+
+@lru_cache(maxsize=65536)
+def _employee_costs(version, work_center_ids, n_shifts):
+    _, shift_preferences, work_center_preferences, off_days, hourly_rate = version
+    C1 = np.broadcast_to(_rank_costs(shift_preferences, range(1, n_shifts + 1)), (len(work_center_ids), n_shifts))
+    C2 = np.broadcast_to(_rank_costs(work_center_preferences, work_center_ids)[:, None], (len(work_center_ids), n_shifts))
+    ranks = dict(off_days)
+    C3 = np.array([(8 - ranks[day]) / 7 if isinstance(ranks.get(day), int) and 1 <= ranks[day] <= 7 else 0.0 for day in WEEKDAYS])
+    return C1, C2, C3, hourly_rate
+
+
+def cost_tensors(Phi_k, work_centers, Gamma: int, n_shifts: int, day_offset: int = 0) -> CostTensors:
+    """Cost tensors for ``Phi_k``, reusing per-employee rows cached by :func:`employee_version`."""
+    work_center_ids = tuple(wc.id for wc in work_centers)
+    rows = [_employee_costs(employee_version(e), work_center_ids, n_shifts) for e in Phi_k]
+    if not rows:
+        L = len(work_center_ids)
+        return CostTensors(np.zeros((0, L, n_shifts)), np.zeros((0, L, n_shifts)), np.zeros((0, Gamma)), np.zeros(0))
+    C1, C2, weekly, hourly_rate = (np.stack(column) for column in zip(*rows))
+    weekdays = (day_offset + np.arange(Gamma)) % 7
+    return CostTensors(C1=C1, C2=C2, C3=weekly[:, weekdays], hourly_rate=hourly_rate.astype(float))
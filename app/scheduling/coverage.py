@@ -0,0 +1,41 @@
+from datetime import date
+
+import numpy as np
+
+from app.scheduling.model_builder import N_SHIFTS
+
+
+class CoverageIndex:
+    """Running count of scheduled shifts per (day, work center, shift, category).
+
+    ``generate_schedule`` feeds every accepted batch of assignments through
+    :meth:`add_array` once, so later category passes read slot coverage and the set
+    of already assigned employees without rescanning earlier assignments.
+    Work centers are addressed by position (``l - 1``), as in the HESM model.
+    """
+
+    def __init__(self, start_date: date, Gamma: int, work_center_ids, category_ids):
+        self.start_date = start_date
+        self.Gamma = Gamma
+        self.work_center_position = {wc_id: i for i, wc_id in enumerate(work_center_ids)}
+        self.category_position = {k: i for i, k in enumerate(category_ids)}
+        self.counts = np.zeros((Gamma, len(self.work_center_position), N_SHIFTS, len(self.category_position)), dtype=np.int32)
+        self.assigned_employees = set()
+
+    def add_array(self, schedule, category_id):
+        """Count a :class:`ScheduleArray` of one category's shifts."""
+        self.assigned_employees.update(schedule.employee_id.tolist())
+        k = self.category_position.get(category_id)
+        l = np.array([self.work_center_position.get(wc_id, -1) for wc_id in schedule.work_center_id.tolist()], dtype=np.int64)
+        d = schedule.day + (schedule.start_date - self.start_date).days
+        keep = (d >= 0) & (d < self.Gamma) & (l >= 0) & (schedule.shift >= 0) & (schedule.shift < N_SHIFTS)
+        if k is not None:
+            np.add.at(self.counts, (d[keep], l[keep], schedule.shift[keep], k), 1)
+
+    def slot_coverage(self):
+        """Coverage per (day, work center, shift) across all categories."""
+        return self.counts.sum(axis=3)
+
+    def existing(self, d, l, t):
+        """Coverage of day ``d`` (0-based), work center ``l`` and shift ``t`` (1-based)."""
+        return int(self.counts[d, l - 1, t - 1].sum())
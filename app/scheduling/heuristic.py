@@ -0,0 +1,115 @@
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.scheduling.cost_model import cost_tensors
+from app.scheduling.model_builder import DELTA, N_SHIFTS, WEEKENDS_OFF, WINDOWED_LIMITS, BoundaryState, demand_matrix, is_weekend
+
+
+@dataclass
+class HeuristicResult:
+    x: np.ndarray  # (employee, day, work center, shift) assignments, aligned with Phi_k
+    uncovered: np.ndarray  # (day, work center, shift) demand left without an employee
+    elapsed: float
+
+    @property
+    def complete(self):
+        return not self.uncovered.any()
+
+    def summary(self):
+        return {
+            "status": "heuristic",
+            "assigned": int(self.x.sum()),
+            "uncovered": int(self.uncovered.sum()),
+            "elapsed": round(self.elapsed, 4),
+        }
+
+
+def greedy_schedule(k, Phi_k, Gamma, work_centers, existing, boundary: BoundaryState = None, demand=None, closed_days=None) -> HeuristicResult:
+    """Cover the demand of category k greedily, day by day, under the HESM rules.
+
+    Takes the same arguments as :func:`build_hesm_matrix_model`.  Each slot
+    is filled with the cheapest available eligible employees, ranked by
+    their shift, work center and off-day preference costs plus the shifts
+    they already have, so the load spreads towards Delta.  An employee stays
+    available for further shifts as long as the one-shift-per-day, C2.2,
+    C2.3, C3, weekend-off and single-work-center rules allow, counted
+    against the boundary's committed days when there is one.  Slots no
+    employee can take are reported in ``uncovered`` instead of failing.
+    """
+    started = time.perf_counter()
+    E, L, T = len(Phi_k), len(work_centers), N_SHIFTS
+    day_offset = boundary.day_offset if boundary is not None else 0
+    if demand is None:
+        demand = demand_matrix(k, Gamma, work_centers, day_offset)
+    need = np.nan_to_num(demand - existing, nan=0).clip(min=0).astype(np.int64)
+    x = np.zeros((E, Gamma, L, T), dtype=bool)
+    if E == 0:
+        return HeuristicResult(x, need, time.perf_counter() - started)
+
+    history = boundary.history if boundary is not None else np.zeros((E, 0))
+    future = boundary.future if boundary is not None and boundary.future is not None else np.zeros((E, 0))
+    H = history.shape[1]
+    # Per-day state is kept day-major, (day, employee), so each day's rows are contiguous:
+    # worked flags of the history, the horizon being filled in and the fixed days after it
+    worked = np.zeros((H + Gamma + future.shape[1], E), dtype=np.int8)
+    worked[:H] = (history > 0.5).T
+    worked[H + Gamma:] = (future > 0.5).T
+
+    costs = cost_tensors(Phi_k, work_centers, Gamma, T, day_offset)
+    preference = np.ascontiguousarray(costs.C_combined.transpose(1, 2, 0))  # (work center, shift, employee)
+    off_day = np.ascontiguousarray(costs.C3.T)
+    work_center = boundary.work_center if boundary is not None else np.full(E, -1, dtype=np.int64)
+    # (work center, employee) eligibility: listed work centers cost less than 1,
+    # narrowed to a single work center once the employee's is fixed
+    eligible = costs.C2[:, :, 0].T < 1
+    eligible &= (work_center[None, :] < 0) | (np.arange(L)[:, None] == work_center[None, :])
+    weekend = is_weekend(day_offset + np.arange(Gamma))
+    weekends_off = WEEKENDS_OFF if boundary is None else np.maximum(WEEKENDS_OFF - boundary.weekend_days_off, 0)
+    weekend_left = np.broadcast_to(weekend.sum() - weekends_off, E).astype(np.int64)
+    shifts = boundary.shifts_worked.astype(float) if boundary is not None else np.zeros(E)
+    open_days = np.ones((Gamma, E), dtype=bool) if closed_days is None else ~closed_days.T
+
+    for d in range(Gamma):
+        if not need[d].any():
+            continue
+        j = H + d
+        available = open_days[d].copy()
+        if weekend[d]:
+            available &= weekend_left > 0
+        for width, limit in WINDOWED_LIMITS:
+            # Every window through day d must stay within its limit once d is worked
+            for s in range(j - width + 1, j + 1):
+                available &= worked[max(s, 0):s + width].sum(axis=0) < limit
+
+        # Cheapest first: preferences, then the shifts already worked so the load
+        # spreads towards Delta; only employees leaving the pool today change it
+        load = off_day[d] + shifts / DELTA
+        for l in range(L):
+            if not need[d, l].any():
+                continue
+            pool = np.flatnonzero(available & eligible[l])
+            for t in range(T):
+                n = need[d, l, t]
+                if n == 0 or len(pool) == 0:
+                    continue
+                if len(pool) > n:
+                    priority = preference[l, t, pool] + load[pool]
+                    taken = np.argpartition(priority, n - 1)[:n]
+                else:
+                    taken = np.arange(len(pool))
+                candidates = pool[taken]
+                pool = np.delete(pool, taken)
+                x[candidates, d, l, t] = True
+                need[d, l, t] -= len(candidates)
+                available[candidates] = False
+                worked[j, candidates] = 1
+                shifts[candidates] += 1
+                if weekend[d]:
+                    weekend_left[candidates] -= 1
+                # C2.5: the first assignment fixes the work center
+                eligible[:, candidates] = False
+                eligible[l, candidates] = True
+
+    return HeuristicResult(x, need, time.perf_counter() - started)
@@ -0,0 +1,229 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import GeneratedSchedule, Schedule, ScheduleAssignment, Shift
+from app.scheduling.algorithm import build_assignments, solver_pool
+from app.scheduling.coverage import CoverageIndex
+from app.scheduling.inputs import load_scheduler_input
+from app.scheduling.model_builder import DELTA, HISTORY_DAYS, N_SHIFTS, BoundaryState, build_hesm_matrix_model, demand_matrix, is_weekend
+from app.scheduling.persistence import delete_schedule_rows, persist_schedule
+from app.scheduling.schedule_array import ScheduleArray
+from app.scheduling.solvers import SolverOptions
+from app.scheduling.warm_start import build_mip_start
+
+logger = logging.getLogger(__name__)
+
+KEEP_BONUS = 2.0  # objective credit per unchanged shift, above the shift and work center preference costs (at most 1 each)
+
+
+@dataclass
+class ChangeSet:
+    """Disruptions to an existing schedule.
+
+    ``call_offs`` maps employee ids to the days they can no longer work.
+    ``demand`` maps (work center id, day) to that day's demand per category,
+    keyed like ``WorkCenter.demand`` (``{"1": [2, 1, 0]}``); categories left
+    out keep their usual demand.  The work centers' weekday/weekend demand
+    is not modified.
+    """
+
+    call_offs: Dict[int, List[date]] = field(default_factory=dict)
+    demand: Dict[Tuple[int, date], Dict[str, List[int]]] = field(default_factory=dict)
+    slack_days: int = 1  # neighbouring days re-solved around the changed ones
+
+    def days(self):
+        days = {d for call_off in self.call_offs.values() for d in call_off}
+        days.update(d for _, d in self.demand)
+        return days
+
+
+@dataclass
+class RescheduleResult:
+    schedule_id: int
+    first_day: date
+    last_day: date
+    added: List[ScheduleAssignment]
+    removed: int
+    solves: List[dict]
+    elapsed: float
+
+    def summary(self):
+        return {
+            "schedule_id": self.schedule_id,
+            "first_day": self.first_day.isoformat(),
+            "last_day": self.last_day.isoformat(),
+            "added": len(self.added),
+            "removed": self.removed,
+            "solves": self.solves,
+            "elapsed": round(self.elapsed, 3),
+        }
+
+
+def fixed_boundary(Phi_k, worked, first: int, days: int, Gamma: int, work_center_position) -> BoundaryState:
+    """Boundary of a residual window whose surrounding days stay as scheduled.
+
+    ``worked`` maps employee ids to ``{day: (work center id, shift)}`` of the
+    existing schedule.  Unlike the rolling-horizon boundary, the days after
+    the window are fixed as well, so the windowed rules also look ahead and
+    the counts cover every day outside the window against the full Delta.
+    """
+    E = len(Phi_k)
+    history = np.zeros((E, HISTORY_DAYS))
+    future = np.zeros((E, HISTORY_DAYS))
+    weekend_days_off = np.zeros(E)
+    shifts_worked = np.zeros(E)
+    work_center = np.full(E, -1, dtype=np.int64)
+    weekend = is_weekend(np.arange(Gamma))
+    outside_weekend_days = int(weekend.sum() - weekend[first:first + days].sum())
+    for i, e in enumerate(Phi_k):
+        weekend_worked = 0
+        for d, (wc_id, _) in worked.get(e.id, {}).items():
+            if first <= d < first + days:
+                continue
+            shifts_worked[i] += 1
+            weekend_worked += is_weekend(d)
+            work_center[i] = work_center_position.get(wc_id, work_center[i])
+            if first - HISTORY_DAYS <= d < first:
+                history[i, d - first + HISTORY_DAYS] = 1
+            elif first + days <= d < first + days + HISTORY_DAYS:
+                future[i, d - first - days] = 1
+        weekend_days_off[i] = outside_weekend_days - weekend_worked
+    return BoundaryState(
+        day_offset=first,
+        history=history,
+        weekend_days_off=weekend_days_off,
+        shifts_worked=shifts_worked,
+        work_center=work_center,
+        delta=DELTA,
+        future=future,
+    )
+
+
+async def reschedule(db_session: AsyncSession, schedule: Schedule, changes: ChangeSet, solver_options: Optional[SolverOptions] = None) -> RescheduleResult:
+    """Re-solve the days of ``schedule`` touched by ``changes`` and write back only what changed.
+
+    Every assignment outside the residual window (the changed days plus
+    ``changes.slack_days`` on each side) stays fixed; inside it, each
+    category is re-solved in hierarchy order with the surrounding days as
+    boundary and the old assignments as MIP start, credited with
+    ``KEEP_BONUS`` so the solve moves as few shifts as it can.  When a window has no
+    feasible solution it is widened by a week on each side, up to the whole
+    horizon.
+    """
+    started = time.perf_counter()
+    solver_options = solver_options or SolverOptions.from_settings(settings)
+    start_date = schedule.start_date
+    Gamma = (schedule.end_date - start_date).days + 1
+    changed = sorted((d - start_date).days for d in changes.days())
+    if not changed:
+        raise ValueError("The change set is empty")
+    if changed[0] < 0 or changed[-1] >= Gamma:
+        raise ValueError(f"Changes must fall between {start_date} and {schedule.end_date}")
+    for (wc_id, day), category_demand in changes.demand.items():
+        for k, shifts in category_demand.items():
+            if len(shifts) != N_SHIFTS:
+                raise ValueError(f"Demand for work center {wc_id} on {day}, category {k} needs {N_SHIFTS} shifts, got {len(shifts)}")
+
+    instance = await load_scheduler_input(db_session)
+    employees, work_centers = instance.employees, instance.work_centers
+    work_center_position = {wc.id: l for l, wc in enumerate(work_centers)}
+    K = range(1, len(set(e.category_id for e in employees)) + 1)
+    Phi = {k: [e for e in employees if e.category_id == k] for k in K}
+
+    # The existing schedule, as narrow rows rather than ORM objects
+    shift_rows = (await db_session.execute(
+        select(ScheduleAssignment.id.label("assignment_id"), Shift.id.label("shift_id"), Shift.employee_id, Shift.work_center_id, Shift.start_time)
+        .join(Shift, ScheduleAssignment.shift_id == Shift.id)
+        .where(ScheduleAssignment.schedule_id == schedule.id)
+    )).all()
+    generated_rows = (await db_session.execute(
+        select(GeneratedSchedule.id, GeneratedSchedule.employee_id, GeneratedSchedule.work_center_id, GeneratedSchedule.shift_start)
+        .where(GeneratedSchedule.schedule_id == schedule.id)
+    )).all()
+    worked = {}
+    for row in shift_rows:
+        worked.setdefault(row.employee_id, {})[(row.start_time.date() - start_date).days] = (row.work_center_id, (row.start_time.hour - 6) // 8)
+    call_offs = {e_id: {(d - start_date).days for d in days} for e_id, days in changes.call_offs.items()}
+
+    async def solve_window(first, days):
+        window_start = start_date + timedelta(days=first)
+        prior = [row for row in generated_rows if first <= (row.shift_start.date() - start_date).days < first + days]
+        coverage = CoverageIndex(window_start, days, [wc.id for wc in work_centers], K)
+        assignments, solves = [], []
+        for k in K:
+            Phi_k = Phi[k]
+            demand = demand_matrix(k, days, work_centers, first)
+            for (wc_id, day), category_demand in changes.demand.items():
+                d = (day - start_date).days - first
+                if str(k) in category_demand and 0 <= d < days and wc_id in work_center_position:
+                    demand[d, work_center_position[wc_id], :] = category_demand[str(k)]
+            closed = np.array([[first + d in call_offs.get(e.id, ()) for d in range(days)] for e in Phi_k], dtype=bool).reshape(len(Phi_k), days)
+            boundary = fixed_boundary(Phi_k, worked, first, days, Gamma, work_center_position)
+            model = build_hesm_matrix_model(k, Phi_k, days, work_centers, coverage.slot_coverage(), boundary=boundary, demand=demand, closed_days=closed)
+            mip_start, _ = build_mip_start(model, prior, window_start, boundary)
+            # Prefer the existing assignments over equally good new ones
+            x_cols = model.x_index[model.x_index >= 0]
+            model.c[x_cols[mip_start[x_cols] > 0.5]] -= KEEP_BONUS
+            result = await solver_pool.solve(model, solver_options, mip_start)
+            solves.append({"category": k, "columns": model.num_cols, **result.summary()})
+            if not result.has_solution:
+                logger.info(f"Schedule {schedule.id}: category {k} has no solution on days {first}-{first + days - 1} ({result.status})")
+                return None, solves
+            new_shifts = ScheduleArray.from_x(model.x_values(result.x), [e.id for e in Phi_k], model.work_center_ids, window_start)
+            coverage.add_array(new_shifts, k)
+            assignments.extend(build_assignments(new_shifts, schedule))
+        return assignments, solves
+
+    slack = changes.slack_days
+    solves = []
+    while True:
+        first, last = max(0, changed[0] - slack), min(Gamma - 1, changed[-1] + slack)
+        assignments, window_solves = await solve_window(first, last - first + 1)
+        solves.extend(window_solves)
+        if assignments is not None:
+            break
+        if first == 0 and last == Gamma - 1:
+            raise RuntimeError(f"Schedule {schedule.id} has no feasible re-solve for the given changes")
+        slack += 7
+
+    # Write back the difference only
+    in_window = [row for row in shift_rows if first <= (row.start_time.date() - start_date).days <= last]
+    new_keys = {(a.shift.employee_id, a.shift.work_center_id, a.shift.start_time) for a in assignments}
+    old_keys = {(row.employee_id, row.work_center_id, row.start_time) for row in in_window}
+    removed = [row for row in in_window if (row.employee_id, row.work_center_id, row.start_time) not in new_keys]
+    removed_keys = {(row.employee_id, row.work_center_id, row.start_time) for row in removed}
+    added = [a for a in assignments if (a.shift.employee_id, a.shift.work_center_id, a.shift.start_time) not in old_keys]
+    try:
+        await delete_schedule_rows(
+            db_session,
+            [row.assignment_id for row in removed],
+            [row.shift_id for row in removed],
+            [row.id for row in generated_rows if (row.employee_id, row.work_center_id, row.shift_start) in removed_keys],
+            settings.PERSIST_BATCH_SIZE,
+        )
+        await persist_schedule(db_session, schedule, added, settings.PERSIST_BATCH_SIZE)
+        await db_session.commit()
+    except Exception:
+        logger.exception(f"Error writing the re-solved days of schedule {schedule.id}")
+        await db_session.rollback()
+        raise
+
+    result = RescheduleResult(
+        schedule_id=schedule.id,
+        first_day=start_date + timedelta(days=first),
+        last_day=start_date + timedelta(days=last),
+        added=added,
+        removed=len(removed),
+        solves=solves,
+        elapsed=time.perf_counter() - started,
+    )
+    logger.info(f"Schedule {schedule.id} re-solved: {result.summary()}")
+    return result
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.db.models import Employee, EmployeeCategory, GeneratedSchedule, WorkCenter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CategoryInput:
+    id: int
+    hourly_rate: float
+
+
+@dataclass
+class EmployeeInput:
+    """The columns of an ``Employee`` the scheduler reads, without its shift history.
+
+    Attribute names match the ORM class, so the model builders take either.
+    """
+
+    id: int
+    category_id: int
+    category: CategoryInput  # shared by the employees of the category
+    off_day_preferences: Optional[Dict[str, int]]
+    shift_preferences: Optional[List[int]]
+    work_center_preferences: Optional[List[int]]
+    delta: Optional[float]
+
+
+@dataclass
+class WorkCenterInput:
+    id: int
+    demand: Dict[str, Dict[str, List[int]]]
+
+
+@dataclass
+class PriorShift:
+    """A ``GeneratedSchedule`` row as :func:`app.scheduling.warm_start.build_mip_start` reads it."""
+
+    employee_id: int
+    work_center_id: int
+    shift_start: object
+
+
+@dataclass
+class SchedulerInput:
+    employees: List[EmployeeInput]  # sorted by id
+    work_centers: List[WorkCenterInput]  # sorted by id
+    prior_shifts: List[PriorShift] = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+EMPLOYEE_COLUMNS = select(
+    Employee.id,
+    Employee.category_id,
+    EmployeeCategory.hourly_rate,
+    Employee.off_day_preferences,
+    Employee.shift_preferences,
+    Employee.work_center_preferences,
+    Employee.delta,
+).outerjoin(EmployeeCategory, Employee.category_id == EmployeeCategory.id).order_by(Employee.id)
+
+WORK_CENTER_COLUMNS = select(WorkCenter.id, WorkCenter.demand).order_by(WorkCenter.id)
+
+
+async def _fetch_all(db_session: AsyncSession, statements):
+    # Each statement on its own pooled connection when the session is bound to
+    # an engine; a session bound to a single connection runs them in turn
+    engine = db_session.bind
+    if not isinstance(engine, AsyncEngine):
+        return [(await db_session.execute(statement)).all() for statement in statements]
+
+    async def fetch(statement):
+        async with engine.connect() as connection:
+            return (await connection.execute(statement)).all()
+
+    return await asyncio.gather(*(fetch(statement) for statement in statements))
+
+
+async def load_scheduler_input(db_session: AsyncSession, prior_schedule_id: Optional[int] = None) -> SchedulerInput:
+    """Load employees, work centers and the prior shifts of ``prior_schedule_id`` for the scheduler.
+
+    Only the columns the models read are selected, as plain rows, and the
+    independent queries run concurrently.  No ``Shift`` row is loaded, so
+    the load does not grow with the shift history.
+    """
+    started = time.perf_counter()
+    statements = [EMPLOYEE_COLUMNS, WORK_CENTER_COLUMNS]
+    if prior_schedule_id is not None:
+        statements.append(
+            select(GeneratedSchedule.employee_id, GeneratedSchedule.work_center_id, GeneratedSchedule.shift_start)
+            .where(GeneratedSchedule.schedule_id == prior_schedule_id)
+        )
+    employee_rows, work_center_rows, *prior_rows = await _fetch_all(db_session, statements)
+
+    categories = {}
+    employees = []
+    for row in employee_rows:
+        category = categories.get(row.category_id)
+        if category is None:
+            category = categories[row.category_id] = CategoryInput(row.category_id, row.hourly_rate)
+        employees.append(EmployeeInput(
+            id=row.id,
+            category_id=row.category_id,
+            category=category,
+            off_day_preferences=row.off_day_preferences,
+            shift_preferences=row.shift_preferences,
+            work_center_preferences=row.work_center_preferences,
+            delta=row.delta,
+        ))
+    result = SchedulerInput(
+        employees=employees,
+        work_centers=[WorkCenterInput(row.id, row.demand) for row in work_center_rows],
+        prior_shifts=[PriorShift(*row) for row in prior_rows[0]] if prior_rows else [],
+    )
+    result.elapsed = time.perf_counter() - started
+    logger.info(f"Loaded {len(employees)} employees, {len(result.work_centers)} work centers and "
+                f"{len(result.prior_shifts)} prior shifts in {result.elapsed:.3f}s")
+    return result
@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from app.scheduling.cost_model import cost_tensors
+from app.scheduling.model_builder import DELTA, HISTORY_DAYS, N_SHIFTS, BoundaryState, HESMMatrixModel, build_hesm_matrix_model, demand_matrix, is_weekend
+from app.scheduling.solver_pool import SolverPool
+from app.scheduling.solvers import SolverOptions
+from app.scheduling.warm_start import satisfied_rows, start_vector
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LNSOptions:
+    """Budget and neighbourhood shape of the improvement stage, see :func:`improve_schedule`.
+
+    The stage is off while ``time_limit`` is None or 0.  Deployment
+    defaults come from the ``LNS_*`` settings.
+    """
+
+    time_limit: Optional[float] = None  # wall-clock seconds per category and window
+    block_employees: int = 8
+    block_days: int = 14
+    neighbourhoods: int = 2  # disjoint blocks re-solved at the same time
+    max_rounds: Optional[int] = None
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            time_limit=settings.LNS_TIME_LIMIT,
+            block_employees=settings.LNS_BLOCK_EMPLOYEES,
+            block_days=settings.LNS_BLOCK_DAYS,
+            neighbourhoods=settings.LNS_NEIGHBOURHOODS,
+        )
+
+    @property
+    def enabled(self):
+        return bool(self.time_limit)
+
+
+@dataclass
+class LNSResult:
+    x: np.ndarray  # (employee, day, work center, shift) after the accepted blocks
+    rounds: int
+    solved: int  # block sub-problems solved
+    improved: int  # blocks replaced by their re-solve
+    gain: float  # objective decrease of the blocks that covered their demand before
+    elapsed: float
+
+    def summary(self):
+        return {
+            "status": "lns",
+            "rounds": self.rounds,
+            "solved": self.solved,
+            "improved": self.improved,
+            "gain": round(self.gain, 4),
+            "elapsed": round(self.elapsed, 4),
+        }
+
+
+@dataclass
+class Block:
+    employees: np.ndarray  # positions in Phi_k
+    first: int  # first day, relative to the window
+    model: Optional[HESMMatrixModel] = None
+    start: Optional[np.ndarray] = None
+    objective: float = np.inf  # of the current assignments, inf when they miss the block's demand
+
+
+def block_boundary(x, employees, first: int, days: int, boundary: BoundaryState = None) -> BoundaryState:
+    """Boundary of the block ``employees`` x ``first .. first + days - 1`` of window assignments ``x``.
+
+    Every other day of the window stays as assigned, so like
+    :func:`app.scheduling.incremental.fixed_boundary` the windowed rules look
+    at the days on both sides of the block and the counts cover the rest of
+    the window, on top of the window's own ``boundary``.
+    """
+    n, Gamma = len(employees), x.shape[1]
+    block = x[employees]
+    worked = block.any(axis=(2, 3)).astype(float)
+    if boundary is not None:
+        history = boundary.history[employees]
+        future = boundary.future[employees] if boundary.future is not None else np.zeros((n, 0))
+        day_offset, delta = boundary.day_offset, boundary.delta
+        weekend_days_off = boundary.weekend_days_off[employees]
+        shifts_worked = boundary.shifts_worked[employees]
+        work_center = boundary.work_center[employees]
+    else:
+        history, future = np.zeros((n, 0)), np.zeros((n, 0))
+        day_offset, delta = 0, DELTA
+        weekend_days_off, shifts_worked = np.zeros(n), np.zeros(n)
+        work_center = np.full(n, -1, dtype=np.int64)
+
+    # Worked flags of the whole timeline, padded so both slices always have HISTORY_DAYS days
+    padding = np.zeros((n, HISTORY_DAYS))
+    timeline = np.hstack([padding, history, worked, future, padding])
+    start = HISTORY_DAYS + history.shape[1] + first
+    outside = np.ones(Gamma, dtype=bool)
+    outside[first:first + days] = False
+    weekend = is_weekend(day_offset + np.arange(Gamma))
+    used = block[:, outside].any(axis=(1, 3))
+    return BoundaryState(
+        day_offset=day_offset + first,
+        history=timeline[:, start - HISTORY_DAYS:start],
+        weekend_days_off=weekend_days_off + (worked[:, outside & weekend] == 0).sum(axis=1),
+        shifts_worked=shifts_worked + worked[:, outside].sum(axis=1),
+        work_center=np.where(used.any(axis=1), used.argmax(axis=1), work_center),
+        delta=delta,
+        future=timeline[:, start + days:start + days + HISTORY_DAYS],
+    )
+
+
+def choose_blocks(x, preferred, work_center, options: LNSOptions, rng) -> list:
+    """Pick up to ``options.neighbourhoods`` blocks with disjoint employees.
+
+    Each block takes employees working at one work center plus idle
+    employees who list it, so the re-solve can hand shifts between them.
+    ``work_center`` is the boundary's committed work center per employee.
+    """
+    E, Gamma = x.shape[:2]
+    days = min(options.block_days, Gamma)
+    used = x.any(axis=(1, 3))
+    assigned = np.where(used.any(axis=1), used.argmax(axis=1), work_center)
+    free = np.ones(E, dtype=bool)
+    blocks = []
+    for _ in range(options.neighbourhoods):
+        busy = np.unique(assigned[free & (assigned >= 0)])
+        if not len(busy):
+            break
+        l = rng.choice(busy)
+        working = np.flatnonzero(free & (assigned == l))
+        idle = np.flatnonzero(free & (assigned < 0) & preferred[:, l])
+        n_working = min(len(working), max(options.block_employees - len(idle), (options.block_employees + 1) // 2))
+        n_idle = min(len(idle), options.block_employees - n_working)
+        employees = np.sort(np.concatenate([rng.choice(working, n_working, replace=False), rng.choice(idle, n_idle, replace=False)]))
+        free[employees] = False
+        blocks.append(Block(employees, int(rng.integers(0, Gamma - days + 1))))
+    return blocks
+
+
+def build_block(k, Phi_k, x, block: Block, days: int, work_centers, existing, demand, boundary: BoundaryState = None):
+    """Build the block's sub-model and price its current assignments as the MIP start.
+
+    ``existing`` is the window coverage of the earlier categories; the
+    category's own employees outside the block are added to it.  The w
+    cost of employees whose work center is fixed by other days of the
+    window is dropped, as they are paid for either way, so block objectives
+    differ exactly as the window objective does.
+    """
+    employees, span = block.employees, slice(block.first, block.first + days)
+    Phi_block, Gamma = [Phi_k[i] for i in employees], x.shape[1]
+    current = x[employees, span]
+    sub_boundary = block_boundary(x, employees, block.first, days, boundary)
+    coverage = existing[span] + x[:, span].sum(axis=0) - current.sum(axis=0)
+    model = build_hesm_matrix_model(k, Phi_block, days, work_centers, coverage, boundary=sub_boundary, demand=demand[span])
+
+    # w carries the C3 sum of the whole window, not only of the block's days
+    outside = np.ones(Gamma, dtype=bool)
+    outside[span] = False
+    costs = cost_tensors(Phi_block, work_centers, Gamma, N_SHIFTS, sub_boundary.day_offset - block.first)
+    live = model.w_index >= 0
+    model.c[model.w_index[live]] += np.broadcast_to(costs.C3[:, outside].sum(axis=1)[:, None], live.shape)[live]
+    paid = x[employees][:, outside].any(axis=(1, 3)) & live
+    model.c[model.w_index[paid]] = 0.0
+
+    block.model = model
+    if (current & (model.x_index < 0)).any():
+        return block
+    block.start = start_vector(model, current, sub_boundary.delta - sub_boundary.shifts_worked)
+    demand_rows = model.demand_rows[model.demand_rows >= 0]
+    if satisfied_rows(model, block.start)[demand_rows].all():
+        block.objective = float(model.c @ block.start)
+    return block
+
+
+async def improve_schedule(k, Phi_k, work_centers, existing, x, boundary: BoundaryState = None, options: LNSOptions = None,
+                           solver_options: Optional[SolverOptions] = None, pool: Optional[SolverPool] = None) -> LNSResult:
+    """Large-neighbourhood search over the window assignments ``x`` of category k.
+
+    Each round frees ``options.neighbourhoods`` blocks of a few employees
+    over ``options.block_days`` consecutive days, re-solves them on the
+    solver ``pool`` with everything else fixed and keeps a re-solve when
+    its objective is lower, or when the current block left demand
+    uncovered.  The blocks of a round share no employee and each
+    keeps the coverage of its own slots (demand rows are equalities), so
+    they can be accepted together.  Arguments are those of
+    :func:`build_hesm_matrix_model` plus ``x``, aligned with ``Phi_k``.
+    """
+    started = time.perf_counter()
+    options = options or LNSOptions()
+    solver_options = solver_options or SolverOptions()
+    pool = pool or SolverPool(size=options.neighbourhoods)
+    rng = np.random.default_rng(options.seed)
+    x = np.asarray(x) > 0.5
+    E, Gamma, L = x.shape[:3]
+    days = min(options.block_days, Gamma)
+    demand = demand_matrix(k, Gamma, work_centers, boundary.day_offset if boundary is not None else 0)
+    preferred = np.array([[wc.id in (e.work_center_preferences or ()) for wc in work_centers] for e in Phi_k], dtype=bool).reshape(E, L)
+    work_center = boundary.work_center if boundary is not None else np.full(E, -1, dtype=np.int64)
+    deadline = started + options.time_limit if options.time_limit else np.inf
+
+    rounds = solved = improved = 0
+    gain = 0.0
+    while time.perf_counter() < deadline and (options.max_rounds is None or rounds < options.max_rounds):
+        blocks = [build_block(k, Phi_k, x, block, days, work_centers, existing, demand, boundary)
+                  for block in choose_blocks(x, preferred, work_center, options, rng)]
+        if not blocks:
+            break
+        limit = min(deadline - time.perf_counter(), solver_options.time_limit or np.inf)
+        limits = solver_options.merged(time_limit=max(limit, 0.1) if np.isfinite(limit) else None)
+        results = await asyncio.gather(*(pool.solve(block.model, limits, block.start) for block in blocks))
+        rounds += 1
+        solved += len(blocks)
+        for block, result in zip(blocks, results):
+            if not result.has_solution or result.objective >= block.objective - 1e-6:
+                continue
+            if np.isfinite(block.objective):
+                gain += block.objective - result.objective
+            x[block.employees, block.first:block.first + days] = block.model.x_values(result.x) > 0.5
+            improved += 1
+
+    result = LNSResult(x, rounds, solved, improved, gain, time.perf_counter() - started)
+    logger.debug(f"LNS for category {k}: {result.summary()}")
+    return result
@@ -0,0 +1,348 @@
+import logging
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+import scipy.sparse as sp
+
+from app.scheduling.cost_model import CostTensors, cost_tensors
+from app.scheduling.presolve import eligibility_masks
+
+logger = logging.getLogger(__name__)
+
+N_SHIFTS = 3
+NON_PREFERRED_PENALTY = 1000
+WEEKENDS_OFF = 2  # n_k, assuming 2 weekend days off for each category
+DELTA = 20  # Delta_k, target number of shifts per employee
+HISTORY_DAYS = 6  # look-back of the windowed rules, C2.2 spans 7 days
+WINDOWED_LIMITS = ((7, 5), (5, 5), (2, 1))  # (days, max shifts) of C2.2, C2.3 and C3
+
+
+def is_weekend(day):
+    """Whether days, counted from the schedule start, fall on a weekend: day 0 is a Monday, as in :func:`cost_tensors`."""
+    return np.asarray(day) % 7 >= 5
+
+
+@dataclass
+class BoundaryState:
+    """Per-employee state of the days committed before a model window.
+
+    Used by the rolling-horizon mode, see :mod:`app.scheduling.rolling_horizon`,
+    and by incremental re-solves, where the days after the window are fixed
+    too and the counts cover every day outside it.  Arrays are aligned with
+    ``Phi_k``.
+    """
+
+    day_offset: int  # first modelled day, relative to the schedule start
+    history: np.ndarray  # (employee, HISTORY_DAYS) worked flags of the days just before the window
+    weekend_days_off: np.ndarray  # (employee,) weekend days off already taken
+    shifts_worked: np.ndarray  # (employee,) shifts already committed
+    work_center: np.ndarray  # (employee,) position of the work center already used, -1 if none
+    delta: float  # Delta target at the end of the window
+    future: Optional[np.ndarray] = None  # (employee, HISTORY_DAYS) worked flags of fixed days just after the window
+
+
+@dataclass
+class HESMMatrixModel:
+    """HESM model for one employee category in matrix form.
+
+    Columns are laid out as x (employee, day, work center, shift), then w
+    (employee, work center), z (employee, day), v (employee) and y (employee,
+    day), the aggregated "works on day d" variable.  Work
+    centers and shifts are addressed by position, i.e. ``l - 1`` / ``t - 1``.
+    x, w and y only have columns where presolve found them eligible; the
+    index arrays hold -1 for the others.
+    """
+
+    name: str
+    employee_ids: np.ndarray
+    work_center_ids: np.ndarray
+    gamma: int
+    c: np.ndarray
+    A: sp.csr_matrix
+    row_lower: np.ndarray
+    row_upper: np.ndarray
+    col_lower: np.ndarray
+    col_upper: np.ndarray
+    integrality: np.ndarray
+    x_index: np.ndarray
+    w_index: np.ndarray
+    z_index: np.ndarray
+    v_index: np.ndarray
+    y_index: np.ndarray
+    demand: np.ndarray  # (day, work center, shift), NaN where no demand row exists
+    demand_rows: np.ndarray  # row of each non-NaN demand slot (in demand[~isnan] order), -1 if dropped
+    eliminated_cols: int = 0  # x/w columns removed by presolve
+    eliminated_rows: int = 0  # rows removed by presolve
+
+    @property
+    def reduction_ratio(self):
+        """Share of the unreduced model's columns removed by presolve."""
+        full = self.num_cols + self.eliminated_cols
+        return self.eliminated_cols / full if full else 0.0
+
+    @property
+    def num_cols(self):
+        return self.c.shape[0]
+
+    @property
+    def num_rows(self):
+        return self.A.shape[0]
+
+    def x_values(self, solution):
+        """Primal values of x as an (employee, day, work center, shift) array."""
+        values = np.zeros(self.x_index.shape)
+        eligible = self.x_index >= 0
+        values[eligible] = solution[self.x_index[eligible]]
+        return values
+
+
+def demand_matrix(k, Gamma: int, work_centers, day_offset: int = 0):
+    """Demand per (day, work center, shift) for category k; NaN where data is missing."""
+    demand = np.full((Gamma, len(work_centers), N_SHIFTS), np.nan)
+    weekend = is_weekend(day_offset + np.arange(Gamma))
+    for l, wc in enumerate(work_centers):
+        if wc is None or wc.demand is None:
+            logger.warning(f"Invalid work center index or missing demand data: {l}")
+            continue
+        for day_type, days in (("weekday", ~weekend), ("weekend", weekend)):
+            if day_type in wc.demand and str(k) in wc.demand[day_type]:
+                demand[days, l, :] = wc.demand[day_type][str(k)][:N_SHIFTS]
+            elif days.any():
+                logger.warning(f"Missing {day_type} demand data for work center {l + 1}, category {k}")
+    return demand
+
+
+def _window_operator(Gamma, width):
+    # Row i sums days i .. i + width - 1
+    return sp.diags([np.ones(Gamma - width + 1)] * width, offsets=range(width), shape=(Gamma - width + 1, Gamma), format="csr")
+
+
+def _gather(index, n_cols):
+    # One row per leading entry of `index`, summing the columns listed along the
+    # trailing axes; negative entries are columns removed by presolve
+    index = index.reshape(index.shape[0], int(np.prod(index.shape[1:])))
+    rows = np.repeat(np.arange(index.shape[0]), index.shape[1])
+    cols = index.ravel()
+    live = cols >= 0
+    return sp.csr_matrix((np.ones(live.sum()), (rows[live], cols[live])), shape=(index.shape[0], n_cols))
+
+
+def _boundary_rows(history, Gamma, width, future=None):
+    # Windows of `width` days that overlap the model but reach into the history
+    # before it or the fixed days after it, split into the model columns and
+    # the days already worked outside the model
+    if future is None:
+        future = np.zeros((history.shape[0], 0))
+    H, F = history.shape[1], future.shape[1]
+    if H + Gamma + F < width:
+        return sp.csr_matrix((0, Gamma)), np.zeros((history.shape[0], 0))
+    starts = np.arange(H + Gamma + F - width + 1)
+    crossing = (starts + width > H) & (starts < H + Gamma) & ((starts < H) | (starts + width > H + Gamma))
+    windows = _window_operator(H + Gamma + F, width)[crossing]
+    outside = sp.hstack([windows[:, :H], windows[:, H + Gamma:]], format="csr")
+    return windows[:, H:H + Gamma], np.hstack([history, future]) @ outside.T
+
+
+def _symmetry_pairs(Phi_k, state=None):
+    # Employees with identical preferences (and boundary state) are ordered by id;
+    # chaining consecutive pairs implies the same ordering as constraining every pair.
+    groups = {}
+    for i, e in enumerate(Phi_k):
+        key = (tuple(e.shift_preferences or ()), tuple(e.work_center_preferences or ()))
+        if state is not None:
+            key += (state[i].tobytes(),)
+        groups.setdefault(key, []).append((e.id, i))
+    pairs = []
+    for members in groups.values():
+        members.sort()
+        pairs.extend((members[j][1], members[j + 1][1]) for j in range(len(members) - 1))
+    return np.array(pairs, dtype=np.int64).reshape(-1, 2)
+
+
+def hesm_objective(model: HESMMatrixModel, Phi_k, work_centers, costs: CostTensors):
+    """Objective coefficients of ``model`` from the category's cost tensors."""
+    E, Gamma, L, T = model.x_index.shape
+    x_live, w_live, y_live = model.x_index >= 0, model.w_index >= 0, model.y_index >= 0
+    preferred = np.array([[wc.id in (e.work_center_preferences or ()) for wc in work_centers] for e in Phi_k], dtype=bool).reshape(E, L)
+
+    # Rate and non-preferred penalty on w, combined preference on x,
+    # C3 * (w - z) summed over days and work centers, and the Delta deviation v
+    c = np.zeros(model.A.shape[1])
+    c[model.x_index[x_live]] = np.broadcast_to(costs.C_combined[:, None, :, :], x_live.shape)[x_live]
+    c[model.w_index[w_live]] = (costs.hourly_rate[:, None] + NON_PREFERRED_PENALTY * ~preferred + costs.C3.sum(axis=1)[:, None])[w_live]
+    c[model.z_index] = -L * costs.C3
+    c[model.v_index] = 1.0
+    c[model.y_index[y_live]] = 0.0
+    return c
+
+
+def build_hesm_matrix_model(k, Phi_k, Gamma, work_centers, existing, boundary: BoundaryState = None, demand=None, closed_days=None):
+    """Assemble the HESM model for category k as sparse constraint blocks.
+
+    ``existing`` is the (day, work center, shift) coverage already provided by
+    earlier categories, see :meth:`CoverageIndex.slot_coverage`.  With a
+    ``boundary`` the model covers the window starting at
+    ``boundary.day_offset`` and the windowed rules, the weekend-off rule and
+    the Delta deviation also count the shifts committed before it.
+    ``demand`` may be passed when the caller already computed
+    :func:`demand_matrix` or overrides some of its days.  ``closed_days``
+    marks (employee, day) pairs an employee cannot work, e.g. call-offs.
+    """
+    E, L, T = len(Phi_k), len(work_centers), N_SHIFTS
+    employee_ids = np.array([e.id for e in Phi_k], dtype=np.int64)
+    work_center_ids = np.array([wc.id for wc in work_centers], dtype=np.int64)
+
+    day_offset = boundary.day_offset if boundary is not None else 0
+    history = boundary.history if boundary is not None else np.zeros((E, 0))
+    future = boundary.future if boundary is not None and boundary.future is not None else np.zeros((E, 0))
+    if demand is None:
+        demand = demand_matrix(k, Gamma, work_centers, day_offset)
+    weekend = is_weekend(day_offset + np.arange(Gamma)).astype(float)
+    weekends_off = WEEKENDS_OFF if boundary is None else np.maximum(WEEKENDS_OFF - boundary.weekend_days_off, 0)
+    weekend_limit = np.broadcast_to(weekend.sum() - weekends_off, E)
+
+    # Presolve: days an employee cannot work at all, then the eligible x/w
+    open_days = np.ones((E, Gamma), dtype=bool) if closed_days is None else ~closed_days
+    open_days[:, weekend > 0] &= (weekend_limit > 0)[:, None]
+    for width, limit in WINDOWED_LIMITS:
+        op, worked = _boundary_rows(history, Gamma, width, future)
+        open_days &= ~((worked >= limit).astype(float) @ op).astype(bool)
+    masks = eligibility_masks(Phi_k, work_centers, demand, existing, open_days,
+                              boundary.work_center if boundary is not None else None)
+
+    # Column layout: only eligible x, w and y are created, -1 marks the others
+    works = masks.x.any(axis=(2, 3))
+    n_x, n_w, n_z, n_y = int(masks.x.sum()), int(masks.w.sum()), E * Gamma, int(works.sum())
+    x_index = np.full((E, Gamma, L, T), -1, dtype=np.int64)
+    x_index[masks.x] = np.arange(n_x)
+    w_index = np.full((E, L), -1, dtype=np.int64)
+    w_index[masks.w] = n_x + np.arange(n_w)
+    z_index = n_x + n_w + np.arange(n_z).reshape(E, Gamma)
+    v_index = n_x + n_w + n_z + np.arange(E)
+    y_index = np.full((E, Gamma), -1, dtype=np.int64)
+    y_index[works] = n_x + n_w + n_z + E + np.arange(n_y)
+    n = n_x + n_w + n_z + E + n_y
+
+    # Shared operators: daily workload y per (employee, day), work-center selection per employee
+    daily = _gather(y_index.reshape(E * Gamma, 1), n)
+    selected = _gather(w_index, n)
+
+    def per_employee(op):
+        return sp.kron(sp.identity(E, format="csr"), op, format="csr")
+
+    total = per_employee(sp.csr_matrix(np.ones((1, Gamma)))) @ daily
+
+    blocks = []
+
+    def add(block, lower, upper):
+        m = block.shape[0]
+        blocks.append((sp.csr_matrix(block), np.broadcast_to(lower, m), np.broadcast_to(upper, m)))
+
+    def add_windowed(width, limit):
+        # Windows reaching into the committed or fixed days, limited by what was worked there
+        op, worked = _boundary_rows(history, Gamma, width, future)
+        if op.shape[0] and (history.any() or future.any()):
+            add(per_employee(op) @ daily, -np.inf, np.maximum(limit - worked, 0).ravel())
+
+    # Aggregated daily workload: y[e, d] == sum_{l, t} x[e, d, l, t]; the
+    # windowed rules below are written against y instead of re-summing x
+    linked = works.ravel()
+    add(daily[linked] - _gather(x_index.reshape(E * Gamma, L * T)[linked], n), 0, 0)
+
+    # Demand coverage: sum_e x[e, d, l, t] == demand - existing
+    slots = ~np.isnan(demand)
+    rhs = (demand - existing)[slots]
+    slot_cols = np.moveaxis(x_index, 0, -1)[slots]
+    demand_start = sum(b.shape[0] for b, _, _ in blocks)
+    add(_gather(slot_cols, n), rhs, rhs)
+
+    # Constraint (C2.1): At most one shift per day for each employee
+    add(daily - per_employee(sp.csr_matrix(np.ones((Gamma, 1)))) @ selected, -np.inf, 0)
+
+    # Constraint (C2.2): Maximum five shifts per week for each employee
+    if Gamma >= 7:
+        add(per_employee(_window_operator(Gamma, 7)) @ daily - 5 * per_employee(sp.csr_matrix(np.ones((Gamma - 6, 1)))) @ selected, -np.inf, 0)
+    add_windowed(7, 5)
+
+    # Constraint (C2.3): Maximum five consecutive working days
+    if Gamma >= 5:
+        add(per_employee(_window_operator(Gamma, 5)) @ daily, -np.inf, 5)
+    add_windowed(5, 5)
+
+    # Constraint (C2.4): Weekend off preference
+    add(per_employee(sp.csr_matrix(weekend[None, :])) @ daily, -np.inf, weekend_limit)
+
+    # Constraint (C2.5): Employee selection constraint
+    add(selected, -np.inf, 1)
+
+    # Constraint (C3): Avoiding consecutive shifts
+    if Gamma >= 2:
+        add(per_employee(_window_operator(Gamma, 2)) @ daily, -np.inf, 1)
+    add_windowed(2, 1)
+
+    # Constraint (C4.1): Delta calculation
+    v_cols = sp.csr_matrix((np.ones(E), (np.arange(E), v_index)), shape=(E, n))
+    delta = DELTA if boundary is None else boundary.delta - boundary.shifts_worked
+    add(v_cols - total, -delta, np.inf)
+    add(v_cols + total, delta, np.inf)
+
+    # Symmetry-breaking constraints
+    state = None
+    if boundary is not None:
+        state = np.column_stack([history, future, boundary.weekend_days_off, boundary.shifts_worked, boundary.work_center])
+    pairs = _symmetry_pairs(Phi_k, state)
+    if len(pairs):
+        add(total[pairs[:, 0]] - total[pairs[:, 1]], 0, np.inf)
+
+    # x variables are consistent with w variables; non-preferred work centers
+    # have no w column at all, so they need no rows forcing them to zero
+    w_of_x = np.broadcast_to(w_index[:, None, :, None], x_index.shape)[masks.x]
+    add(_gather(x_index[masks.x].reshape(-1, 1), n) - _gather(w_of_x.reshape(-1, 1), n), -np.inf, 0)
+
+    A = sp.vstack([b for b, _, _ in blocks], format="csr")
+    row_lower = np.concatenate([lo for _, lo, _ in blocks]).astype(float)
+    row_upper = np.concatenate([hi for _, _, hi in blocks]).astype(float)
+
+    # Rows left without columns are dropped when they hold anyway
+    keep = (np.diff(A.indptr) > 0) | (row_lower > 0) | (row_upper < 0)
+    A, row_lower, row_upper = A[keep], row_lower[keep], row_upper[keep]
+    demand_slice = slice(demand_start, demand_start + len(rhs))
+    demand_rows = np.where(keep[demand_slice], np.cumsum(keep)[demand_slice] - 1, -1)
+
+    col_lower = np.zeros(n)
+    col_upper = np.ones(n)
+    col_upper[v_index] = np.inf
+    integrality = np.ones(n, dtype=np.uint8)
+    integrality[v_index] = 0
+    integrality[y_index[works]] = 0  # integral through the link to x
+
+    full_cols = E * Gamma * L * T + E * L + n_z + E + E * Gamma
+    # x <= w and w == 0 rows of the eliminated columns, plus the dropped empty rows
+    preferred = np.array([[wc.id in (e.work_center_preferences or ()) for wc in work_centers] for e in Phi_k], dtype=bool).reshape(E, L)
+    eliminated_rows = (E * Gamma * L * T - n_x) + int((~preferred).sum()) + int((~keep).sum())
+    logger.debug(f"HESM_{k} presolve: {n_x}/{E * Gamma * L * T} x and {n_w}/{E * L} w columns kept")
+
+    model = HESMMatrixModel(
+        name=f"HESM_{k}",
+        employee_ids=employee_ids,
+        work_center_ids=work_center_ids,
+        gamma=Gamma,
+        c=np.zeros(n),
+        A=A,
+        row_lower=row_lower,
+        row_upper=row_upper,
+        col_lower=col_lower,
+        col_upper=col_upper,
+        integrality=integrality,
+        x_index=x_index,
+        w_index=w_index,
+        z_index=z_index,
+        v_index=v_index,
+        y_index=y_index,
+        demand=demand,
+        demand_rows=demand_rows,
+        eliminated_cols=full_cols - n,
+        eliminated_rows=eliminated_rows,
+    )
+    model.c = hesm_objective(model, Phi_k, work_centers, cost_tensors(Phi_k, work_centers, Gamma, T, day_offset))
+    return model
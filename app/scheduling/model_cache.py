@@ -0,0 +1,194 @@
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import fields, replace
+from typing import Optional
+
+import numpy as np
+import scipy.sparse as sp
+
+from app.scheduling.cost_model import cost_tensors
+from app.scheduling.model_builder import N_SHIFTS, BoundaryState, HESMMatrixModel, build_hesm_matrix_model, demand_matrix, hesm_objective
+
+logger = logging.getLogger(__name__)
+
+
+def model_fingerprint(k, Phi_k, Gamma: int, work_centers, demand, existing, boundary: Optional[BoundaryState] = None) -> str:
+    """Hash of everything that shapes the constraint matrix of a category model.
+
+    That is the employees and their preferences, the work centers, ``Gamma``,
+    the rolling-horizon boundary and which demand slots exist or are already
+    fully covered (presolve drops the latter).  Demand numbers, existing
+    coverage and the preference costs only reach right-hand sides and the
+    objective.
+    """
+    h = hashlib.sha256()
+    h.update(repr((k, Gamma, [wc.id for wc in work_centers])).encode())
+    for e in Phi_k:
+        h.update(repr((e.id, tuple(e.shift_preferences or ()), tuple(e.work_center_preferences or ()))).encode())
+    slots = ~np.isnan(demand)
+    h.update(np.packbits(slots).tobytes())
+    h.update(np.packbits(slots & (demand - existing == 0)).tobytes())
+    if boundary is not None:
+        h.update(repr((boundary.day_offset, boundary.delta)).encode())
+        for array in (boundary.history, boundary.weekend_days_off, boundary.shifts_worked, boundary.work_center):
+            h.update(np.ascontiguousarray(array).tobytes())
+        if boundary.future is not None:
+            h.update(np.ascontiguousarray(boundary.future).tobytes())
+    return h.hexdigest()
+
+
+def patch_hesm_model(model: HESMMatrixModel, Phi_k, work_centers, demand, existing, day_offset: int = 0) -> HESMMatrixModel:
+    """Copy of a compiled ``model`` with new demand right-hand sides and objective.
+
+    Only valid for an instance with the same :func:`model_fingerprint`; the
+    constraint matrix and index arrays are shared with ``model``.
+    """
+    rhs = (demand - existing)[~np.isnan(demand)]
+    kept = model.demand_rows >= 0
+    row_lower, row_upper = model.row_lower.copy(), model.row_upper.copy()
+    row_lower[model.demand_rows[kept]] = rhs[kept]
+    row_upper[model.demand_rows[kept]] = rhs[kept]
+    patched = replace(model, row_lower=row_lower, row_upper=row_upper, demand=demand)
+    patched.c = hesm_objective(patched, Phi_k, work_centers, cost_tensors(Phi_k, work_centers, model.gamma, N_SHIFTS, day_offset))
+    return patched
+
+
+def _model_nbytes(model: HESMMatrixModel):
+    total = model.A.data.nbytes + model.A.indices.nbytes + model.A.indptr.nbytes
+    for f in fields(model):
+        value = getattr(model, f.name)
+        if isinstance(value, np.ndarray):
+            total += value.nbytes
+    return total
+
+
+def _save_model(path, model: HESMMatrixModel):
+    arrays = {}
+    for f in fields(model):
+        value = getattr(model, f.name)
+        if f.name == "A":
+            arrays.update(A_data=value.data, A_indices=value.indices, A_indptr=value.indptr, A_shape=np.array(value.shape))
+        else:
+            arrays[f.name] = np.asarray(value)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        np.savez(fh, **arrays)
+    os.replace(tmp, path)
+
+
+def _load_model(path) -> HESMMatrixModel:
+    with np.load(path, allow_pickle=False) as data:
+        values = {name: data[name] for name in data.files}
+    A = sp.csr_matrix((values.pop("A_data"), values.pop("A_indices"), values.pop("A_indptr")), shape=tuple(values.pop("A_shape")))
+    for name in ("gamma", "eliminated_cols", "eliminated_rows"):
+        values[name] = int(values[name])
+    values["name"] = str(values["name"])
+    return HESMMatrixModel(A=A, **values)
+
+
+class ModelCache:
+    """Compiled category models keyed by :func:`model_fingerprint`.
+
+    An in-memory LRU tier holds up to ``max_bytes`` of models; with a
+    ``directory`` every compiled model is also written there as an ``.npz``
+    file, up to ``disk_max_bytes`` (least recently used files go first).  A
+    hit only patches the demand right-hand sides and the objective.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 ** 2, directory: Optional[str] = None, disk_max_bytes: int = 1024 ** 3):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self._models = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            max_bytes=settings.MODEL_CACHE_MAX_BYTES,
+            directory=settings.MODEL_CACHE_DIR,
+            disk_max_bytes=settings.MODEL_CACHE_DISK_MAX_BYTES,
+        )
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "models": len(self._models),
+            "bytes": self._bytes,
+        }
+
+    def get_or_build(self, k, Phi_k, Gamma, work_centers, existing, boundary: Optional[BoundaryState] = None) -> HESMMatrixModel:
+        """Same as :func:`build_hesm_matrix_model`, reusing a compiled model when possible."""
+        day_offset = boundary.day_offset if boundary is not None else 0
+        demand = demand_matrix(k, Gamma, work_centers, day_offset)
+        key = model_fingerprint(k, Phi_k, Gamma, work_centers, demand, existing, boundary)
+
+        model = self._models.get(key)
+        if model is not None:
+            self._models.move_to_end(key)
+            self.hits += 1
+            return patch_hesm_model(model, Phi_k, work_centers, demand, existing, day_offset)
+
+        path = self._path(key)
+        if path and os.path.exists(path):
+            try:
+                model = _load_model(path)
+            except (OSError, ValueError, KeyError):
+                logger.warning(f"Discarding unreadable cached model {path}", exc_info=True)
+                os.remove(path)
+            else:
+                os.utime(path)
+                self.disk_hits += 1
+                self._remember(key, model)
+                return patch_hesm_model(model, Phi_k, work_centers, demand, existing, day_offset)
+
+        self.misses += 1
+        model = build_hesm_matrix_model(k, Phi_k, Gamma, work_centers, existing, boundary=boundary, demand=demand)
+        self._remember(key, model)
+        if path:
+            _save_model(path, model)
+            self._trim_disk()
+        return model
+
+    def clear(self):
+        self._models.clear()
+        self._bytes = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz") if self.directory else None
+
+    def _remember(self, key, model):
+        size = _model_nbytes(model)
+        if size > self.max_bytes:
+            return
+        self._models[key] = model
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._models.popitem(last=False)
+            self._bytes -= _model_nbytes(evicted)
+            self.evictions += 1
+
+    def _trim_disk(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.disk_max_bytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            total -= size
+            self.evictions += 1
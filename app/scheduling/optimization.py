@@ -1,71 +1,423 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
 import numpy as np
 
-def calculate_fitness(schedule, assignments):
-    coverage_score = calculate_coverage_score(schedule, assignments)
-    cost_score = calculate_cost_score(schedule, assignments)
-    preference_score = calculate_preference_score(assignments)
-    fairness_score = calculate_fairness_score(assignments)
-    
-    return coverage_score + cost_score + preference_score + fairness_score
-
-def calculate_coverage_score(schedule, assignments):
-    # Implement logic to calculate how well the schedule meets demand requirements
-    pass
-
-def calculate_cost_score(schedule, assignments):
-    # Implement logic to calculate the cost of the workforce mix
-    pass
-
-def calculate_preference_score(assignments):
-    score = 0
-    for assignment in assignments:
-        employee = assignment.shift.employee
-        # Shift preference
-        shift_index = (assignment.shift.start_time.hour - 6) // 8
-        shift_preference = employee.shift_preferences.index(shift_index + 1) + 1
-        score += (4 - shift_preference)  # 3 points for 1st preference, 2 for 2nd, 1 for 3rd
-        
-        # Work center preference
-        work_center_preference = employee.work_center_preferences.index(assignment.shift.work_center_id) + 1
-        score += (len(employee.work_center_preferences) + 1 - work_center_preference)
-        
-        # Off-day preference (higher score for respecting off-day preferences)
-        if is_off_day(employee, assignment.shift.start_time):
-            score -= 5
-    
-    return score
+from app.scheduling.cost_model import cost_tensors
+from app.scheduling.heuristic import greedy_schedule
+from app.scheduling.model_builder import N_SHIFTS, WEEKENDS_OFF, WINDOWED_LIMITS, BoundaryState, demand_matrix, is_weekend
+from app.scheduling.scoring import ScheduleScores, ScoringTables, category_scoring_tables, coverage_counts, score_schedules
+from app.scheduling.validation import validate_work, work_array
+
+logger = logging.getLogger(__name__)
+
+COVERAGE_PENALTY = 100.0  # per shift short of or above demand, above any preference cost of a shift
+
+
+@dataclass
+class GeneticOptions:
+    """Engine choice and limits of the genetic engine, see :func:`evolve_schedule`.
+
+    ``engine`` is ``mip``, ``genetic``, or ``auto``, which uses the genetic
+    engine for categories with more than ``auto_size`` (employee, day, work
+    center, shift) candidates.  Deployment defaults come from the
+    ``SCHEDULE_ENGINE`` and ``GENETIC_*`` settings.
+    """
+
+    engine: str = "mip"
+    auto_size: int = 20_000_000
+    population: int = 64
+    generations: int = 500
+    time_limit: Optional[float] = 60.0  # wall-clock seconds per category
+    mutation_rate: float = 0.01  # share of genes mutated per child
+    elite: int = 2  # best individuals carried over unchanged
+    workers: int = 1  # > 1 evaluates fitness batches in this many processes
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            engine=settings.SCHEDULE_ENGINE,
+            auto_size=settings.GENETIC_AUTO_SIZE,
+            population=settings.GENETIC_POPULATION,
+            generations=settings.GENETIC_GENERATIONS,
+            time_limit=settings.GENETIC_TIME_LIMIT,
+            workers=settings.GENETIC_WORKERS,
+        )
+
+    def selects(self, size: int):
+        """Whether a category with ``size`` candidates goes to the genetic engine."""
+        if self.engine not in ("mip", "genetic", "auto"):
+            raise ValueError(f"Unknown schedule engine: {self.engine}")
+        return self.engine == "genetic" or (self.engine == "auto" and size > self.auto_size)
+
+
+@dataclass
+class GeneticProblem:
+    """One category pass as plain arrays aligned with ``Phi_k``, cheap to send to a worker process."""
+
+    tables: ScoringTables  # of the category pass, see :func:`category_scoring_tables`
+    eligible: np.ndarray  # (employee, work center) preferred, and the committed one in rolling windows
+    open_days: np.ndarray  # (employee, day)
+    history: np.ndarray  # (employee, days) worked flags of the days before the window
+    weekend: np.ndarray  # (day,)
+    weekend_limit: np.ndarray  # (employee,) weekend days that may still be worked
+
+    @property
+    def need(self):
+        """(day, work center, shift) demand left after earlier categories, NaN without demand."""
+        return self.tables.demand[0] - self.tables.existing
+
+
+@dataclass
+class Population:
+    """Chromosomes of a population, one entry per individual along the first axis.
+
+    ``shifts[p, e, d]`` is 0 when employee e is off on day d and t + 1 when
+    they work shift t; ``work_center[p, e]`` is the position of the single
+    work center the employee works at (C2.5), -1 when they do not work.
+    """
+
+    shifts: np.ndarray  # (individual, employee, day) int8
+    work_center: np.ndarray  # (individual, employee) int16
+
+    def __len__(self):
+        return self.shifts.shape[0]
+
+    def take(self, index):
+        return Population(self.shifts[index], self.work_center[index])
+
+    def codes(self):
+        """Slot codes of every individual, as :func:`score_schedules` reads them."""
+        return np.where(self.shifts > 0, self.work_center[:, :, None].astype(np.int16) * N_SHIFTS + self.shifts, 0).astype(np.int16)
+
+    def x(self, i: int, n_work_centers: int):
+        """Individual ``i`` as an (employee, day, work center, shift) boolean array."""
+        E, Gamma = self.shifts.shape[1:]
+        x = np.zeros((E, Gamma, n_work_centers, N_SHIFTS), dtype=bool)
+        e, d = np.nonzero(self.shifts[i])
+        x[e, d, self.work_center[i, e], self.shifts[i, e, d] - 1] = True
+        return x
+
+    @classmethod
+    def from_x(cls, x):
+        E, Gamma, L, T = x.shape
+        works = x.any(axis=(2, 3))
+        shifts = np.where(works, x.any(axis=2).argmax(axis=2) + 1, 0).astype(np.int8)
+        used = x.any(axis=(1, 3))
+        work_center = np.where(used.any(axis=1), used.argmax(axis=1), -1).astype(np.int16)
+        return cls(shifts[None], work_center[None])
+
+
+@dataclass
+class GeneticResult:
+    x: np.ndarray  # (employee, day, work center, shift) of the best individual
+    cost: float  # preference, rate and Delta deviation of the best individual
+    coverage_gap: int  # shifts short of or above demand
+    seed_fitness: float  # fitness of the greedy schedule the population started from
+    fitness: float
+    generations: int
+    elapsed: float
+
+    def summary(self):
+        return {
+            "backend": "genetic",
+            "status": "feasible" if self.coverage_gap == 0 else "partial",
+            "objective": self.cost,
+            "coverage_gap": self.coverage_gap,
+            "improvement": self.seed_fitness - self.fitness,
+            "generations": self.generations,
+            "solve_time": round(self.elapsed, 4),
+        }
+
+
+def genetic_problem(k, Phi_k, Gamma, work_centers, existing, boundary: BoundaryState = None, demand=None, closed_days=None) -> GeneticProblem:
+    """Arrays of the category pass; takes the same arguments as :func:`build_hesm_matrix_model`.
+
+    Only the days before a ``boundary`` window are modelled; fixed days after
+    it (``boundary.future``) are not.
+    """
+    E, L = len(Phi_k), len(work_centers)
+    day_offset = boundary.day_offset if boundary is not None else 0
+    if demand is None:
+        demand = demand_matrix(k, Gamma, work_centers, day_offset)
+    eligible = cost_tensors(Phi_k, work_centers, Gamma, N_SHIFTS, day_offset).C2[:, :, 0] < 1
+    if boundary is not None:
+        eligible &= (boundary.work_center[:, None] < 0) | (np.arange(L) == boundary.work_center[:, None])
+    weekend = is_weekend(day_offset + np.arange(Gamma))
+    weekends_off = WEEKENDS_OFF if boundary is None else np.maximum(WEEKENDS_OFF - boundary.weekend_days_off, 0)
+    return GeneticProblem(
+        tables=category_scoring_tables(k, Phi_k, Gamma, work_centers, existing, boundary, demand),
+        eligible=eligible,
+        open_days=np.ones((E, Gamma), dtype=bool) if closed_days is None else ~closed_days,
+        history=(boundary.history > 0.5).astype(np.int8) if boundary is not None else np.zeros((E, 0), dtype=np.int8),
+        weekend=weekend,
+        weekend_limit=np.broadcast_to(weekend.sum() - weekends_off, E).astype(np.int64),
+    )
+
+
+def _coverage_gap(scores: ScheduleScores):
+    return scores.shortfall + scores.surplus
+
 
 def calculate_constraint_score(assignments):
-    score = 0
-    # Check for violations of constraints (e.g., working more than 5 consecutive days)
-    # Subtract points for each violation
-    return score
-
-def calculate_fairness_score(assignments):
-    employee_scores = {}
-    for assignment in assignments:
-        employee = assignment.shift.employee
-        if employee.id not in employee_scores:
-            employee_scores[employee.id] = 0
-        
-        # Add points for preferred shifts and work centers
-        shift_index = (assignment.shift.start_time.hour - 6) // 8
-        shift_preference = employee.shift_preferences.index(shift_index + 1) + 1
-        employee_scores[employee.id] += (4 - shift_preference)
-        
-        work_center_preference = employee.work_center_preferences.index(assignment.shift.work_center_id) + 1
-        employee_scores[employee.id] += (len(employee.work_center_preferences) + 1 - work_center_preference)
-    
-    # Calculate standard deviation of scores (lower is better)
-    return -np.std(list(employee_scores.values()))
-
-def crossover(parent1, parent2):
-    mask = np.random.rand(*parent1.assignments.shape) < 0.5
-    child = Schedule(parent1.assignments.shape[0], parent1.assignments.shape[1])
-    child.assignments = np.where(mask, parent1.assignments, parent2.assignments)
-    return child
-
-def mutate(schedule, mutation_rate=0.01):
-    mutation_mask = np.random.rand(*schedule.assignments.shape) < mutation_rate
-    schedule.assignments = np.logical_xor(schedule.assignments, mutation_mask).astype(np.int8)
-    return schedule
+    """Minus the number of C2.1-C3 violations of ``ScheduleAssignment`` rows, see :func:`validate_work`."""
+    rows = [(a.shift.employee_id, a.shift.work_center_id, a.shift.start_time) for a in assignments]
+    if not rows:
+        return 0
+    first, last = min(row[2] for row in rows).date(), max(row[2] for row in rows).date()
+    work = work_array(rows, first, (last - first).days + 1)
+    return -len(validate_work(work))
+
+
+def _evaluate(problem, population):
+    # COVERAGE_PENALTY per shift off demand on top of the HESM objective
+    scores = score_schedules(problem.tables, population.codes())
+    return COVERAGE_PENALTY * _coverage_gap(scores) + scores.objective
+
+
+# In a fitness worker: the pool's problem store, and the problem last read from it as (key, problem)
+_worker_problems = None
+_worker_problem = (None, None)
+
+
+def _init_fitness_worker(problems):
+    global _worker_problems
+    _worker_problems = problems
+
+
+def _evaluate_in_worker(key, population):
+    global _worker_problem
+    if _worker_problem[0] != key:
+        _worker_problem = (key, _worker_problems[key])
+    return _evaluate(_worker_problem[1], population)
+
+
+class FitnessPool:
+    """Fitness worker processes, shared by every genetic solve of a schedule.
+
+    A problem is pickled once into a store the initializer hands to every
+    worker, and each worker reads it from there once; batches then carry
+    only population slices and the problem's key.
+    """
+
+    def __init__(self, workers: int):
+        context = multiprocessing.get_context("spawn")
+        self._manager = context.Manager()
+        self._problems = self._manager.dict()
+        self._executor = ProcessPoolExecutor(workers, mp_context=context, initializer=_init_fitness_worker, initargs=(self._problems,))
+        self._problem = None
+        self._key = 0
+
+    def map(self, problem: GeneticProblem, batches):
+        if problem is not self._problem:
+            # Workers only ever need the problem being solved
+            self._key += 1
+            self._problems.clear()
+            self._problems[self._key] = problem
+            self._problem = problem
+        return self._executor.map(_evaluate_in_worker, [self._key] * len(batches), batches)
+
+    def shutdown(self):
+        self._executor.shutdown()
+        self._manager.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+def calculate_fitness(problem: GeneticProblem, population: Population, pool: Optional[FitnessPool] = None, batch_size: int = 16):
+    """Fitness of every individual, lower is better.
+
+    Individuals are scored together in one pass; with a ``pool`` started by
+    :func:`fitness_pool`, in batches of ``batch_size`` across its processes.
+    """
+    if pool is None:
+        return _evaluate(problem, population)
+    batches = [population.take(slice(i, i + batch_size)) for i in range(0, len(population), batch_size)]
+    return np.concatenate(list(pool.map(problem, batches)))
+
+
+def fitness_pool(workers: int) -> FitnessPool:
+    return FitnessPool(workers)
+
+
+def _random_work_centers(problem, employees, rng):
+    # A random eligible work center for each of `employees`, -1 for those without one
+    scores = rng.random((len(employees), problem.eligible.shape[1])) * problem.eligible[employees]
+    return np.where(scores.max(axis=1) > 0, scores.argmax(axis=1), -1).astype(np.int16)
+
+
+def crossover(parents_a: Population, parents_b: Population, rng):
+    """Uniform crossover over employees: each child takes an employee's days and work center from one parent.
+
+    Every hard rule is per employee, so children of feasible parents only
+    differ from them in coverage.
+    """
+    from_a = rng.random(parents_a.work_center.shape) < 0.5
+    return Population(
+        np.where(from_a[:, :, None], parents_a.shifts, parents_b.shifts),
+        np.where(from_a, parents_a.work_center, parents_b.work_center),
+    )
+
+
+def mutate(problem: GeneticProblem, population: Population, mutation_rate: float, rng):
+    """Mutate ``population`` in place and return it.
+
+    About ``mutation_rate`` of the day genes are exchanged between two
+    employees of the same work center on the same day, which moves shifts
+    without changing coverage.  Half of the individuals also get shifts
+    added to slots short of demand and dropped from slots above it.
+    """
+    shifts, work_center = population.shifts, population.work_center
+    P, E, Gamma = shifts.shape
+
+    n_swaps = int(mutation_rate * P * E * Gamma)
+    if n_swaps and E > 1:
+        p, d = rng.integers(0, P, n_swaps), rng.integers(0, Gamma, n_swaps)
+        a, b = rng.integers(0, E, n_swaps), rng.integers(0, E, n_swaps)
+        same = (work_center[p, a] == work_center[p, b]) & (work_center[p, a] >= 0)
+        p, d, a, b = p[same], d[same], a[same], b[same]
+        shifts[p, a, d], shifts[p, b, d] = shifts[p, b, d], shifts[p, a, d]
+
+    # Coverage moves, in half of the individuals: shifts added to about a
+    # tenth of the slots short of demand and dropped from a tenth of those above it
+    gap = np.nan_to_num(problem.need) - coverage_counts(problem.tables, population.codes())[:, 0]
+    gap[:, np.isnan(problem.need)] = 0
+    for p in np.flatnonzero(rng.random(P) < 0.5):
+        short, over = np.argwhere(gap[p] > 0), np.argwhere(gap[p] < 0)
+        for d, l, t in short[rng.permutation(len(short))[:1 + len(short) // 10]]:
+            # Someone off that day at this work center or none yet, preferably
+            # also off the days around it (C3); otherwise those shifts are
+            # dropped and their slots are left to later generations
+            candidates = problem.eligible[:, l] & problem.open_days[:, d] & (shifts[p, :, d] == 0) & ((work_center[p] == l) | (work_center[p] < 0))
+            free = candidates & (shifts[p, :, max(d - 1, 0):d + 2] == 0).all(axis=1)
+            if d == 0 and problem.history.shape[1]:
+                free &= problem.history[:, -1] == 0
+            pick = np.flatnonzero(free if free.any() else candidates)
+            if len(pick):
+                e = pick[rng.integers(len(pick))]
+                shifts[p, e, max(d - 1, 0):d + 2] = 0
+                shifts[p, e, d], work_center[p, e] = t + 1, l
+        for d, l, t in over[rng.permutation(len(over))[:1 + len(over) // 10]]:
+            busy = np.flatnonzero((work_center[p] == l) & (shifts[p, :, d] == t + 1))
+            if len(busy):
+                shifts[p, busy[rng.integers(len(busy))], d] = 0
+    return population
+
+
+def repair(problem: GeneticProblem, population: Population, rng):
+    """Restore the hard rules in place and return ``population``.
+
+    Anyone who works gets an eligible work center (C2.5), closed days are
+    cleared, and a pass over the days drops every shift that would break
+    C2.1, C2.2, C2.3 or C3 given the days before it, then every weekend
+    shift beyond the weekend-off limit (C2.4).
+    """
+    shifts, work_center = population.shifts, population.work_center
+    P, E, Gamma = shifts.shape
+    H = problem.history.shape[1]
+
+    works = (shifts > 0).any(axis=2)
+    valid = (work_center >= 0) & problem.eligible[np.arange(E), np.maximum(work_center, 0)]
+    p, e = np.nonzero(works & ~valid)
+    work_center[p, e] = _random_work_centers(problem, e, rng)
+    shifts[work_center < 0] = 0
+    shifts[:, ~problem.open_days] = 0
+
+    # Day by day over a day-major copy, with a running count of worked days
+    # (history first): windows ending on day d may hold limit - 1 earlier
+    # shifts for d to be worked
+    by_day = np.ascontiguousarray(shifts.transpose(2, 0, 1))
+    count = np.zeros((H + Gamma + 1, P, E), dtype=np.int16)
+    count[1:H + 1] = np.cumsum(problem.history.T, axis=0)[:, None, :]
+    for d in range(Gamma):
+        j = H + d
+        keep = by_day[d] > 0
+        for width, limit in WINDOWED_LIMITS:
+            keep &= count[j] - count[max(j - width + 1, 0)] < limit
+        by_day[d] *= keep
+        count[j + 1] = count[j] + keep
+
+    weekend_shifts = by_day[problem.weekend]
+    weekend_shifts[np.cumsum(weekend_shifts > 0, axis=0) > problem.weekend_limit[None, None, :]] = 0
+    by_day[problem.weekend] = weekend_shifts
+    shifts[...] = by_day.transpose(1, 2, 0)
+
+    work_center[~(shifts > 0).any(axis=2)] = -1
+    return population
+
+
+def _tournament(fitness, n, rng):
+    # Winners of n binary tournaments
+    a, b = rng.integers(0, len(fitness), n), rng.integers(0, len(fitness), n)
+    return np.where(fitness[a] <= fitness[b], a, b)
+
+
+def evolve_schedule(k, Phi_k, Gamma, work_centers, existing, boundary: BoundaryState = None, demand=None, closed_days=None,
+                    options: Optional[GeneticOptions] = None, pool: Optional[FitnessPool] = None) -> GeneticResult:
+    """Search the schedule of category k with a genetic algorithm.
+
+    Takes the same arguments as :func:`build_hesm_matrix_model`.  The
+    population starts from mutated copies of the :func:`greedy_schedule`
+    solution; each generation keeps ``options.elite`` individuals and fills
+    the rest with repaired children of tournament-selected parents, so every
+    individual satisfies the hard rules and fitness only weighs coverage
+    against cost.  Stops after ``options.generations`` or ``options.time_limit``.
+    Fitness is evaluated on ``pool`` when given; otherwise, with
+    ``options.workers`` > 1, on a :func:`fitness_pool` started for this call.
+    """
+    started = time.perf_counter()
+    options = options or GeneticOptions()
+    rng = np.random.default_rng(options.seed)
+    L = len(work_centers)
+    problem = genetic_problem(k, Phi_k, Gamma, work_centers, existing, boundary, demand, closed_days)
+
+    greedy = greedy_schedule(k, Phi_k, Gamma, work_centers, existing, boundary=boundary, demand=demand, closed_days=closed_days)
+    seed = Population.from_x(greedy.x)
+    size = max(options.population, options.elite + 2)
+    population = Population(np.repeat(seed.shifts, size, axis=0), np.repeat(seed.work_center, size, axis=0))
+    repair(problem, mutate(problem, population.take(slice(1, None)), options.mutation_rate, rng), rng)
+
+    own_pool = fitness_pool(options.workers) if pool is None and options.workers > 1 else None
+    pool = pool or own_pool
+    try:
+        fitness = calculate_fitness(problem, population, pool)
+        seed_fitness = float(fitness[0])
+        generation = 0
+        while generation < options.generations and (options.time_limit is None or time.perf_counter() - started < options.time_limit):
+            elite = np.argsort(fitness)[:options.elite]
+            n_children = size - len(elite)
+            children = crossover(population.take(_tournament(fitness, n_children, rng)), population.take(_tournament(fitness, n_children, rng)), rng)
+            repair(problem, mutate(problem, children, options.mutation_rate, rng), rng)
+            population = Population(
+                np.concatenate([population.shifts[elite], children.shifts]),
+                np.concatenate([population.work_center[elite], children.work_center]),
+            )
+            fitness = np.concatenate([fitness[elite], calculate_fitness(problem, children, pool)])
+            generation += 1
+    finally:
+        if own_pool is not None:
+            own_pool.shutdown()
+
+    best = int(np.argmin(fitness))
+    best_individual = population.take(slice(best, best + 1))
+    scores = score_schedules(problem.tables, best_individual.codes())
+    result = GeneticResult(
+        x=best_individual.x(0, L),
+        cost=float(scores.objective[0]),
+        coverage_gap=int(round(_coverage_gap(scores)[0])),
+        seed_fitness=seed_fitness,
+        fitness=float(fitness[best]),
+        generations=generation,
+        elapsed=time.perf_counter() - started,
+    )
+    logger.info(f"Genetic engine, category {k}: {result.summary()}")
+    return result
@@ -0,0 +1,114 @@
+import logging
+import time
+
+from sqlalchemy import delete, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from app.db.models import GeneratedSchedule, Schedule, ScheduleAssignment, Shift
+
+logger = logging.getLogger(__name__)
+
+
+def _batches(rows, batch_size):
+    for i in range(0, len(rows), batch_size):
+        yield rows[i:i + batch_size]
+
+
+async def _insert_with_ids(connection, table, rows, batch_size):
+    """Insert ``rows`` in multi-row batches and return their primary keys in order."""
+    if not rows:
+        return []
+    if connection.dialect.insert_executemany_returning_sort_by_parameter_order:
+        statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+        ids = []
+        for batch in _batches(rows, batch_size):
+            ids.extend((await connection.execute(statement, batch)).scalars())
+        return ids
+
+    # Without RETURNING (MySQL) each batch is one multi-row INSERT: InnoDB
+    # hands a statement with a known row count one contiguous block of
+    # auto-increment values, and LAST_INSERT_ID() is the first of them
+    step = (await connection.execute(text("SELECT @@auto_increment_increment"))).scalar() or 1
+    ids = []
+    for batch in _batches(rows, batch_size):
+        first = (await connection.execute(insert(table).values(batch))).lastrowid
+        if not first:
+            raise RuntimeError(f"No auto-increment id returned for a batch of {table.name}")
+        ids.extend(range(first, first + step * len(batch), step))
+    return ids
+
+
+async def persist_schedule(db_session: AsyncSession, schedule: Schedule, assignments, batch_size: int = 1000):
+    """Write the shifts, assignments and generated rows of ``schedule`` with Core executemany.
+
+    Rows go out ``batch_size`` at a time inside the session's transaction, so
+    the caller's commit covers the whole schedule.  The ``ScheduleAssignment``
+    and ``Shift`` objects get their ids and are attached to the session as
+    persistent, without the ORM emitting a single-row INSERT for each.
+    """
+    started = time.perf_counter()
+    connection = await db_session.connection()
+    shifts = [a.shift for a in assignments]
+
+    shift_ids = await _insert_with_ids(connection, Shift.__table__, [
+        {
+            "start_time": shift.start_time,
+            "end_time": shift.end_time,
+            "employee_id": shift.employee_id,
+            "work_center_id": shift.work_center_id,
+        }
+        for shift in shifts
+    ], batch_size)
+    for shift, shift_id in zip(shifts, shift_ids):
+        shift.id = shift_id
+
+    assignment_ids = await _insert_with_ids(connection, ScheduleAssignment.__table__, [
+        {"schedule_id": schedule.id, "shift_id": shift.id} for shift in shifts
+    ], batch_size)
+    for assignment, assignment_id in zip(assignments, assignment_ids):
+        assignment.id = assignment_id
+        assignment.schedule_id = schedule.id
+        assignment.shift_id = assignment.shift.id
+
+    generated = [
+        {
+            "schedule_id": schedule.id,
+            "employee_id": shift.employee_id,
+            "work_center_id": shift.work_center_id,
+            "shift_start": shift.start_time,
+            "shift_end": shift.end_time,
+        }
+        for shift in shifts
+    ]
+    for batch in _batches(generated, batch_size):
+        await connection.execute(insert(GeneratedSchedule.__table__), batch)
+
+    for assignment in assignments:
+        make_transient_to_detached(assignment.shift)
+        make_transient_to_detached(assignment)
+        db_session.add(assignment)
+
+    logger.info(f"Schedule {schedule.id}: wrote {len(assignments)} assignments in {time.perf_counter() - started:.3f}s")
+
+
+async def delete_schedule_rows(db_session: AsyncSession, assignment_ids, shift_ids, generated_ids, batch_size: int = 1000):
+    """Delete assignments, their shifts and generated rows by id, ``batch_size`` ids per statement.
+
+    Instances of the deleted rows are expunged from the session, so ids the
+    database hands out again do not clash with them.
+    """
+    connection = await db_session.connection()
+    for model, ids in (
+        (ScheduleAssignment, list(assignment_ids)),
+        (Shift, list(shift_ids)),
+        (GeneratedSchedule, list(generated_ids)),
+    ):
+        table = model.__table__
+        for batch in _batches(ids, batch_size):
+            await connection.execute(delete(table).where(table.c.id.in_(batch)))
+        for row_id in ids:
+            instance = db_session.identity_map.get(identity_key(model, row_id))
+            if instance is not None:
+                db_session.expunge(instance)
@@ -0,0 +1,93 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.scheduling.model_builder import HESMMatrixModel
+from app.scheduling.solver_pool import SolverPool
+from app.scheduling.solvers import SolverOptions, SolveResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CategoryJob:
+    """One category subproblem and the slot coverage it was built against."""
+
+    k: int
+    employees: List[Any]
+    model: HESMMatrixModel
+    existing: np.ndarray
+    mip_start: Optional[np.ndarray] = None
+    report: Dict[str, Any] = field(default_factory=dict)
+
+
+def predict_coverage(existing, model: HESMMatrixModel):
+    """Coverage after ``model`` is solved: its demand rows are equalities, so
+    every slot with demand ends up covered exactly to that demand."""
+    predicted = existing.copy()
+    slots = ~np.isnan(model.demand)
+    predicted[slots] = np.maximum(existing[slots], model.demand[slots])
+    return predicted
+
+
+async def solve_categories_in_parallel(
+    categories,
+    build: Callable[[int, np.ndarray], CategoryJob],
+    accept: Callable[[CategoryJob, SolveResult], Awaitable[None]],
+    current_coverage: Callable[[], np.ndarray],
+    options: SolverOptions,
+    pool: SolverPool,
+    max_workers: int,
+):
+    """Solve category subproblems speculatively on the solver ``pool``.
+
+    Categories only interact through the slot coverage earlier categories
+    leave behind (employee sets are disjoint, so Omega never removes anyone
+    from a later category).  Every category is built up front against the
+    coverage predicted from the earlier categories' demand and submitted at
+    once.  Results are then accepted in hierarchy order; when the real
+    coverage differs from the prediction on one of a category's demand slots
+    (e.g. an earlier category fell back to the heuristic), that category and
+    all later ones are rebuilt from the real coverage and resubmitted.
+    ``current_coverage`` returns the slot coverage the models are built
+    against, e.g. :meth:`CoverageIndex.slot_coverage`.  At most
+    ``max_workers`` of the solves run at a time; stale ones are cancelled,
+    which stops their worker mid-solve.
+    """
+    running = asyncio.Semaphore(max_workers)
+    pending = {}
+
+    async def solve(job):
+        async with running:
+            return await pool.solve(job.model, options, job.mip_start)
+
+    def speculate(remaining):
+        existing = current_coverage()
+        for k in remaining:
+            job = build(k, existing)
+            pending[k] = (job, asyncio.ensure_future(solve(job)))
+            existing = predict_coverage(existing, job.model)
+
+    try:
+        remaining = list(categories)
+        speculate(remaining)
+        while remaining:
+            k = remaining.pop(0)
+            job, future = pending.pop(k)
+            actual = current_coverage()
+            slots = ~np.isnan(job.model.demand)
+            if not np.array_equal(job.existing[slots], actual[slots]):
+                logger.info(f"Category {k}: coverage differs from the speculative build, re-solving {1 + len(remaining)} categories")
+                future.cancel()
+                for _, stale in pending.values():
+                    stale.cancel()
+                pending.clear()
+                speculate([k] + remaining)
+                job, future = pending.pop(k)
+            await accept(job, await future)
+    finally:
+        for _, future in pending.values():
+            future.cancel()
@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class EligibilityMasks:
+    """Which x and w variables of a HESM model can take a nonzero value.
+
+    Only these are created as columns; everything else is fixed to zero
+    before the model is built, together with the rows that only existed to
+    force it to zero.
+    """
+
+    x: np.ndarray  # (employee, day, work center, shift)
+    w: np.ndarray  # (employee, work center)
+
+    @property
+    def x_ratio(self):
+        return self.x.sum() / self.x.size if self.x.size else 1.0
+
+
+def eligibility_masks(Phi_k, work_centers, demand, existing, open_days, fixed_work_center=None) -> EligibilityMasks:
+    """Eligibility of every (employee, day, work center, shift).
+
+    An employee is eligible for a work center listed in
+    ``work_center_preferences`` (and, in rolling-horizon windows, only for
+    the one ``fixed_work_center`` already used), on the ``open_days`` the
+    weekend-off and windowed rules still allow, and for slots whose demand
+    row has something left to cover.  ``off_day_preferences`` are ranks, not
+    availability, so they do not remove anything.
+    """
+    E, L = len(Phi_k), len(work_centers)
+    w = np.array([[wc.id in (e.work_center_preferences or ()) for wc in work_centers] for e in Phi_k], dtype=bool).reshape(E, L)
+    if fixed_work_center is not None:
+        w &= (fixed_work_center[:, None] < 0) | (np.arange(L) == fixed_work_center[:, None])
+
+    # Equality rows with nothing left to cover force every x of the slot to zero
+    covered = ~np.isnan(demand) & (demand - existing == 0)
+
+    x = w[:, None, :, None] & open_days[:, :, None, None] & ~covered[None]
+    return EligibilityMasks(x=x, w=w)
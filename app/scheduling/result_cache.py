@@ -0,0 +1,60 @@
+import hashlib
+import json
+from dataclasses import asdict
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import Employee, EmployeeCategory, WorkCenter
+from app.scheduling.lns import LNSOptions
+from app.scheduling.optimization import GeneticOptions
+from app.scheduling.solvers import SolverOptions
+
+# Every column generate_schedule reads; a change to any of them is a new instance
+_VERSIONED_COLUMNS = (
+    (Employee.id, Employee.category_id, Employee.off_day_preferences, Employee.shift_preferences,
+     Employee.work_center_preferences, Employee.delta),
+    (WorkCenter.id, WorkCenter.demand),
+    (EmployeeCategory.id, EmployeeCategory.level, EmployeeCategory.hourly_rate),
+)
+
+
+async def data_version(db_session: AsyncSession) -> str:
+    """Hash of the employees, work centers and categories a schedule is generated from."""
+    h = hashlib.sha256()
+    for columns in _VERSIONED_COLUMNS:
+        rows = (await db_session.execute(select(*columns).order_by(columns[0]))).all()
+        h.update(json.dumps([list(row) for row in rows], sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+async def schedule_request_key(
+    db_session: AsyncSession,
+    start_date: date,
+    end_date: date,
+    solver_options: SolverOptions,
+    genetic_options: GeneticOptions,
+    lns_options: LNSOptions,
+    window_days: Optional[int],
+    window_overlap: int,
+) -> str:
+    """Key under which identical generation requests share one schedule.
+
+    Two requests with the same key would generate the same schedule: same
+    dates, same data (:func:`data_version`) and the same engine, solver,
+    genetic, LNS and rolling-horizon settings, with the deployment defaults
+    already applied.
+    """
+    request = {
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "data_version": await data_version(db_session),
+        "solver": asdict(solver_options),
+        "genetic": asdict(genetic_options),  # includes the engine, SCHEDULE_ENGINE
+        "lns": asdict(lns_options),
+        "window_days": window_days,
+        "window_overlap": window_overlap if window_days else None,
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
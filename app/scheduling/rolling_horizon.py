@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Optional
+
+import numpy as np
+
+from app.scheduling.model_builder import DELTA, HISTORY_DAYS, BoundaryState, is_weekend
+
+
+@dataclass
+class HorizonWindow:
+    offset: int  # first day, relative to the schedule start
+    days: int  # days in the model
+    commit_days: int  # leading days kept; the rest is solved again by the next window
+
+
+def plan_windows(Gamma: int, window_days: Optional[int] = None, overlap: int = 0) -> List[HorizonWindow]:
+    """Split a horizon of ``Gamma`` days into overlapping model windows.
+
+    Each window commits its first ``window_days - overlap`` days and the next
+    window starts right after them; the last window runs to the end of the
+    horizon.  Without ``window_days`` (or when it covers the whole horizon)
+    there is a single window.
+    """
+    if window_days is None or window_days >= Gamma:
+        return [HorizonWindow(0, Gamma, Gamma)]
+    if window_days < 1 or not 0 <= overlap < window_days:
+        raise ValueError(f"Invalid rolling horizon: window of {window_days} days with an overlap of {overlap}")
+    step = window_days - overlap
+    windows = []
+    offset = 0
+    while offset + window_days < Gamma:
+        windows.append(HorizonWindow(offset, window_days, step))
+        offset += step
+    windows.append(HorizonWindow(offset, Gamma - offset, Gamma - offset))
+    return windows
+
+
+class BoundaryTracker:
+    """Per-employee state of the committed days, carried from window to window.
+
+    Fed with every accepted batch of assignments as a :class:`ScheduleArray`.
+    Only the last ``HISTORY_DAYS`` worked days, the weekend days worked, the
+    shift total and the work center are kept per employee, so the state does
+    not grow with the horizon.
+    """
+
+    def __init__(self, start_date: date, Gamma: int, work_center_ids):
+        self.start_date = start_date
+        self.Gamma = Gamma
+        self.work_center_position = {wc_id: i for i, wc_id in enumerate(work_center_ids)}
+        self.recent_days = {}
+        self.weekend_days_worked = {}
+        self.shifts_worked = {}
+        self.work_center = {}
+
+    def add(self, schedule):
+        """Record the shifts of a :class:`ScheduleArray` of the schedule."""
+        offset = (schedule.start_date - self.start_date).days
+        for e_id, d, wc_id in sorted(zip(schedule.employee_id.tolist(), (schedule.day + offset).tolist(), schedule.work_center_id.tolist()),
+                                     key=lambda entry: entry[1]):
+            recent = self.recent_days.setdefault(e_id, [])
+            recent.append(d)
+            del recent[:-HISTORY_DAYS]
+            self.shifts_worked[e_id] = self.shifts_worked.get(e_id, 0) + 1
+            if is_weekend(d):
+                self.weekend_days_worked[e_id] = self.weekend_days_worked.get(e_id, 0) + 1
+            if wc_id in self.work_center_position:
+                self.work_center[e_id] = self.work_center_position[wc_id]
+
+    def boundary(self, Phi_k, window: HorizonWindow) -> BoundaryState:
+        """Boundary state of ``Phi_k`` for a window starting after the committed days."""
+        history = np.zeros((len(Phi_k), HISTORY_DAYS))
+        for i, e in enumerate(Phi_k):
+            for d in self.recent_days.get(e.id, ()):
+                j = d - window.offset + HISTORY_DAYS
+                if 0 <= j < HISTORY_DAYS:
+                    history[i, j] = 1
+        weekend_days = int(is_weekend(np.arange(window.offset)).sum())
+        return BoundaryState(
+            day_offset=window.offset,
+            history=history,
+            weekend_days_off=np.array([weekend_days - self.weekend_days_worked.get(e.id, 0) for e in Phi_k], dtype=float),
+            shifts_worked=np.array([self.shifts_worked.get(e.id, 0) for e in Phi_k], dtype=float),
+            work_center=np.array([self.work_center.get(e.id, -1) for e in Phi_k], dtype=np.int64),
+            delta=DELTA * (window.offset + window.days) / self.Gamma,
+        )
@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Sequence
+
+import numpy as np
+
+SHIFT_START_HOUR = 6  # shift t starts at 06:00 + 8 t
+
+
+@dataclass
+class ScheduleArray:
+    """Assignments as parallel int32 columns, one entry per shift.
+
+    Days count from ``start_date`` and shifts are positions, 0 for the
+    06:00 shift.  The scheduler keeps its schedules in this form; ORM rows
+    are created once, when the schedule is persisted, see
+    :func:`app.scheduling.algorithm.build_assignments`.
+    """
+
+    start_date: date
+    employee_id: np.ndarray
+    day: np.ndarray
+    work_center_id: np.ndarray
+    shift: np.ndarray
+
+    def __len__(self):
+        return len(self.employee_id)
+
+    @classmethod
+    def empty(cls, start_date: date):
+        return cls(start_date, *(np.zeros(0, dtype=np.int32) for _ in range(4)))
+
+    @classmethod
+    def from_x(cls, x_values, employee_ids, work_center_ids, start_date: date, day_offset: int = 0):
+        """The nonzero entries of (employee, day, work center, shift) values, e.g. ``HESMMatrixModel.x_values``.
+
+        Day d of ``x_values`` is day ``day_offset + d`` of the schedule.
+        """
+        e, d, l, t = np.nonzero(np.asarray(x_values) > 0.5)
+        return cls(
+            start_date,
+            np.asarray(employee_ids, dtype=np.int32)[e],
+            (d + day_offset).astype(np.int32),
+            np.asarray(work_center_ids, dtype=np.int32)[l],
+            t.astype(np.int32),
+        )
+
+    @classmethod
+    def from_rows(cls, rows, start_date: date):
+        """Parse ``(employee_id, work_center_id, start_time)`` rows, e.g. of ``Shift`` or ``GeneratedSchedule``."""
+        rows = list(rows)
+        n = len(rows)
+        # Ordinals convert far faster than datetime64 does for datetime objects
+        start_time = [row[2] for row in rows]
+        return cls(
+            start_date,
+            np.fromiter((row[0] for row in rows), dtype=np.int32, count=n),
+            (np.fromiter((t.toordinal() for t in start_time), dtype=np.int64, count=n) - start_date.toordinal()).astype(np.int32),
+            np.fromiter((row[1] for row in rows), dtype=np.int32, count=n),
+            np.fromiter(((t.hour - SHIFT_START_HOUR) // 8 for t in start_time), dtype=np.int32, count=n),
+        )
+
+    @classmethod
+    def concatenate(cls, parts: Sequence["ScheduleArray"], start_date: date):
+        """Join arrays of the same schedule; ``start_date`` is theirs, and the result's when there are none."""
+        if not parts:
+            return cls.empty(start_date)
+        return cls(start_date, *(np.concatenate([getattr(part, column) for part in parts]) for column in ("employee_id", "day", "work_center_id", "shift")))
+
+    def start_times(self):
+        first = datetime.combine(self.start_date, datetime.min.time())
+        return [first + timedelta(days=d, hours=SHIFT_START_HOUR + 8 * t) for d, t in zip(self.day.tolist(), self.shift.tolist())]
+
+    def rows(self):
+        """``(employee_id, work_center_id, start_time)`` tuples, like :meth:`from_rows` reads."""
+        return list(zip(self.employee_id.tolist(), self.work_center_id.tolist(), self.start_times()))
@@ -0,0 +1,226 @@
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+from app.scheduling.cost_model import WEEKDAYS, cost_tensors
+from app.scheduling.model_builder import DELTA, N_SHIFTS, BoundaryState, demand_matrix
+from app.scheduling.schedule_array import ScheduleArray
+
+SHIFT_HOURS = 8
+OFF_DAY_PENALTY = 5  # preference points lost for working on the first-choice day off
+
+
+@dataclass
+class ScoringTables:
+    """Lookup tables of one instance for :func:`score_schedules`.
+
+    Employees and work centers are addressed by position, categories in
+    hierarchy order.  Schedules are scored as slot-code tensors:
+    ``codes[..., e, d]`` is 0 when employee e is off on day d and
+    ``l * N_SHIFTS + t + 1`` when they work shift t at work center l, see
+    :func:`encode_x`, :func:`encode_schedule` and :func:`encode_assignments`.
+    """
+
+    employee_ids: np.ndarray  # (employee,)
+    work_center_ids: np.ndarray  # (work center,)
+    category_ids: np.ndarray  # (category,)
+    category: np.ndarray  # (employee,) position of the employee's category
+    shift_points: np.ndarray  # (employee, shift) 3 for the first preference, then 2 and 1, 0 when not listed
+    work_center_points: np.ndarray  # (employee, work center) n for the first of n preferences down to 1, 0 when not listed
+    off_day: np.ndarray  # (employee, day) the employee's first-choice day off
+    shift_cost: np.ndarray  # (employee,) wage of one shift
+    demand: np.ndarray  # (category, day, work center, shift), NaN without demand
+    existing: np.ndarray  # (day, work center, shift) coverage by shifts outside the scored schedules
+    preference_cost: np.ndarray  # (employee, work center, shift) C1 + C2 of the HESM objective
+    off_day_cost: np.ndarray  # (employee, day) C3 of the HESM objective
+    delta: np.ndarray  # (employee,) Delta target
+
+
+@dataclass
+class ScheduleScores:
+    """Score components of N candidate schedules, each an (N,) array."""
+
+    coverage: np.ndarray  # share of the demanded shifts covered
+    shortfall: np.ndarray  # demanded shifts not covered
+    surplus: np.ndarray  # shifts above demand
+    cost: np.ndarray  # wages
+    objective: np.ndarray  # HESM objective: shift and off-day costs, hourly rate of everyone who works, Delta deviation
+    preference: np.ndarray  # shift and work center preference points, less the off-day penalty
+    fairness: np.ndarray  # minus the standard deviation of the preference points of the employees who work
+
+    def summary(self, i: int = 0):
+        return {
+            "coverage": round(float(self.coverage[i]), 4),
+            "shortfall": int(self.shortfall[i]),
+            "surplus": int(self.surplus[i]),
+            "cost": round(float(self.cost[i]), 2),
+            "objective": round(float(self.objective[i]), 2),
+            "preference": round(float(self.preference[i]), 2),
+            "fairness": round(float(self.fairness[i]), 4),
+        }
+
+
+def _points(preferences, choices):
+    # len(preferences) points for the first preference down to 1 for the last, 0 for choices not listed
+    points = {choice: len(preferences) - i for i, choice in enumerate(preferences)}
+    return [points.get(choice, 0) for choice in choices]
+
+
+def _tables(employees, work_centers, Gamma, day_offset, category_ids, category, demand, existing, delta) -> ScoringTables:
+    E, L = len(employees), len(work_centers)
+    work_center_ids = np.array([wc.id for wc in work_centers], dtype=np.int64)
+    weekday = [WEEKDAYS[(day_offset + d) % 7] for d in range(Gamma)]
+    first_choice = [min((e.off_day_preferences or {}).items(), key=lambda item: item[1], default=(None, None))[0] for e in employees]
+    costs = cost_tensors(employees, work_centers, Gamma, N_SHIFTS, day_offset)
+    return ScoringTables(
+        employee_ids=np.array([e.id for e in employees], dtype=np.int64),
+        work_center_ids=work_center_ids,
+        category_ids=np.asarray(category_ids, dtype=np.int64),
+        category=np.asarray(category, dtype=np.int64).reshape(E),
+        shift_points=np.array([_points(e.shift_preferences or [], range(1, N_SHIFTS + 1)) for e in employees], dtype=float).reshape(E, N_SHIFTS),
+        work_center_points=np.array([_points(e.work_center_preferences or [], work_center_ids) for e in employees], dtype=float).reshape(E, L),
+        off_day=np.array([[day == off for day in weekday] for off in first_choice], dtype=bool).reshape(E, Gamma),
+        shift_cost=costs.hourly_rate * SHIFT_HOURS,
+        demand=demand,
+        existing=np.zeros((Gamma, L, N_SHIFTS)) if existing is None else np.asarray(existing, dtype=float),
+        preference_cost=costs.C_combined,
+        off_day_cost=costs.C3,
+        delta=np.broadcast_to(np.asarray(delta, dtype=float), E),
+    )
+
+
+def scoring_tables(employees, work_centers, Gamma: int, day_offset: int = 0) -> ScoringTables:
+    """Build the lookup tables once; every schedule of the instance is then scored from arrays only."""
+    category_ids = np.array(sorted({e.category_id for e in employees}), dtype=np.int64)
+    demand = (np.stack([demand_matrix(k, Gamma, work_centers, day_offset) for k in category_ids]) if len(category_ids)
+              else np.full((0, Gamma, len(work_centers), N_SHIFTS), np.nan))
+    return _tables(employees, work_centers, Gamma, day_offset, category_ids,
+                   np.searchsorted(category_ids, [e.category_id for e in employees]), demand, None, DELTA)
+
+
+def category_scoring_tables(k, Phi_k, Gamma, work_centers, existing, boundary: BoundaryState = None, demand=None) -> ScoringTables:
+    """Tables of the category-k pass over ``Phi_k``, as the HESM model of that pass sees it.
+
+    Takes the arguments of :func:`build_hesm_matrix_model`: ``existing`` is
+    what earlier categories cover, and with a ``boundary`` the days and
+    Delta target are those of its window.
+    """
+    day_offset = boundary.day_offset if boundary is not None else 0
+    if demand is None:
+        demand = demand_matrix(k, Gamma, work_centers, day_offset)
+    delta = DELTA if boundary is None else boundary.delta - boundary.shifts_worked
+    return _tables(Phi_k, work_centers, Gamma, day_offset, [k], np.zeros(len(Phi_k)), demand[None], existing, delta)
+
+
+def encode_x(x):
+    """Slot codes of (..., employee, day, work center, shift) assignment arrays, e.g. ``HESMMatrixModel.x_values``."""
+    x = np.asarray(x) > 0.5
+    L, T = x.shape[-2:]
+    slot = x.reshape(x.shape[:-2] + (L * T,))
+    return np.where(slot.any(axis=-1), slot.argmax(axis=-1) + 1, 0).astype(np.int16)
+
+
+def encode_assignments(tables: ScoringTables, rows, start_date: date):
+    """Slot codes of one schedule from ``(employee_id, work_center_id, start_time)`` rows.
+
+    Rows of unknown employees or work centers and days outside the tables'
+    horizon are skipped; a second shift on the same day replaces the first.
+    """
+    E, Gamma = tables.off_day.shape
+    codes = np.zeros((E, Gamma), dtype=np.int16)
+    employee_position = {e_id: i for i, e_id in enumerate(tables.employee_ids.tolist())}
+    work_center_position = {wc_id: l for l, wc_id in enumerate(tables.work_center_ids.tolist())}
+    for employee_id, work_center_id, start_time in rows:
+        e, l = employee_position.get(employee_id), work_center_position.get(work_center_id)
+        d = (start_time.date() - start_date).days
+        if e is None or l is None or not 0 <= d < Gamma:
+            continue
+        codes[e, d] = l * N_SHIFTS + (start_time.hour - 6) // 8 + 1
+    return codes
+
+
+def _positions(ids, values):
+    # Position of each value in ids, -1 when it is not there
+    order = np.argsort(ids, kind="stable")
+    found = np.clip(np.searchsorted(ids[order], values), 0, max(len(ids) - 1, 0))
+    if not len(ids):
+        return np.full(len(values), -1, dtype=np.int64)
+    return np.where(ids[order][found] == values, order[found], -1)
+
+
+def encode_schedule(tables: ScoringTables, schedule: ScheduleArray):
+    """Slot codes of a :class:`ScheduleArray` whose ``start_date`` is the tables' first day.
+
+    Like :func:`encode_assignments`, without a Python loop over the shifts.
+    """
+    E, Gamma = tables.off_day.shape
+    codes = np.zeros((E, Gamma), dtype=np.int16)
+    e = _positions(tables.employee_ids, schedule.employee_id)
+    l = _positions(tables.work_center_ids, schedule.work_center_id)
+    keep = (e >= 0) & (l >= 0) & (schedule.day >= 0) & (schedule.day < Gamma)
+    codes[e[keep], schedule.day[keep]] = l[keep] * N_SHIFTS + schedule.shift[keep] + 1
+    return codes
+
+
+def coverage_counts(tables: ScoringTables, codes):
+    """Employees assigned per (schedule, category, day, work center, shift) of ``(N, employee, day)`` codes."""
+    N, E, Gamma = codes.shape
+    K, L, T = len(tables.category_ids), len(tables.work_center_ids), N_SHIFTS
+    n, e, d = np.nonzero(codes)
+    l, t = np.divmod(codes[n, e, d].astype(np.int64) - 1, T)
+    counts = np.bincount((((n * K + tables.category[e]) * Gamma + d) * L + l) * T + t, minlength=N * K * Gamma * L * T)
+    return counts.reshape(N, K, Gamma, L, T)
+
+
+def score_schedules(tables: ScoringTables, codes) -> ScheduleScores:
+    """Score one schedule, ``(employee, day)`` codes, or a batch, ``(N, employee, day)``, in one pass.
+
+    Coverage is judged against the model's demand rows: category k's row
+    asks that the slot's coverage by ``tables.existing`` and categories up
+    to k in the hierarchy equals k's demand, so every category row with a
+    gap counts it.
+    """
+    codes = np.asarray(codes)
+    if codes.ndim == 2:
+        codes = codes[None]
+    N, E, Gamma = codes.shape
+
+    n, e, d = np.nonzero(codes)
+    l, t = np.divmod(codes[n, e, d].astype(np.int64) - 1, N_SHIFTS)
+
+    cost = np.bincount(n, weights=tables.shift_cost[e], minlength=N)
+    points = tables.shift_points[e, t] + tables.work_center_points[e, l]
+    preference = np.bincount(n, weights=points - OFF_DAY_PENALTY * tables.off_day[e, d], minlength=N)
+
+    # Fairness over the employees with at least one shift
+    per_employee = np.bincount(n * E + e, weights=points, minlength=N * E).reshape(N, E)
+    shifts = np.bincount(n * E + e, minlength=N * E).reshape(N, E)
+    works = shifts > 0
+    working = np.maximum(works.sum(axis=1), 1)
+    mean = (per_employee * works).sum(axis=1) / working
+    fairness = -np.sqrt((((per_employee - mean[:, None]) ** 2) * works).sum(axis=1) / working)
+
+    # HESM objective, as the genetic engine's fitness weighs it
+    shift_costs = np.bincount(n, weights=tables.preference_cost[e, l, t] + tables.off_day_cost[e, d], minlength=N)
+    rate = (works * tables.shift_cost / SHIFT_HOURS).sum(axis=1)
+    objective = shift_costs + rate + np.abs(shifts - tables.delta).sum(axis=1)
+
+    # Coverage by the categories up to each one in the hierarchy, against that category's demand row
+    covered = tables.existing + np.cumsum(coverage_counts(tables, codes), axis=1)
+    slots = ~np.isnan(tables.demand)
+    demand = tables.demand[slots]
+    gap = demand - covered[:, slots]
+    shortfall = np.clip(gap, 0, None).sum(axis=1)
+    surplus = np.clip(-gap, 0, None).sum(axis=1)
+    total = np.clip(demand - np.broadcast_to(tables.existing, tables.demand.shape)[slots], 0, None).sum()
+
+    return ScheduleScores(
+        coverage=1 - shortfall / total if total else np.ones(N),
+        shortfall=shortfall,
+        surplus=surplus,
+        cost=cost,
+        objective=objective,
+        preference=preference,
+        fairness=fairness,
+    )
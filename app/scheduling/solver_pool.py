@@ -0,0 +1,149 @@
+import asyncio
+import atexit
+import logging
+import multiprocessing
+from typing import Optional
+
+import numpy as np
+
+from app.scheduling.model_builder import HESMMatrixModel
+from app.scheduling.solvers import SolverOptions, SolveResult, solve_model
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_main(conn):
+    # Runs in a spawned process: importing this module already paid for
+    # NumPy, SciPy and highspy; PuLP is only needed by the CBC backend
+    try:
+        import pulp  # noqa: F401
+    except ImportError:
+        pass
+    while True:
+        try:
+            request = conn.recv()
+        except (EOFError, OSError):
+            return
+        if request is None:
+            return
+        model, options, mip_start = request
+        try:
+            result = solve_model(model, options, mip_start)
+        except Exception as exc:
+            conn.send(("error", exc))
+        else:
+            conn.send(("ok", result))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child,), daemon=True, name="solver-worker")
+        self.process.start()
+        child.close()
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+
+    def kill(self):
+        # The pipe is left to the garbage collector: a thread may still be
+        # returning from a receive on it
+        self.process.kill()
+        self.process.join()
+
+
+class SolverPool:
+    """Long-lived solver worker processes shared by all schedule generations.
+
+    Workers are spawned once and keep their imports between solves, so a
+    solve only pays for pickling the model.  :meth:`solve` runs one model
+    on an idle worker without blocking the event loop; at most ``size``
+    solves run at a time and the rest wait for a worker.  Cancelling the
+    awaiting task (client disconnect, job cancelled, stale speculative
+    build) kills the worker mid-solve and a fresh one is spawned in its
+    place.
+    """
+
+    def __init__(self, size: int = 1):
+        if size < 1:
+            raise ValueError(f"Solver pool size must be at least 1, got {size}")
+        self.size = size
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = []
+        self._busy = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self.solves = 0
+        self.cancelled = 0
+        atexit.register(self.close)
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(size=settings.SOLVER_POOL_SIZE)
+
+    def start(self):
+        """Spawn the missing workers now rather than on the first solves."""
+        while len(self._idle) + self._busy < self.size:
+            self._idle.append(_Worker(self._context))
+
+    def stats(self):
+        return {"size": self.size, "idle": len(self._idle), "busy": self._busy, "solves": self.solves, "cancelled": self.cancelled}
+
+    async def solve(self, model: HESMMatrixModel, options: SolverOptions, mip_start: Optional[np.ndarray] = None) -> SolveResult:
+        """Same as :func:`solve_model`, run on one of the pool's workers."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Celery tasks run each generation in a new event loop
+            self._loop, self._slots = loop, asyncio.Semaphore(self.size)
+        async with self._slots:
+            worker = self._checkout()
+            try:
+                # Both directions block on pickling/IO, so they run in threads;
+                # killing the worker is what unblocks a cancelled receive
+                await loop.run_in_executor(None, worker.conn.send, (model, options, mip_start))
+                status, payload = await loop.run_in_executor(None, worker.conn.recv)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                logger.info(f"Solve of {model.name} cancelled, restarting its worker")
+                self._discard(worker)
+                raise
+            except (EOFError, OSError) as exc:
+                self._discard(worker)
+                raise RuntimeError(f"Solver worker died while solving {model.name}") from exc
+            except BaseException:
+                self._discard(worker)
+                raise
+            self._busy -= 1
+            self._idle.append(worker)
+        self.solves += 1
+        if status == "error":
+            raise payload
+        return payload
+
+    def close(self):
+        for worker in self._idle:
+            worker.stop()
+        self._idle.clear()
+
+    def _checkout(self):
+        worker = None
+        while self._idle and worker is None:
+            worker = self._idle.pop()
+            if not worker.alive():
+                worker.kill()
+                worker = None
+        worker = worker or _Worker(self._context)
+        self._busy += 1
+        return worker
+
+    def _discard(self, worker):
+        self._busy -= 1
+        worker.kill()
+        self.start()
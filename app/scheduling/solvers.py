@@ -0,0 +1,350 @@
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass, replace
+from typing import Optional
+
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+try:
+    import highspy
+except ImportError:  # pragma: no cover - scipy still ships HiGHS
+    highspy = None
+
+from app.scheduling.model_builder import HESMMatrixModel
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SolverOptions:
+    """Backend and limits for one MIP solve.
+
+    Deployment defaults come from the ``SOLVER_*`` settings; a request can
+    override any field with :meth:`merged`.
+    """
+
+    backend: str = "highs"
+    threads: int = 1
+    time_limit: Optional[float] = None  # wall-clock seconds
+    mip_gap: Optional[float] = None  # relative gap at which the solve stops
+    in_memory: bool = True  # pass arrays directly instead of an MPS temp file
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            backend=settings.SOLVER_BACKEND,
+            threads=settings.SOLVER_THREADS,
+            time_limit=settings.SOLVER_TIME_LIMIT,
+            mip_gap=settings.SOLVER_MIP_GAP,
+            in_memory=settings.SOLVER_IN_MEMORY,
+        )
+
+    def merged(self, **overrides):
+        return replace(self, **{k: v for k, v in overrides.items() if v is not None})
+
+
+@dataclass
+class SolveResult:
+    backend: str
+    status: str  # optimal, time_limit, infeasible, unbounded, error
+    has_solution: bool
+    x: np.ndarray
+    objective: float
+    best_bound: float
+    gap: float
+    solve_time: float
+
+    @property
+    def optimal(self):
+        return self.status == "optimal"
+
+    def summary(self):
+        return {
+            "backend": self.backend,
+            "status": self.status,
+            "objective": self.objective,
+            "best_bound": self.best_bound,
+            "gap": self.gap,
+            "solve_time": round(self.solve_time, 4),
+        }
+
+
+def write_mps(model: HESMMatrixModel, path):
+    """Write the model in free MPS format (columns C<j>, rows R<i>)."""
+    A = model.A.tocsc()
+    lower, upper = model.row_lower, model.row_upper
+    lines = [f"NAME {model.name}", "ROWS", " N OBJ"]
+    rhs, ranges = [], []
+    for i in range(model.num_rows):
+        lo, hi = lower[i], upper[i]
+        if np.isfinite(lo) and lo == hi:
+            lines.append(f" E R{i}")
+            rhs.append((i, lo))
+        elif not np.isfinite(lo) and np.isfinite(hi):
+            lines.append(f" L R{i}")
+            rhs.append((i, hi))
+        elif np.isfinite(lo):
+            lines.append(f" G R{i}")
+            rhs.append((i, lo))
+            if np.isfinite(hi):
+                ranges.append((i, hi - lo))
+        else:
+            lines.append(f" N R{i}")
+
+    lines.append("COLUMNS")
+    integer_block = False
+    for j in range(model.num_cols):
+        is_integer = bool(model.integrality[j])
+        if is_integer != integer_block:
+            lines.append(" MARKER 'MARKER' 'INTORG'" if is_integer else " MARKER 'MARKER' 'INTEND'")
+            integer_block = is_integer
+        if model.c[j] or A.indptr[j] == A.indptr[j + 1]:
+            # Empty columns still need one entry, or readers renumber the rest
+            lines.append(f" C{j} OBJ {float(model.c[j])!r}")
+        for p in range(A.indptr[j], A.indptr[j + 1]):
+            lines.append(f" C{j} R{A.indices[p]} {float(A.data[p])!r}")
+    if integer_block:
+        lines.append(" MARKER 'MARKER' 'INTEND'")
+
+    lines.append("RHS")
+    lines.extend(f" RHS R{i} {float(value)!r}" for i, value in rhs if value)
+    if ranges:
+        lines.append("RANGES")
+        lines.extend(f" RNG R{i} {float(value)!r}" for i, value in ranges)
+
+    lines.append("BOUNDS")
+    for j in range(model.num_cols):
+        lo, hi = model.col_lower[j], model.col_upper[j]
+        if lo:
+            lines.append(f" LO BND C{j} {float(lo)!r}")
+        if np.isfinite(hi):
+            lines.append(f" UP BND C{j} {float(hi)!r}")
+        elif model.integrality[j]:
+            lines.append(f" PL BND C{j}")
+    lines.append("ENDATA")
+
+    with open(path, "w") as f:
+        f.write("\n".join(lines))
+        f.write("\n")
+
+
+def _relative_gap(objective, best_bound):
+    if not (np.isfinite(objective) and np.isfinite(best_bound)):
+        return float("nan")
+    return abs(objective - best_bound) / max(abs(objective), 1e-9)
+
+
+class SolverBackend:
+    name = None
+
+    def solve(self, model: HESMMatrixModel, options: SolverOptions, mip_start=None) -> SolveResult:
+        raise NotImplementedError
+
+
+class HighsBackend(SolverBackend):
+    """HiGHS through highspy; arrays are passed in-process unless ``in_memory`` is off."""
+
+    name = "highs"
+
+    _STATUS = {
+        "kOptimal": "optimal",
+        "kTimeLimit": "time_limit",
+        "kInfeasible": "infeasible",
+        "kUnbounded": "unbounded",
+        "kUnboundedOrInfeasible": "infeasible",
+        "kInterrupt": "interrupted",
+        "kHighsInterrupt": "interrupted",
+    }
+
+    # HiGHS keeps one task scheduler per process, sized by the first solve
+    _scheduler_threads = None
+
+    def solve(self, model, options, mip_start=None):
+        threads = int(options.threads)
+        if HighsBackend._scheduler_threads not in (None, threads):
+            highspy.Highs.resetGlobalScheduler(True)
+        HighsBackend._scheduler_threads = threads
+
+        h = highspy.Highs()
+        h.setOptionValue("output_flag", False)
+        h.setOptionValue("threads", threads)
+        if options.time_limit is not None:
+            h.setOptionValue("time_limit", float(options.time_limit))
+        if options.mip_gap is not None:
+            h.setOptionValue("mip_rel_gap", float(options.mip_gap))
+
+        start = time.perf_counter()
+        if options.in_memory:
+            h.passModel(self._to_highs_lp(model))
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, f"{model.name}.mps")
+                write_mps(model, path)
+                h.readModel(path)
+        if mip_start is not None:
+            solution = highspy.HighsSolution()
+            solution.col_value = mip_start
+            solution.value_valid = True
+            h.setSolution(solution)
+        h.run()
+        solve_time = time.perf_counter() - start
+
+        status = self._STATUS.get(h.getModelStatus().name, "error")
+        info = h.getInfo()
+        has_solution = info.primal_solution_status == 2
+        x = np.asarray(h.getSolution().col_value, dtype=float) if has_solution else np.zeros(model.num_cols)
+        objective = info.objective_function_value if has_solution else float("nan")
+        best_bound = info.mip_dual_bound
+        return SolveResult(self.name, status, has_solution, x, objective, best_bound, _relative_gap(objective, best_bound), solve_time)
+
+    @staticmethod
+    def _to_highs_lp(model):
+        A = model.A.tocsc()
+        lp = highspy.HighsLp()
+        lp.num_col_ = model.num_cols
+        lp.num_row_ = model.num_rows
+        lp.col_cost_ = model.c
+        lp.col_lower_ = model.col_lower
+        lp.col_upper_ = model.col_upper
+        lp.row_lower_ = model.row_lower
+        lp.row_upper_ = model.row_upper
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+        lp.a_matrix_.start_ = A.indptr
+        lp.a_matrix_.index_ = A.indices
+        lp.a_matrix_.value_ = A.data
+        lp.integrality_ = [highspy.HighsVarType.kInteger if v else highspy.HighsVarType.kContinuous for v in model.integrality]
+        return lp
+
+
+class ScipyBackend(SolverBackend):
+    """HiGHS through ``scipy.optimize.milp``; always in-memory, thread count is not configurable."""
+
+    name = "scipy"
+
+    _STATUS = {0: "optimal", 1: "time_limit", 2: "infeasible", 3: "unbounded"}
+
+    def solve(self, model, options, mip_start=None):
+        if mip_start is not None:
+            logger.debug("scipy.optimize.milp does not accept a MIP start, ignoring it")
+        scipy_options = {}
+        if options.time_limit is not None:
+            scipy_options["time_limit"] = options.time_limit
+        if options.mip_gap is not None:
+            scipy_options["mip_rel_gap"] = options.mip_gap
+
+        start = time.perf_counter()
+        result = milp(
+            model.c,
+            integrality=model.integrality,
+            bounds=Bounds(model.col_lower, model.col_upper),
+            constraints=LinearConstraint(model.A, model.row_lower, model.row_upper),
+            options=scipy_options,
+        )
+        solve_time = time.perf_counter() - start
+
+        has_solution = result.x is not None
+        x = result.x if has_solution else np.zeros(model.num_cols)
+        objective = result.fun if has_solution else float("nan")
+        best_bound = getattr(result, "mip_dual_bound", None)
+        best_bound = float("nan") if best_bound is None else best_bound
+        return SolveResult(self.name, self._STATUS.get(result.status, "error"), has_solution, x, objective, best_bound, _relative_gap(objective, best_bound), solve_time)
+
+
+class CbcBackend(SolverBackend):
+    """CBC binary bundled with PuLP, driven through an MPS file."""
+
+    name = "cbc"
+
+    def solve(self, model, options, mip_start=None):
+        import pulp
+
+        with tempfile.TemporaryDirectory() as tmp:
+            mps_path = os.path.join(tmp, f"{model.name}.mps")
+            solution_path = os.path.join(tmp, f"{model.name}.sol")
+            write_mps(model, mps_path)
+            command = [pulp.PULP_CBC_CMD().path, mps_path, "-threads", str(int(options.threads))]
+            if options.time_limit is not None:
+                command += ["-sec", str(options.time_limit)]
+            if options.mip_gap is not None:
+                command += ["-ratioGap", str(options.mip_gap)]
+            if mip_start is not None:
+                start_path = os.path.join(tmp, f"{model.name}.mst")
+                with open(start_path, "w") as f:
+                    f.write("Feasible - objective value 0\n")
+                    f.writelines(f"{j} C{j} {float(mip_start[j])!r}\n" for j in np.flatnonzero(mip_start))
+                command += ["-mipstart", start_path]
+            command += ["-solve", "-solu", solution_path]
+
+            start = time.perf_counter()
+            output = subprocess.run(command, capture_output=True, text=True).stdout
+            solve_time = time.perf_counter() - start
+
+            x = np.zeros(model.num_cols)
+            header = ""
+            if os.path.exists(solution_path):
+                with open(solution_path) as f:
+                    header = f.readline()
+                    for line in f:
+                        parts = line.replace("**", "").split()
+                        if len(parts) >= 3 and parts[1].startswith("C"):
+                            x[int(parts[1][1:])] = float(parts[2])
+
+        if header.startswith("Optimal"):
+            status = "optimal"
+        elif "infeasible" in header.lower():
+            status = "infeasible"
+        elif header.startswith("Stopped"):
+            status = "time_limit"
+        else:
+            status = "error"
+        has_solution = status == "optimal" or (status == "time_limit" and "objective value" in header)
+        objective = self._parse(output, r"Objective value:\s+(\S+)") if has_solution else float("nan")
+        best_bound = self._parse(output, r"Lower bound:\s+(\S+)")
+        if status == "optimal" and not np.isfinite(best_bound):
+            best_bound = objective
+        return SolveResult(self.name, status, has_solution, x, objective, best_bound, _relative_gap(objective, best_bound), solve_time)
+
+    @staticmethod
+    def _parse(output, pattern):
+        match = re.search(pattern, output)
+        try:
+            return float(match.group(1)) if match else float("nan")
+        except ValueError:
+            return float("nan")
+
+
+BACKENDS = {backend.name: backend for backend in (HighsBackend, ScipyBackend, CbcBackend)}
+
+
+def get_backend(name) -> SolverBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown solver backend {name!r}, expected one of {sorted(BACKENDS)}")
+    if name == "highs" and highspy is None:
+        logger.warning("highspy is not installed, falling back to the scipy HiGHS backend")
+        name = "scipy"
+    return BACKENDS[name]()
+
+
+def solve_model(model: HESMMatrixModel, options: SolverOptions, mip_start=None) -> SolveResult:
+    """Solve one category model with the configured backend and log its statistics.
+
+    ``mip_start`` is an optional full column vector, see ``warm_start.build_mip_start``.
+    """
+    if model.num_cols == 0:
+        # No employees left in this category: only the demand rows remain
+        feasible = bool(np.all((model.row_lower <= 0) & (model.row_upper >= 0)))
+        status = "optimal" if feasible else "infeasible"
+        return SolveResult(options.backend, status, feasible, np.zeros(0), 0.0, 0.0, 0.0, 0.0)
+
+    result = get_backend(options.backend).solve(model, options, mip_start)
+    logger.info(
+        f"{model.name}: backend={result.backend} status={result.status} time={result.solve_time:.3f}s "
+        f"objective={result.objective:.4f} bound={result.best_bound:.4f} gap={result.gap:.4%} "
+        f"presolve removed {model.eliminated_cols} columns, {model.eliminated_rows} rows ({model.reduction_ratio:.1%} of the columns)"
+    )
+    return result
@@ -0,0 +1,135 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.scheduling.model_builder import WEEKENDS_OFF, is_weekend
+from app.scheduling.schedule_array import ScheduleArray
+
+RULES = ("C2.1", "C2.2", "C2.3", "C2.4", "C2.5", "C3")
+MAX_WEEK_SHIFTS = 5  # C2.2, shifts in any 7 consecutive days
+MAX_CONSECUTIVE_DAYS = 5  # C2.3
+RULE_DAYS = {"C2.1": 1, "C2.2": 7, "C2.3": MAX_CONSECUTIVE_DAYS + 1, "C3": 2}  # days spanned by a located violation
+
+
+@dataclass
+class WorkArray:
+    """A schedule as an (employee, day) array of shifts worked, see :func:`work_array`."""
+
+    employee_ids: np.ndarray  # (employee,) sorted
+    start_date: date
+    shifts: np.ndarray  # (employee, day) shifts worked
+    work_centers: np.ndarray  # (employee,) distinct work centers worked at
+    weekend: np.ndarray  # (day,)
+
+
+@dataclass
+class Violations:
+    """Hard-rule violations as parallel arrays, one entry per violation.
+
+    ``day`` is the first day of the offending window (a single day for
+    C2.1, seven days for C2.2, six consecutive worked days for C2.3 and two
+    for C3) and -1 for the rules over the whole horizon, C2.4 and C2.5.
+    ``count`` is what broke the rule: shifts on the day or in the window,
+    weekend days worked, or work centers.
+    """
+
+    rule: np.ndarray  # (violation,) position in RULES
+    employee: np.ndarray  # (violation,) employee id
+    day: np.ndarray
+    count: np.ndarray
+
+    def __len__(self):
+        return len(self.rule)
+
+    def counts(self):
+        return {RULES[r]: int(n) for r, n in enumerate(np.bincount(self.rule, minlength=len(RULES))) if n}
+
+    def take(self, index):
+        return Violations(self.rule[index], self.employee[index], self.day[index], self.count[index])
+
+    def difference(self, other: "Violations"):
+        """The violations not also in ``other``, e.g. the ones an edit added."""
+        known = set(zip(other.rule.tolist(), other.employee.tolist(), other.day.tolist()))
+        return self.take(np.array([key not in known for key in zip(self.rule.tolist(), self.employee.tolist(), self.day.tolist())], dtype=bool))
+
+    def records(self, start_date: date, limit: int = None):
+        """The first ``limit`` violations as JSON-ready dicts, days as dates from ``start_date``."""
+        records = []
+        for r, e, d, n in zip(self.rule[:limit].tolist(), self.employee[:limit].tolist(), self.day[:limit].tolist(), self.count[:limit].tolist()):
+            record = {"rule": RULES[r], "employee_id": e, "count": n}
+            if d >= 0:
+                first = start_date + timedelta(days=d)
+                record["first_day"] = first.isoformat()
+                record["last_day"] = (first + timedelta(days=RULE_DAYS[RULES[r]] - 1)).isoformat()
+            records.append(record)
+        return records
+
+
+def work_array(rows, start_date: date, Gamma: int) -> WorkArray:
+    """Build the work array from ``(employee_id, work_center_id, start_time)`` rows.
+
+    Shifts outside ``start_date`` .. ``start_date + Gamma - 1`` are skipped.
+    """
+    return schedule_work_array(ScheduleArray.from_rows(rows, start_date), Gamma)
+
+
+def schedule_work_array(schedule: ScheduleArray, Gamma: int) -> WorkArray:
+    """Build the work array of the first ``Gamma`` days of a :class:`ScheduleArray`."""
+    inside = (schedule.day >= 0) & (schedule.day < Gamma)
+    employee_id, work_center_id, day = schedule.employee_id[inside], schedule.work_center_id[inside].astype(np.int64), schedule.day[inside]
+
+    employee_ids, employee = np.unique(employee_id, return_inverse=True)
+    E = len(employee_ids)
+    shifts = np.bincount(employee * Gamma + day, minlength=E * Gamma).reshape(E, Gamma).astype(np.int16)
+    pairs = np.unique(employee.astype(np.int64) << 32 | work_center_id)
+    return WorkArray(
+        employee_ids=employee_ids,
+        start_date=schedule.start_date,
+        shifts=shifts,
+        work_centers=np.bincount(pairs >> 32, minlength=E),
+        weekend=is_weekend(np.arange(Gamma)),
+    )
+
+
+def _window_sums(worked, width):
+    # Days worked in every full window of ``width`` days, from one cumulative sum over days
+    E, Gamma = worked.shape
+    if Gamma < width:
+        return np.zeros((E, 0), dtype=np.int32)
+    total = np.zeros((E, Gamma + 1), dtype=np.int32)
+    np.cumsum(worked, axis=1, out=total[:, 1:])
+    return total[:, width:] - total[:, :-width]
+
+
+def validate_work(work: WorkArray) -> Violations:
+    """Check C2.1-C3 on a work array, all employees and days at once.
+
+    One shift per day (C2.1), at most five shifts in any seven days (C2.2),
+    at most five consecutive working days (C2.3), the weekend days off of
+    the horizon (C2.4, as in the model: at most the horizon's weekend days
+    less ``WEEKENDS_OFF`` worked), a single work center (C2.5) and no shifts
+    on consecutive days (C3).  Violations are sorted by employee, then day.
+    """
+    worked = (work.shifts > 0).astype(np.int8)
+    found = []
+
+    def add(rule, counts, limit):
+        e, d = np.nonzero(counts > limit)
+        found.append((np.full(len(e), RULES.index(rule)), e, d, counts[e, d]))
+
+    add("C2.1", work.shifts, 1)
+    add("C2.2", _window_sums(worked, 7), MAX_WEEK_SHIFTS)
+    add("C2.3", _window_sums(worked, MAX_CONSECUTIVE_DAYS + 1), MAX_CONSECUTIVE_DAYS)
+    add("C3", _window_sums(worked, 2), 1)
+
+    # Rules over the whole horizon are located at day -1
+    weekend_worked = worked[:, work.weekend].sum(axis=1)
+    weekend_limit = max(int(work.weekend.sum()) - WEEKENDS_OFF, 0)
+    for rule, counts, limit in (("C2.4", weekend_worked, weekend_limit), ("C2.5", work.work_centers, 1)):
+        e = np.flatnonzero(counts > limit)
+        found.append((np.full(len(e), RULES.index(rule)), e, np.full(len(e), -1), counts[e]))
+
+    rule, employee, day, count = (np.concatenate(column).astype(np.int64) for column in zip(*found))
+    order = np.lexsort((rule, day, employee))
+    return Violations(rule[order], work.employee_ids[employee[order]], day[order], count[order])
@@ -0,0 +1,145 @@
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+
+from app.scheduling.model_builder import DELTA, WEEKENDS_OFF, WINDOWED_LIMITS, BoundaryState, HESMMatrixModel, is_weekend
+
+
+@dataclass
+class WarmStartReport:
+    prior_shifts: int  # prior shifts of employees in this model
+    mapped: int  # shifts that hit an x variable of the current horizon
+    retained: int  # shifts left after repairing the per-employee rules
+    rows_satisfied: int
+    rows_total: int
+
+    @property
+    def feasible(self):
+        return self.rows_satisfied == self.rows_total
+
+    def summary(self):
+        return {
+            "prior_shifts": self.prior_shifts,
+            "mapped": self.mapped,
+            "retained": self.retained,
+            "rows_satisfied": self.rows_satisfied,
+            "rows_total": self.rows_total,
+            "feasible": self.feasible,
+        }
+
+
+def _repair_days(worked, boundary: BoundaryState = None, day_offset: int = 0):
+    # Keep worked days in order while the windowed rules, C3 and the weekend
+    # limit hold, counting the boundary's history and fixed future days; a
+    # window is checked at its last model day, once every earlier day is settled
+    E, Gamma = worked.shape
+    history = boundary.history if boundary is not None else np.zeros((E, 0))
+    future = boundary.future if boundary is not None and boundary.future is not None else np.zeros((E, 0))
+    H = history.shape[1]
+    timeline = np.hstack([history > 0.5, np.zeros((E, Gamma), dtype=bool), future > 0.5])
+    weekend = is_weekend(day_offset + np.arange(Gamma))
+    weekends_off = WEEKENDS_OFF if boundary is None else np.maximum(WEEKENDS_OFF - boundary.weekend_days_off, 0)
+    weekend_left = np.broadcast_to(weekend.sum() - weekends_off, E).astype(float)
+    for d in range(Gamma):
+        keep = worked[:, d] & (weekend_left >= 1) if weekend[d] else worked[:, d].copy()
+        t = H + d
+        timeline[:, t] = keep
+        for width, limit in WINDOWED_LIMITS:
+            # Windows whose last model day is d: the one ending on d, and on the
+            # last day also those reaching into the future
+            firsts = range(t - width + 1, t + 1) if d == Gamma - 1 else (t - width + 1,)
+            for first in firsts:
+                if first >= 0 and first + width <= timeline.shape[1]:
+                    keep &= timeline[:, first:first + width].sum(axis=1) <= limit
+            timeline[:, t] = keep
+        worked[:, d] = keep
+        weekend_left -= keep & weekend[d]
+    return worked
+
+
+def build_mip_start(model: HESMMatrixModel, prior_shifts, start_date: date, boundary: BoundaryState = None):
+    """Map prior (employee_id, work_center_id, shift_start) rows onto the model's x/w.
+
+    ``prior_shifts`` are typically ``GeneratedSchedule`` rows of an earlier
+    schedule.  Shifts outside the horizon, on unknown work centers or on x
+    variables removed by presolve are dropped, then the start is repaired so
+    that every employee keeps a single work center (C2.5, the committed one
+    when ``boundary`` has it), one shift per day (C2.1) and days are dropped
+    until the windowed rules, no consecutive days (C3) and the weekend limit
+    hold against the boundary's history and future.  v is measured against
+    the Delta the boundary leaves.
+    Returns the full column vector and a :class:`WarmStartReport`.
+    """
+    E, Gamma, L, T = model.x_index.shape
+    employee_position = {int(e_id): i for i, e_id in enumerate(model.employee_ids)}
+    work_center_position = {int(wc_id): i for i, wc_id in enumerate(model.work_center_ids)}
+
+    x = np.zeros((E, Gamma, L, T), dtype=bool)
+    prior = mapped = 0
+    for row in prior_shifts:
+        e = employee_position.get(row.employee_id)
+        if e is None:
+            continue
+        prior += 1
+        d = (row.shift_start.date() - start_date).days
+        l = work_center_position.get(row.work_center_id)
+        t = (row.shift_start.hour - 6) // 8
+        if 0 <= d < Gamma and l is not None and 0 <= t < T and model.x_index[e, d, l, t] >= 0:
+            x[e, d, l, t] = True
+            mapped += 1
+
+    # C2.5: keep the committed work center, else the one each employee used most
+    per_work_center = x.sum(axis=(1, 3))
+    choice = per_work_center.argmax(axis=1)
+    committed = boundary.work_center if boundary is not None else np.full(E, -1)
+    choice = np.where(committed >= 0, committed, choice)
+    w = np.zeros((E, L), dtype=bool)
+    w[np.arange(E), choice] = per_work_center[np.arange(E), choice] > 0
+    x &= w[:, None, :, None]
+
+    # C2.1: keep the first slot of each day
+    flat = x.reshape(E, Gamma, L * T)
+    first = np.zeros_like(flat)
+    e_idx, d_idx = np.nonzero(flat.any(axis=2))
+    first[e_idx, d_idx, flat[e_idx, d_idx].argmax(axis=1)] = True
+    x = first.reshape(E, Gamma, L, T)
+
+    # C2.2-C2.4 and C3, across the window's boundary
+    worked = _repair_days(x.any(axis=(2, 3)), boundary, boundary.day_offset if boundary is not None else 0)
+    x &= worked[:, :, None, None]
+
+    delta = DELTA if boundary is None else boundary.delta - boundary.shifts_worked
+    start = start_vector(model, x, delta)
+    satisfied = satisfied_rows(model, start)
+    report = WarmStartReport(
+        prior_shifts=prior,
+        mapped=mapped,
+        retained=int(x.sum()),
+        rows_satisfied=int(satisfied.sum()),
+        rows_total=model.num_rows,
+    )
+    return start, report
+
+
+def start_vector(model: HESMMatrixModel, x, delta=DELTA):
+    """Full column vector of the (employee, day, work center, shift) assignments ``x``.
+
+    ``x`` must only use live x columns; w, y, z and v follow from it, with
+    the Delta deviation measured against ``delta`` (per employee or scalar).
+    """
+    x = np.asarray(x, dtype=bool)
+    worked = x.any(axis=(2, 3))
+    start = np.zeros(model.num_cols)
+    start[model.x_index[x]] = 1.0
+    start[model.w_index[x.any(axis=(1, 3))]] = 1.0
+    start[model.y_index[worked]] = 1.0
+    start[model.z_index] = 1.0
+    start[model.v_index] = np.abs(x.sum(axis=(1, 2, 3)) - delta)
+    return start
+
+
+def satisfied_rows(model: HESMMatrixModel, start):
+    """Mask of the model rows that ``start`` satisfies."""
+    activity = model.A @ start
+    return (activity >= model.row_lower - 1e-6) & (activity <= model.row_upper + 1e-6)
@@ -0,0 +1,90 @@
+"""Compare HESM model build time: PuLP expressions vs. sparse matrix blocks.
+
+    python -m benchmarks.bench_model_build --employees 300 --days 28 --work-centers 10
+"""
+import argparse
+import logging
+import random
+import time
+from datetime import date
+from types import SimpleNamespace
+
+from app.scheduling.cost_model import WEEKDAYS
+from app.scheduling.coverage import CoverageIndex
+from app.scheduling.heuristic import greedy_schedule
+from app.scheduling.model_builder import build_hesm_matrix_model
+from app.scheduling.solvers import SolverOptions, solve_model
+from benchmarks.pulp_baseline import create_hesm_model
+
+
+def make_instance(n_employees, n_work_centers, seed=0):
+    rnd = random.Random(seed)
+    category = SimpleNamespace(hourly_rate=round(rnd.uniform(10, 50), 2))
+    work_centers = [
+        SimpleNamespace(
+            id=l,
+            demand={
+                "weekday": {"1": [rnd.randint(1, 5) for _ in range(3)]},
+                "weekend": {"1": [rnd.randint(1, 3) for _ in range(3)]},
+            },
+        )
+        for l in range(1, n_work_centers + 1)
+    ]
+    employees = [
+        SimpleNamespace(
+            id=i,
+            category_id=1,
+            category=category,
+            shift_preferences=rnd.sample([1, 2, 3], 3),
+            off_day_preferences={day: rnd.randint(1, 7) for day in WEEKDAYS},
+            work_center_preferences=rnd.sample(range(1, n_work_centers + 1), rnd.randint(1, n_work_centers)),
+        )
+        for i in range(1, n_employees + 1)
+    ]
+    return employees, work_centers
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=100)
+    parser.add_argument("--days", type=int, default=28)
+    parser.add_argument("--work-centers", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-pulp", action="store_true", help="only time the matrix builder")
+    parser.add_argument("--heuristic", action="store_true", help="also time the greedy fallback")
+    parser.add_argument("--solve", type=float, metavar="SECONDS", help="also solve the matrix model with this time limit")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    employees, work_centers = make_instance(args.employees, args.work_centers)
+    Pi = range(1, len(work_centers) + 1)
+    Lambda = range(1, 4)
+    start_date = date.today()
+    coverage = CoverageIndex(start_date, args.days, [wc.id for wc in work_centers], [1])
+
+    print(f"employees={args.employees} days={args.days} work_centers={args.work_centers}")
+    matrix_time, model = best_of(args.repeat, lambda: build_hesm_matrix_model(1, employees, args.days, work_centers, coverage.slot_coverage()))
+    print(f"matrix  build {matrix_time:8.3f}s  rows={model.num_rows} cols={model.num_cols} nnz={model.A.nnz}")
+    if args.heuristic:
+        heuristic_time, greedy = best_of(args.repeat, lambda: greedy_schedule(1, employees, args.days, work_centers, coverage.slot_coverage()))
+        print(f"greedy  solve {heuristic_time:8.3f}s  assigned={greedy.x.sum()} uncovered={greedy.uncovered.sum()}")
+    if args.solve:
+        result = solve_model(model, SolverOptions(time_limit=args.solve))
+        print(f"matrix  solve {result.solve_time:8.3f}s  status={result.status} objective={result.objective:.4f} gap={result.gap:.4%}")
+    if not args.skip_pulp:
+        pulp_time, lp = best_of(args.repeat, lambda: create_hesm_model(1, employees, args.days, Pi, Lambda, work_centers, coverage, start_date))
+        print(f"pulp    build {pulp_time:8.3f}s  rows={len(lp.constraints)} cols={len(lp.variables())}")
+        print(f"speedup {pulp_time / matrix_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
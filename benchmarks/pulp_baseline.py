@@ -0,0 +1,125 @@
+"""The per-term PuLP builder of the HESM model, as it was before the sparse matrix builder.
+
+Kept only as the reference :mod:`benchmarks.bench_model_build` times
+:func:`app.scheduling.model_builder.build_hesm_matrix_model` against;
+no production path uses it.  Its cost coefficients are random, as they
+were; the C2.3 rows, five days of at most five shifts, could never bind
+and are left out.
+"""
+import logging
+import random
+
+from pulp import LpMinimize, LpProblem, LpVariable, lpSum
+
+from app.scheduling.model_builder import is_weekend
+
+logger = logging.getLogger(__name__)
+
+
+def create_hesm_model(k, Phi_k, Gamma, Pi, Lambda, work_centers, coverage, start_date):
+    model = LpProblem(f"HESM_{k}", LpMinimize)
+
+    # Define decision variables
+    x = LpVariable.dicts("x", ((e.id, d, l, t) for e in Phi_k for d in range(Gamma) for l in Pi for t in Lambda), cat='Binary')
+    w = LpVariable.dicts("w", ((e.id, wc.id) for e in Phi_k for wc in work_centers), cat='Binary')
+    z = LpVariable.dicts("z", ((e.id, d) for e in Phi_k for d in range(Gamma)), cat='Binary')
+    v = LpVariable.dicts("v", (e.id for e in Phi_k), lowBound=0)
+
+    # Define preference parameters
+    C1 = {(e.id, l, t): random.uniform(0, 1) for e in Phi_k for l in Pi for t in Lambda}
+    C2 = {(e.id, l, t): random.uniform(0, 1) for e in Phi_k for l in Pi for t in Lambda}
+    C3 = {(e.id, d): random.uniform(0, 1) for e in Phi_k for d in range(Gamma)}
+    C_combined = {(e.id, l, t): C1[e.id, l, t] + C2[e.id, l, t] for e in Phi_k for l in Pi for t in Lambda}
+
+    # Modify the objective function to heavily penalize non-preferred work centers
+    obj_func = (
+        lpSum(e.category.hourly_rate * w[e.id, wc.id] for e in Phi_k for wc in work_centers) +
+        lpSum(1000 * w[e.id, wc.id] * (1 if wc.id not in e.work_center_preferences else 0) for e in Phi_k for wc in work_centers) +
+        lpSum(C_combined[e.id, l, t] * x[e.id, d, l, t] for e in Phi_k for d in range(Gamma) for l in Pi for t in Lambda) +
+        lpSum(C3[e.id, d] * (w[e.id, wc.id] - z[e.id, d]) for e in Phi_k for d in range(Gamma) for wc in work_centers) +
+        lpSum(v[e.id] for e in Phi_k)
+    )
+    model += obj_func
+
+    # Add constraints
+    add_constraints(model, k, Phi_k, x, w, z, v, Gamma, Pi, Lambda, work_centers, coverage, start_date)
+
+    return model
+
+
+def add_constraints(model, k, Phi_k, x, w, z, v, Gamma, Pi, Lambda, work_centers, coverage, start_date):
+    for d in range(Gamma):
+        for l in Pi:
+            for t in Lambda:
+                existing_demand = coverage.existing(d, l, t)
+
+                # Check if work_center exists and has demand data
+                if l-1 < len(work_centers) and work_centers[l-1] is not None and work_centers[l-1].demand is not None:
+                    if not is_weekend(d):  # Weekday
+                        if 'weekday' in work_centers[l-1].demand and str(k) in work_centers[l-1].demand['weekday']:
+                            model += lpSum(x[e.id, d, l, t] for e in Phi_k) == work_centers[l-1].demand['weekday'][str(k)][t-1] - existing_demand
+                        else:
+                            logger.warning(f"Missing weekday demand data for work center {l}, category {k}, shift {t}")
+                    else:  # Weekend
+                        if 'weekend' in work_centers[l-1].demand and str(k) in work_centers[l-1].demand['weekend']:
+                            model += lpSum(x[e.id, d, l, t] for e in Phi_k) == work_centers[l-1].demand['weekend'][str(k)][t-1] - existing_demand
+                        else:
+                            logger.warning(f"Missing weekend demand data for work center {l}, category {k}, shift {t}")
+                else:
+                    logger.warning(f"Invalid work center index or missing demand data: {l-1}")
+
+    # Constraint (C2.1): At most one shift per day for each employee
+    for e in Phi_k:
+        for d in range(Gamma):
+            model += lpSum(x[e.id, d, l, t] for l in Pi for t in Lambda) <= lpSum(w[e.id, wc.id] for wc in work_centers)
+
+    # Constraint (C2.2): Maximum five shifts per week for each employee
+    for e in Phi_k:
+        for i in range(0, Gamma - 6):
+            model += lpSum(x[e.id, d, l, t] for d in range(i, i+7) for l in Pi for t in Lambda) <= 5 * lpSum(w[e.id, wc.id] for wc in work_centers)
+
+    # Constraint (C2.4): Weekend off preference
+    n_k = 2  # Assuming 2 weekends off for each category
+    for e in Phi_k:
+        model += lpSum(1 - lpSum(x[e.id, d, l, t] for l in Pi for t in Lambda)
+                       for d in range(Gamma) if is_weekend(d)) >= n_k
+
+    # Constraint (C2.5): Employee selection constraint
+    for e in Phi_k:
+        model += lpSum(w[e.id, wc.id] for wc in work_centers) <= 1
+
+    # Constraint (C3): Avoiding consecutive shifts
+    for e in Phi_k:
+        for d in range(Gamma - 1):
+            model += lpSum(x[e.id, d, l, t] for l in Pi for t in Lambda) + \
+                     lpSum(x[e.id, d+1, l, t] for l in Pi for t in Lambda) <= 1
+
+    # Constraint (C4.1): Delta calculation
+    Delta_k = 20  # Example value, adjust as needed
+    for e in Phi_k:
+        model += v[e.id] >= lpSum(x[e.id, d, l, t] for d in range(Gamma) for l in Pi for t in Lambda) - Delta_k
+        model += v[e.id] >= Delta_k - lpSum(x[e.id, d, l, t] for d in range(Gamma) for l in Pi for t in Lambda)
+
+    # Symmetry-breaking constraints (as mentioned in point d)
+    E_k = [(e1.id, e2.id) for e1 in Phi_k for e2 in Phi_k if e1.id < e2.id and
+           e1.shift_preferences == e2.shift_preferences and
+           e1.work_center_preferences == e2.work_center_preferences]
+
+    for e1, e2 in E_k:
+        model += lpSum(x[e1, d, l, t] for d in range(Gamma) for l in Pi for t in Lambda) >= \
+                 lpSum(x[e2, d, l, t] for d in range(Gamma) for l in Pi for t in Lambda)
+
+    # New constraint: Ensure x variables are consistent with w variables
+    for e in Phi_k:
+        for d in range(Gamma):
+            for l in Pi:
+                for t in Lambda:
+                    model += x[e.id, d, l, t] <= w[e.id, work_centers[l-1].id]
+
+    # Add constraint to ensure employees are only assigned to preferred work centers
+    for e in Phi_k:
+        for wc in work_centers:
+            if wc.id not in e.work_center_preferences:
+                model += w[e.id, wc.id] == 0
+
+    return model
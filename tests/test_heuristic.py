@@ -0,0 +1,55 @@
+import numpy as np
+
+from app.scheduling.heuristic import greedy_schedule
+from app.scheduling.model_builder import HISTORY_DAYS, BoundaryState, demand_matrix
+from tests.test_model_builder import make_instance
+
+
+def assert_follows_rules(x, employees, work_centers, history=None):
+    worked = x.any(axis=(2, 3)).astype(int)
+    if history is not None:
+        worked = np.hstack([history, worked])
+    assert (x.sum(axis=(2, 3)) <= 1).all()  # C2.1
+    for width, limit in ((7, 5), (2, 1)):  # C2.2, C3
+        windows = np.lib.stride_tricks.sliding_window_view(worked, width, axis=1).sum(axis=2)
+        assert (windows <= limit).all()
+    used = x.any(axis=(1, 3))
+    assert (used.sum(axis=1) <= 1).all()  # C2.5
+    preferred = np.array([[wc.id in e.work_center_preferences for wc in work_centers] for e in employees])
+    assert not (used & ~preferred).any()
+
+
+def test_greedy_schedule_covers_demand_with_repeated_shifts():
+    employees, work_centers = make_instance()
+    result = greedy_schedule(1, employees, 14, work_centers, np.zeros((14, 3, 3)))
+
+    assert result.complete
+    assert (result.x.sum(axis=0) == np.nan_to_num(demand_matrix(1, 14, work_centers))).all()
+    assert_follows_rules(result.x, employees, work_centers)
+    # 66 shifts between 24 employees: nobody is used up by a single shift
+    assert result.x.sum(axis=(1, 2, 3)).max() > 1
+
+
+def test_greedy_schedule_respects_boundary_and_reports_shortage():
+    employees, work_centers = make_instance(n_employees=6)
+    E = len(employees)
+    history = np.zeros((E, HISTORY_DAYS))
+    history[:, -1] = 1  # everyone worked the day before the window
+    boundary = BoundaryState(
+        day_offset=7,
+        history=history,
+        weekend_days_off=np.full(E, 2.0),
+        shifts_worked=np.ones(E),
+        work_center=np.full(E, -1),
+        delta=20.0,
+    )
+    closed = np.zeros((E, 7), dtype=bool)
+    closed[0] = True
+    result = greedy_schedule(1, employees, 7, work_centers, np.zeros((7, 3, 3)), boundary=boundary, closed_days=closed)
+
+    assert not result.x[:, 0].any()
+    assert not result.x[0].any()
+    assert_follows_rules(result.x, employees, work_centers, history)
+    # Two employees per work center cannot work every other day on two shifts
+    assert not result.complete
+    assert result.uncovered[0].sum() == 6
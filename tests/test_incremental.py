@@ -0,0 +1,146 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.db.models import Employee, EmployeeCategory, GeneratedSchedule, Schedule, ScheduleAssignment, Shift, WorkCenter
+from app.scheduling import incremental
+from app.scheduling.incremental import ChangeSet, fixed_boundary, reschedule
+from app.scheduling.inputs import CategoryInput, EmployeeInput, SchedulerInput, WorkCenterInput
+from app.scheduling.persistence import persist_schedule
+
+START = date(2024, 1, 1)  # a Monday
+DEMAND = {"weekday": {"1": [1, 0, 0]}, "weekend": {"1": [0, 0, 0]}}
+
+
+def test_fixed_boundary_counts_the_days_around_the_window():
+    Phi_k = [EmployeeInput(i, 1, CategoryInput(1, 10.0), None, [1, 2, 3], [1], None) for i in (1, 2)]
+    worked = {1: {d: (7, 0) for d in (0, 2, 4, 6, 9)}, 2: {3: (8, 1)}}
+    boundary = fixed_boundary(Phi_k, worked, 3, 3, 14, {7: 0, 8: 1})
+
+    assert boundary.day_offset == 3
+    # Days 0 and 2 end the history, day 6 starts the future; days 3-5 are re-solved
+    assert boundary.history[0].tolist() == [0, 0, 0, 1, 0, 1]
+    assert boundary.future[0].tolist() == [1, 0, 0, 1, 0, 0]
+    assert boundary.shifts_worked.tolist() == [4, 0]
+    assert boundary.work_center.tolist() == [0, -1]
+    # Weekend days outside the window: 6, 12, 13 (day 5 is inside); employee 1 worked day 6
+    assert boundary.weekend_days_off.tolist() == [2, 3]
+
+
+@pytest.fixture
+async def rota(test_session, unique_id, monkeypatch):
+    """A two-week schedule of one work center's morning shift on weekdays.
+
+    Employee A works Monday, Wednesday and Friday, B Tuesday and Thursday,
+    C never; with ``spare=False`` there is no C.  The scheduler sees only
+    these employees, as category 1.
+    """
+    async def seed(spare=True):
+        category = EmployeeCategory(name=f"Reschedule {unique_id}", level=1, hourly_rate=10.0)
+        work_center = WorkCenter(name=f"Reschedule {unique_id}", demand=DEMAND)
+        test_session.add_all([category, work_center])
+        await test_session.commit()
+        employees = [
+            Employee(name=f"Reschedule {unique_id} {name}", category_id=category.id, off_day_preferences={"Sunday": 1},
+                     shift_preferences=[1, 2, 3], work_center_preferences=[work_center.id], delta=0.5)
+            for name in ("A", "B", "C")[:3 if spare else 2]
+        ]
+        schedule = Schedule(start_date=START, end_date=START + timedelta(days=13))
+        test_session.add_all(employees + [schedule])
+        await test_session.commit()
+
+        days = {employees[0].id: (0, 2, 4, 7, 9, 11), employees[1].id: (1, 3, 8, 10)}
+        assignments = [
+            ScheduleAssignment(shift=Shift(start_time=datetime.combine(START + timedelta(days=d), datetime.min.time()) + timedelta(hours=6),
+                                           end_time=datetime.combine(START + timedelta(days=d), datetime.min.time()) + timedelta(hours=14),
+                                           employee_id=e_id, work_center_id=work_center.id))
+            for e_id, worked in days.items() for d in worked
+        ]
+        await persist_schedule(test_session, schedule, assignments)
+        await test_session.commit()
+
+        category_input = CategoryInput(1, 10.0)
+        instance = SchedulerInput(
+            employees=[EmployeeInput(e.id, 1, category_input, e.off_day_preferences, e.shift_preferences, e.work_center_preferences, e.delta)
+                       for e in employees],
+            work_centers=[WorkCenterInput(work_center.id, DEMAND)],
+        )
+
+        async def load_scheduler_input(db_session, prior_schedule_id=None):
+            return instance
+
+        monkeypatch.setattr(incremental, "load_scheduler_input", load_scheduler_input)
+        return schedule, [e.id for e in employees]
+
+    return seed
+
+
+async def schedule_rows(session, schedule_id):
+    shifts = (await session.execute(
+        select(Shift.employee_id, Shift.work_center_id, Shift.start_time)
+        .join(ScheduleAssignment, ScheduleAssignment.shift_id == Shift.id)
+        .where(ScheduleAssignment.schedule_id == schedule_id)
+    )).all()
+    generated = (await session.execute(
+        select(GeneratedSchedule.employee_id, GeneratedSchedule.work_center_id, GeneratedSchedule.shift_start)
+        .where(GeneratedSchedule.schedule_id == schedule_id)
+    )).all()
+    assert sorted(map(tuple, shifts)) == sorted(map(tuple, generated))
+    return set(map(tuple, shifts))
+
+
+def outside(rows, result):
+    return {row for row in rows if not result.first_day <= row[2].date() <= result.last_day}
+
+
+@pytest.mark.asyncio
+async def test_call_off_changes_only_its_window(test_session, rota):
+    schedule, (a, b, c) = await rota()
+    before = await schedule_rows(test_session, schedule.id)
+    day = START + timedelta(days=2)
+
+    result = await reschedule(test_session, schedule, ChangeSet(call_offs={a: [day]}))
+    after = await schedule_rows(test_session, schedule.id)
+
+    assert (result.first_day, result.last_day) == (day - timedelta(days=1), day + timedelta(days=1))
+    assert outside(after, result) == outside(before, result)
+    # B works the days around it, so C takes the shift; nothing else moves
+    assert {(e, t.date()) for e, _, t in after - before} == {(c, day)}
+    assert {(e, t.date()) for e, _, t in before - after} == {(a, day)}
+    assert result.removed == 1 and [x.shift.employee_id for x in result.added] == [c]
+
+
+@pytest.mark.asyncio
+async def test_infeasible_window_is_widened(test_session, rota):
+    schedule, (a, b) = await rota(spare=False)
+    before = await schedule_rows(test_session, schedule.id)
+    day = START + timedelta(days=2)
+
+    # On its own the day has nobody: A called off, B works the days around it
+    result = await reschedule(test_session, schedule, ChangeSet(call_offs={a: [day]}, slack_days=0))
+    after = await schedule_rows(test_session, schedule.id)
+
+    assert [s["status"] for s in result.solves] == ["infeasible", "optimal"]
+    assert (result.first_day, result.last_day) == (START, day + timedelta(days=7))
+    assert outside(after, result) == outside(before, result)
+    assert (b, day) in {(e, t.date()) for e, _, t in after}
+    assert (a, day) not in {(e, t.date()) for e, _, t in after}
+    # Every weekday is still covered once
+    assert sorted(t.date() for _, _, t in after) == sorted(START + timedelta(days=d) for d in range(14) if d % 7 < 5)
+
+
+@pytest.mark.asyncio
+async def test_demand_override_needs_every_shift(test_session, rota):
+    schedule, _ = await rota()
+    with pytest.raises(ValueError, match="needs 3 shifts"):
+        await reschedule(test_session, schedule, ChangeSet(demand={(1, START): {"1": [1, 0]}}))
+
+
+@pytest.mark.asyncio
+async def test_reschedule_endpoint_rejects_short_demand(authenticated_client, test_session, rota):
+    schedule, _ = await rota()
+    response = await authenticated_client.post(f"/schedules/{schedule.id}/reschedule", json={
+        "demand_changes": [{"work_center_id": 1, "date": START.isoformat(), "demand": {"1": [1, 0]}}],
+    })
+    assert response.status_code == 422 and "needs 3 shifts" in response.text
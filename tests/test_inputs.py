@@ -0,0 +1,37 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.db.models import Employee, EmployeeCategory, Shift, WorkCenter
+from app.scheduling.inputs import EmployeeInput, load_scheduler_input
+
+
+@pytest.mark.asyncio
+async def test_load_scheduler_input(test_session, unique_id):
+    category = EmployeeCategory(name=f"Inputs {unique_id}", level=1, hourly_rate=12.5)
+    work_center = WorkCenter(name=f"Inputs {unique_id}", demand={"weekday": {"1": [1, 0, 0]}, "weekend": {"1": [0, 0, 0]}})
+    test_session.add_all([category, work_center])
+    await test_session.commit()
+    employee = Employee(name=f"Inputs {unique_id}", category_id=category.id, off_day_preferences={"Sunday": 1},
+                        shift_preferences=[1, 2, 3], work_center_preferences=[work_center.id], delta=0.5)
+    test_session.add(employee)
+    await test_session.commit()
+    start = datetime(2024, 1, 1, 6)
+    test_session.add_all([
+        Shift(start_time=start + timedelta(days=d), end_time=start + timedelta(days=d, hours=8), employee_id=employee.id, work_center_id=work_center.id)
+        for d in range(5)
+    ])
+    await test_session.commit()
+
+    instance = await load_scheduler_input(test_session)
+
+    loaded = next(e for e in instance.employees if e.id == employee.id)
+    assert isinstance(loaded, EmployeeInput)
+    assert loaded.category_id == category.id and loaded.category.hourly_rate == 12.5
+    assert loaded.work_center_preferences == [work_center.id] and loaded.delta == 0.5
+    assert [e.id for e in instance.employees] == sorted(e.id for e in instance.employees)
+    assert work_center.id in {wc.id for wc in instance.work_centers}
+    assert instance.prior_shifts == []
+    # Employees of a category share one category object
+    same = [e for e in instance.employees if e.category_id == category.id]
+    assert all(e.category is same[0].category for e in same)
@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.jobs import JobStore, RedisJobStore, SQLiteJobStore, job_store_from_settings
+
+
+def test_sqlite_store_updates_fields_independently(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    assert store.get("missing") is None
+
+    job = store.create("a", status="queued", progress=0.0)
+    assert job["id"] == "a" and job["status"] == "queued" and job["created_at"] == job["updated_at"]
+
+    # The API's cancellation and the worker's progress touch different fields
+    store.update("a", cancel_requested=True)
+    store.update("a", status="running", progress=0.5)
+    job = store.get("a")
+    assert job["cancel_requested"] is True and job["status"] == "running" and job["progress"] == 0.5
+
+    store.update("a", result={"schedule_id": 3, "assignments": 72})
+    assert store.get("a")["result"] == {"schedule_id": 3, "assignments": 72}
+    assert SQLiteJobStore(store.path).get("a")["status"] == "running"
+
+
+def test_sqlite_store_updates_only_live_jobs(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    # A missing or deleted job is not brought back as a partial record
+    assert store.update("missing", status="cancelled") is False
+    assert store.get("missing") is None
+
+    store.create("a", status="running")
+    assert store.update("a", unless_status={"failed"}, progress=0.5) is True
+    store.update("a", status="failed")
+    assert store.update("a", unless_status={"failed"}, status="succeeded") is False
+    assert store.get("a")["status"] == "failed" and store.get("a")["progress"] == 0.5
+
+
+def test_sqlite_store_claims(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    assert store.claim("key", "a") == "a"
+    assert store.claim("key", "b") == "a"
+
+    store.release("key", "b")  # not the owner, no effect
+    assert store.claim("key", "c") == "a"
+    store.release("key", "a")
+    assert store.claim("key", "c") == "c"
+
+    store.create("d", status="queued")
+    store.delete("d")
+    assert store.get("d") is None
+
+
+def test_store_from_settings(tmp_path):
+    settings = SimpleNamespace(JOB_STORE_URL=None, REDIS_HOST="localhost", REDIS_PORT=6379, JOB_TTL_SECONDS=60)
+    store = job_store_from_settings(settings)
+    assert isinstance(store, RedisJobStore) and store.ttl == 60
+
+    settings.JOB_STORE_URL = f"sqlite:///{tmp_path}/jobs.db"
+    assert isinstance(job_store_from_settings(settings), SQLiteJobStore)
+
+    settings.JOB_STORE_URL = "memcached://localhost"
+    with pytest.raises(ValueError):
+        job_store_from_settings(settings)
+
+
+def test_partial_store_cannot_be_created():
+    class GetOnly(JobStore):
+        def get(self, job_id):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
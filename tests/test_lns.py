@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from app.scheduling.heuristic import greedy_schedule
+from app.scheduling.lns import LNSOptions, block_boundary, improve_schedule
+from app.scheduling.model_builder import build_hesm_matrix_model
+from app.scheduling.solver_pool import SolverPool
+from app.scheduling.warm_start import start_vector
+from tests.test_heuristic import assert_follows_rules
+from tests.test_model_builder import make_instance
+
+
+def test_block_boundary_counts_the_rest_of_the_window():
+    x = np.zeros((2, 14, 3, 3), dtype=bool)
+    x[0, [0, 2, 10], 1, 0] = True
+    boundary = block_boundary(x, np.array([0, 1]), 4, 3)
+
+    assert boundary.day_offset == 4
+    assert boundary.history.tolist() == [[0, 0, 1, 0, 1, 0], [0] * 6]
+    assert boundary.future.tolist() == [[0, 0, 0, 1, 0, 0], [0] * 6]
+    assert boundary.shifts_worked.tolist() == [3, 0]
+    # Days 5-6 are in the block, days 12-13 are the weekend days left outside it
+    assert boundary.weekend_days_off.tolist() == [2, 2]
+    assert boundary.work_center.tolist() == [1, -1]
+
+
+@pytest.mark.asyncio
+async def test_improve_schedule_keeps_coverage_and_lowers_the_objective():
+    employees, work_centers = make_instance()
+    existing = np.zeros((14, 3, 3))
+    heuristic = greedy_schedule(1, employees, 14, work_centers, existing)
+    pool = SolverPool(size=2)
+    try:
+        options = LNSOptions(block_employees=6, block_days=14, max_rounds=8, seed=0)
+        result = await improve_schedule(1, employees, work_centers, existing, heuristic.x, options=options, pool=pool)
+    finally:
+        pool.close()
+
+    assert result.rounds == 8 and result.solved == 16
+    assert_follows_rules(result.x, employees, work_centers)
+    assert (result.x.sum(axis=0) == heuristic.x.sum(axis=0)).all()
+
+    model = build_hesm_matrix_model(1, employees, 14, work_centers, existing)
+    before, after = (model.c @ start_vector(model, x) for x in (heuristic.x, result.x))
+    assert result.improved > 0
+    assert after == pytest.approx(before - result.gain)
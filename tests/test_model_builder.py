@@ -0,0 +1,116 @@
+from dataclasses import replace
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+from app.scheduling.model_builder import build_hesm_matrix_model
+from app.scheduling.solvers import SolverOptions, solve_model
+
+
+def make_instance(n_employees=24, n_work_centers=3):
+    category = SimpleNamespace(hourly_rate=15.0)
+    work_centers = [
+        SimpleNamespace(id=l, demand={"weekday": {"1": [1, 1, 0]}, "weekend": {"1": [1, 0, 0]}})
+        for l in range(1, n_work_centers + 1)
+    ]
+    employees = [
+        SimpleNamespace(
+            id=i,
+            category=category,
+            shift_preferences=[1 + (i + j) % 3 for j in range(3)],
+            off_day_preferences={"Monday": 1 + i % 7},
+            work_center_preferences=[1 + i % n_work_centers],
+        )
+        for i in range(1, n_employees + 1)
+    ]
+    return employees, work_centers
+
+
+def test_matrix_model_layout():
+    employees, work_centers = make_instance()
+    model = build_hesm_matrix_model(1, employees, 14, work_centers, np.zeros((14, 3, 3)))
+
+    assert model.x_index.shape == (24, 14, 3, 3)
+    assert model.w_index.shape == (24, 3)
+    assert model.A.shape == (model.num_rows, model.num_cols)
+    assert model.integrality[model.v_index].sum() == 0
+
+    # Presolve keeps x only on the preferred work center and on slots with
+    # demand left: shifts 1-2 on the 10 weekdays, shift 1 on the 4 weekend days
+    assert (model.x_index >= 0).sum(axis=(1, 2, 3)).tolist() == [24] * 24
+    assert (model.w_index >= 0).sum(axis=1).tolist() == [1] * 24
+    assert (model.y_index >= 0).all()
+    assert model.num_cols == 24 * 24 + 24 + 24 * 14 + 24 + 24 * 14
+    assert model.eliminated_cols == 24 * (14 * 9 - 24) + 24 * 2
+
+
+def test_matrix_model_solution_respects_constraints():
+    employees, work_centers = make_instance()
+    model = build_hesm_matrix_model(1, employees, 14, work_centers, np.zeros((14, 3, 3)))
+    result = solve_model(model, SolverOptions())
+    assert result.optimal
+
+    x = np.round(model.x_values(result.x)).astype(int)
+    daily = x.sum(axis=(2, 3))
+    assert daily.max() <= 1
+    assert (daily[:, :-1] + daily[:, 1:]).max() <= 1
+
+    # Demand is covered exactly: weekday [1, 1, 0], weekend [1, 0, 0]
+    coverage = x.sum(axis=0)
+    assert (coverage[0] == [[1, 1, 0]] * 3).all()
+    assert (coverage[5] == [[1, 0, 0]] * 3).all()
+
+    # Only preferred work centers are used
+    for i, e in enumerate(employees):
+        used = np.flatnonzero(x[i].sum(axis=(0, 2)))
+        assert all(work_centers[l].id in e.work_center_preferences for l in used)
+
+
+def test_empty_category_is_infeasible_when_demand_remains():
+    _, work_centers = make_instance()
+    model = build_hesm_matrix_model(1, [], 7, work_centers, np.zeros((7, 3, 3)))
+    assert model.num_cols == 0
+    assert not solve_model(model, SolverOptions()).has_solution
+
+
+def without_daily_workload(model):
+    """``model`` with every y column replaced by the sum of its x columns,
+    i.e. the windowed rules written against x directly."""
+    keep = np.ones(model.num_cols, dtype=bool)
+    keep[model.y_index[model.y_index >= 0]] = False
+    position = np.full(model.num_cols, -1)
+    position[keep] = np.arange(keep.sum())
+    # Kept columns map to themselves, each y column to its day's x columns
+    rows, cols = [np.flatnonzero(keep)], [position[keep]]
+    for e, d in zip(*np.nonzero(model.y_index >= 0)):
+        x = model.x_index[e, d][model.x_index[e, d] >= 0]
+        rows.append(np.full(len(x), model.y_index[e, d]))
+        cols.append(position[x])
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    substitute = sp.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(model.num_cols, keep.sum()))
+    A = (model.A @ substitute).tocsr()
+    A.eliminate_zeros()
+    linked = np.diff(A.indptr) > 0  # the y == sum x rows vanish
+    return replace(
+        model,
+        c=model.c @ substitute,
+        A=A[linked],
+        row_lower=model.row_lower[linked],
+        row_upper=model.row_upper[linked],
+        col_lower=model.col_lower[keep],
+        col_upper=model.col_upper[keep],
+        integrality=model.integrality[keep],
+    )
+
+
+def test_daily_workload_rows_keep_the_optimum():
+    employees, work_centers = make_instance()
+    model = build_hesm_matrix_model(1, employees, 14, work_centers, np.zeros((14, 3, 3)))
+    flat = without_daily_workload(model)
+    assert flat.num_rows < model.num_rows and flat.A.nnz > model.A.nnz
+
+    aggregated, reference = solve_model(model, SolverOptions()), solve_model(flat, SolverOptions())
+    assert aggregated.optimal and reference.optimal
+    assert aggregated.objective == pytest.approx(reference.objective, abs=1e-6)
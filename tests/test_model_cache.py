@@ -0,0 +1,50 @@
+import numpy as np
+
+from app.scheduling.model_builder import build_hesm_matrix_model
+from app.scheduling.model_cache import ModelCache
+from tests.test_model_builder import make_instance
+
+
+def assert_same_model(a, b):
+    assert (a.A != b.A).nnz == 0
+    np.testing.assert_array_equal(a.row_lower, b.row_lower)
+    np.testing.assert_array_equal(a.row_upper, b.row_upper)
+    np.testing.assert_array_equal(a.c, b.c)
+    np.testing.assert_array_equal(a.x_index, b.x_index)
+
+
+def test_hit_patches_demand_and_objective():
+    employees, work_centers = make_instance()
+    cache = ModelCache()
+    existing = np.zeros((14, 3, 3))
+    cache.get_or_build(1, employees, 14, work_centers, existing)
+
+    # Only demand numbers change: same structure, new right-hand sides
+    for wc in work_centers:
+        wc.demand = {"weekday": {"1": [2, 1, 0]}, "weekend": {"1": [1, 0, 0]}}
+    cached = cache.get_or_build(1, employees, 14, work_centers, existing)
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert_same_model(cached, build_hesm_matrix_model(1, employees, 14, work_centers, existing))
+
+    # A newly uncovered slot changes the presolved structure
+    for wc in work_centers:
+        wc.demand = {"weekday": {"1": [2, 1, 1]}, "weekend": {"1": [1, 0, 0]}}
+    cache.get_or_build(1, employees, 14, work_centers, existing)
+    assert cache.stats()["misses"] == 2
+
+
+def test_disk_tier_and_eviction(tmp_path):
+    employees, work_centers = make_instance()
+    existing = np.zeros((14, 3, 3))
+    cache = ModelCache(max_bytes=1, directory=str(tmp_path))
+    cache.get_or_build(1, employees, 14, work_centers, existing)
+    assert cache.stats()["models"] == 0  # too large for the memory tier
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+
+    loaded = ModelCache(directory=str(tmp_path)).get_or_build(1, employees, 14, work_centers, existing)
+    assert_same_model(loaded, build_hesm_matrix_model(1, employees, 14, work_centers, existing))
+
+    small = ModelCache(directory=str(tmp_path), disk_max_bytes=0)
+    small.get_or_build(1, employees[:12], 14, work_centers, existing)
+    assert list(tmp_path.glob("*.npz")) == []
+    assert small.evictions == 2
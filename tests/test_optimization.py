@@ -0,0 +1,77 @@
+import numpy as np
+
+from app.scheduling.optimization import (
+    GeneticOptions, GeneticProblem, Population, calculate_fitness, crossover, evolve_schedule, fitness_pool,
+    genetic_problem, repair,
+)
+from tests.test_heuristic import assert_follows_rules
+from tests.test_model_builder import make_instance
+
+
+def random_population(problem, size, rng):
+    E, Gamma = problem.open_days.shape
+    return Population(
+        rng.integers(0, 4, (size, E, Gamma), dtype=np.int8),
+        rng.integers(-1, problem.eligible.shape[1], (size, E), dtype=np.int16),
+    )
+
+
+def test_repair_restores_hard_rules():
+    employees, work_centers = make_instance()
+    problem = genetic_problem(1, employees, 14, work_centers, np.zeros((14, 3, 3)))
+    rng = np.random.default_rng(0)
+    population = repair(problem, random_population(problem, 8, rng), rng)
+
+    for i in range(len(population)):
+        x = population.x(i, len(work_centers))
+        assert_follows_rules(x, employees, work_centers)
+        weekend = x[:, problem.weekend].any(axis=(2, 3)).sum(axis=1)
+        assert (weekend <= problem.weekend_limit).all()
+
+
+def test_crossover_takes_whole_employees():
+    employees, work_centers = make_instance()
+    problem = genetic_problem(1, employees, 14, work_centers, np.zeros((14, 3, 3)))
+    rng = np.random.default_rng(1)
+    a, b = random_population(problem, 4, rng), random_population(problem, 4, rng)
+    child = crossover(a, b, rng)
+
+    from_a = (child.shifts == a.shifts).all(axis=2) & (child.work_center == a.work_center)
+    from_b = (child.shifts == b.shifts).all(axis=2) & (child.work_center == b.work_center)
+    assert (from_a | from_b).all()
+
+
+def test_fitness_in_a_process_pool_matches():
+    employees, work_centers = make_instance()
+    problem = genetic_problem(1, employees, 14, work_centers, np.zeros((14, 3, 3)))
+    rng = np.random.default_rng(2)
+    population = repair(problem, random_population(problem, 10, rng), rng)
+    other = genetic_problem(1, employees, 14, work_centers, np.ones((14, 3, 3)))
+    with fitness_pool(2) as pool:
+        assert np.allclose(calculate_fitness(problem, population, pool, batch_size=4), calculate_fitness(problem, population))
+        # The same workers score the next category's problem
+        assert np.allclose(calculate_fitness(other, population, pool, batch_size=4), calculate_fitness(other, population))
+
+
+def test_fitness_pool_sends_each_problem_once(monkeypatch):
+    employees, work_centers = make_instance()
+    problem = genetic_problem(1, employees, 14, work_centers, np.zeros((14, 3, 3)))
+    rng = np.random.default_rng(3)
+    population = repair(problem, random_population(problem, 10, rng), rng)
+    pickled = []
+    monkeypatch.setattr(GeneticProblem, "__getstate__", lambda self: pickled.append(self) or self.__dict__, raising=False)
+    with fitness_pool(2) as pool:
+        for _ in range(3):
+            calculate_fitness(problem, population, pool, batch_size=2)
+    assert len(pickled) == 1
+
+
+def test_evolve_schedule_improves_on_the_greedy_seed():
+    employees, work_centers = make_instance()
+    existing = np.zeros((14, 3, 3))
+    result = evolve_schedule(1, employees, 14, work_centers, existing, options=GeneticOptions(generations=30, time_limit=None, seed=0))
+
+    assert result.generations == 30
+    assert result.fitness <= result.seed_fitness
+    assert result.coverage_gap == 0
+    assert_follows_rules(result.x, employees, work_centers)
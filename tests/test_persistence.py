@@ -0,0 +1,72 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app.db.models import Employee, EmployeeCategory, GeneratedSchedule, Schedule, ScheduleAssignment, Shift, WorkCenter
+from app.scheduling.persistence import delete_schedule_rows, persist_schedule
+
+
+@pytest.fixture
+async def persisted(test_session, unique_id):
+    category = EmployeeCategory(name=f"Persist {unique_id}", level=1, hourly_rate=10.0)
+    work_center = WorkCenter(name=f"Persist {unique_id}", demand={"weekday": {"1": [1, 0, 0]}, "weekend": {"1": [0, 0, 0]}})
+    test_session.add_all([category, work_center])
+    await test_session.commit()
+    employee = Employee(name=f"Persist {unique_id}", category_id=category.id, off_day_preferences={"Sunday": 1},
+                        shift_preferences=[1, 2, 3], work_center_preferences=[work_center.id], delta=0.5)
+    schedule = Schedule(start_date=date(2024, 1, 1), end_date=date(2024, 1, 14))
+    test_session.add_all([employee, schedule])
+    await test_session.commit()
+
+    starts = [datetime(2024, 1, 1, 6) + timedelta(days=2 * d) for d in range(5)]
+    assignments = [
+        ScheduleAssignment(shift=Shift(start_time=start, end_time=start + timedelta(hours=8),
+                                       employee_id=employee.id, work_center_id=work_center.id))
+        for start in starts
+    ]
+    # Batches of two: the last batch is short
+    await persist_schedule(test_session, schedule, assignments, batch_size=2)
+    await test_session.commit()
+    return schedule, assignments
+
+
+async def count(session, model, schedule_id):
+    return (await session.execute(select(func.count()).select_from(model).where(model.schedule_id == schedule_id))).scalar()
+
+
+@pytest.mark.asyncio
+async def test_persist_schedule_assigns_the_inserted_ids(test_session, persisted):
+    schedule, assignments = persisted
+
+    rows = (await test_session.execute(
+        select(ScheduleAssignment.id, ScheduleAssignment.shift_id, Shift.start_time)
+        .join(Shift, Shift.id == ScheduleAssignment.shift_id)
+        .where(ScheduleAssignment.schedule_id == schedule.id)
+        .order_by(ScheduleAssignment.id)
+    )).all()
+    assert [(a.id, a.shift.id, a.shift.start_time) for a in assignments] == [tuple(row) for row in rows]
+    assert len({a.shift.id for a in assignments}) == len(assignments)
+    assert await count(test_session, GeneratedSchedule, schedule.id) == len(assignments)
+    # The objects are persistent, so the session does not insert them again
+    assert all(a in test_session and a.shift in test_session for a in assignments)
+    assert not test_session.new
+
+
+@pytest.mark.asyncio
+async def test_delete_schedule_rows(test_session, persisted):
+    schedule, assignments = persisted
+    removed = assignments[:3]
+    generated_ids = (await test_session.execute(
+        select(GeneratedSchedule.id).where(GeneratedSchedule.schedule_id == schedule.id).order_by(GeneratedSchedule.id).limit(3)
+    )).scalars().all()
+
+    await delete_schedule_rows(test_session, [a.id for a in removed], [a.shift.id for a in removed], generated_ids, batch_size=2)
+    await test_session.commit()
+
+    assert await count(test_session, ScheduleAssignment, schedule.id) == 2
+    assert await count(test_session, GeneratedSchedule, schedule.id) == 2
+    remaining = (await test_session.execute(select(Shift.id).where(Shift.id.in_([a.shift.id for a in assignments])))).scalars().all()
+    assert sorted(remaining) == sorted(a.shift.id for a in assignments[3:])
+    # Deleted rows are no longer in the identity map
+    assert all(a not in test_session and a.shift not in test_session for a in removed)
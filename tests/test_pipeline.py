@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.scheduling.model_builder import build_hesm_matrix_model
+from app.scheduling.pipeline import CategoryJob, solve_categories_in_parallel
+from app.scheduling.solver_pool import SolverPool
+from app.scheduling.solvers import SolverOptions
+
+GAMMA = 7
+
+
+def two_categories():
+    # Demand is cumulative over the hierarchy: category 2 tops up what category 1 covers
+    work_centers = [
+        SimpleNamespace(id=l, demand={"weekday": {"1": [1, 1, 0], "2": [2, 1, 0]}, "weekend": {"1": [0, 0, 0], "2": [0, 0, 0]}})
+        for l in (1, 2)
+    ]
+    employees = {
+        k: [
+            SimpleNamespace(
+                id=10 * k + i,
+                category=SimpleNamespace(hourly_rate=10.0 * k),
+                shift_preferences=[1 + (i + j) % 3 for j in range(3)],
+                off_day_preferences={"Monday": 1 + i % 7},
+                work_center_preferences=[1 + i % 2],
+            )
+            for i in range(8)
+        ]
+        for k in (1, 2)
+    }
+    return employees, work_centers
+
+
+async def solve_hierarchy(parallel_workers, pool):
+    employees, work_centers = two_categories()
+    coverage = np.zeros((GAMMA, len(work_centers), 3))
+    builds, accepted = [], {}
+
+    def build(k, existing):
+        builds.append(k)
+        return CategoryJob(k, employees[k], build_hesm_matrix_model(k, employees[k], GAMMA, work_centers, existing), existing.copy())
+
+    async def accept(job, result):
+        assert result.optimal
+        coverage[:] += job.model.x_values(result.x).sum(axis=0)
+        if job.k == 1:
+            # A shift placed outside the model, e.g. a manual assignment: the
+            # coverage prediction for category 2 no longer holds
+            coverage[0, 0, 0] += 1
+        accepted[job.k] = result
+
+    options = SolverOptions(backend="highs")
+    if parallel_workers > 1:
+        await solve_categories_in_parallel([1, 2], build, accept, coverage.copy, options, pool, parallel_workers)
+    else:
+        for k in (1, 2):
+            job = build(k, coverage.copy())
+            await accept(job, await pool.solve(job.model, options, job.mip_start))
+    return builds, accepted, coverage
+
+
+@pytest.mark.asyncio
+async def test_mispredicted_category_matches_the_sequential_solve():
+    pool = SolverPool(size=2)
+    try:
+        builds, parallel, parallel_coverage = await solve_hierarchy(2, pool)
+        _, sequential, sequential_coverage = await solve_hierarchy(1, pool)
+    finally:
+        pool.close()
+
+    # Category 2 was built speculatively, then rebuilt from the real coverage
+    assert builds == [1, 2, 2]
+    assert [parallel[k].objective for k in (1, 2)] == pytest.approx([sequential[k].objective for k in (1, 2)], abs=1e-6)
+    np.testing.assert_array_equal(parallel_coverage, sequential_coverage)
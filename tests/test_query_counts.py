@@ -0,0 +1,79 @@
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.db.models import Employee, EmployeeCategory, Schedule, ScheduleAssignment, Shift, WorkCenter
+
+# Relationships raise on access, so each endpoint issues exactly the
+# SELECTs it declares; these pin them against regressions into cascades
+
+
+@pytest.fixture
+def count_selects(test_engine):
+    @contextmanager
+    def counting():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT"):
+                statements.append(statement)
+
+        event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+    return counting
+
+
+@pytest.fixture
+async def seeded(test_session, authenticated_client, unique_id):
+    category = EmployeeCategory(name=f"Counts {unique_id}", level=1, hourly_rate=10.0)
+    work_center = WorkCenter(name=f"Counts {unique_id}", demand={"weekday": {"1": [1, 0, 0]}, "weekend": {"1": [0, 0, 0]}})
+    test_session.add_all([category, work_center])
+    await test_session.commit()
+    employee = Employee(name=f"Counts {unique_id}", category_id=category.id, off_day_preferences={"Sunday": 1},
+                        shift_preferences=[1, 2, 3], work_center_preferences=[work_center.id], delta=0.5)
+    schedule = Schedule(start_date=date(2024, 1, 1), end_date=date(2024, 1, 14))
+    test_session.add_all([employee, schedule])
+    await test_session.commit()
+    shifts = [
+        Shift(start_time=datetime(2024, 1, 1, 6) + timedelta(days=d), end_time=datetime(2024, 1, 1, 14) + timedelta(days=d),
+              employee_id=employee.id, work_center_id=work_center.id)
+        for d in (0, 2, 4, 10)
+    ]
+    test_session.add_all(shifts)
+    await test_session.commit()
+    test_session.add_all([ScheduleAssignment(schedule_id=schedule.id, shift_id=shift.id) for shift in shifts[:3]])
+    await test_session.commit()
+    return {"employee": employee.id, "schedule": schedule.id, "free_shift": shifts[3].id}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path, selects", [
+    ("/employees", 1),
+    ("/employees/{employee}", 1),
+    ("/work-centers", 1),
+    ("/employee-categories", 1),
+    ("/schedules/{schedule}", 1),  # one outer join over schedule, assignments and shifts
+    ("/schedules/{schedule}?format=ndjson", 1),
+    ("/schedules/{schedule}/assignments", 1),
+    ("/schedules/{schedule}/violations", 2),  # schedule dates, shift rows
+])
+async def test_get_endpoint_selects(authenticated_client, seeded, count_selects, path, selects):
+    with count_selects() as statements:
+        response = await authenticated_client.get(path.format(**seeded))
+    assert response.status_code == 200, response.text
+    assert len(statements) == selects, statements
+
+
+@pytest.mark.asyncio
+async def test_create_schedule_assignment_selects(authenticated_client, seeded, count_selects):
+    with count_selects() as statements:
+        response = await authenticated_client.post("/schedule-assignments", json={"schedule_id": seeded["schedule"], "shift_id": seeded["free_shift"]})
+    assert response.status_code == 200, response.text
+    # The shift, the schedule's dates, the employee's shifts and the refresh
+    assert len(statements) == 4, statements
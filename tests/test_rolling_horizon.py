@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from app.scheduling.model_builder import HISTORY_DAYS, BoundaryState, build_hesm_matrix_model
+from app.scheduling.rolling_horizon import HorizonWindow, plan_windows
+from app.scheduling.solvers import SolverOptions, solve_model
+from tests.test_model_builder import make_instance
+
+
+def test_plan_windows():
+    assert plan_windows(28) == [HorizonWindow(0, 28, 28)]
+    assert plan_windows(28, 14, 7) == [HorizonWindow(0, 14, 7), HorizonWindow(7, 14, 7), HorizonWindow(14, 14, 14)]
+    assert plan_windows(30, 14, 7)[-1] == HorizonWindow(21, 9, 9)
+    with pytest.raises(ValueError):
+        plan_windows(28, 7, 7)
+
+
+def test_boundary_state_carries_adjacency_and_work_center():
+    employees, work_centers = make_instance()
+    E = len(employees)
+    history = np.zeros((E, HISTORY_DAYS))
+    history[:, -1] = np.arange(E) % 2  # every other employee worked the day before the window
+    boundary = BoundaryState(
+        day_offset=7,
+        history=history,
+        weekend_days_off=np.full(E, 2.0),
+        shifts_worked=np.ones(E),
+        work_center=np.array([e.work_center_preferences[0] - 1 for e in employees]),
+        delta=20.0,
+    )
+    model = build_hesm_matrix_model(1, employees, 14, work_centers, np.zeros((14, 3, 3)), boundary=boundary)
+    result = solve_model(model, SolverOptions())
+    assert result.optimal
+
+    x = np.round(model.x_values(result.x)).astype(int)
+    assert x[history[:, -1] == 1, 0].sum() == 0
+
+    # Employees stay on the work center committed before the window
+    used = x.sum(axis=(1, 3))
+    assert all(np.flatnonzero(used[i]).tolist() in ([], [boundary.work_center[i]]) for i in range(E))
+
+
+def test_fixed_days_after_the_window_and_closed_days():
+    employees, work_centers = make_instance()
+    E = len(employees)
+    future = np.zeros((E, HISTORY_DAYS))
+    future[:, 0] = np.arange(E) % 2  # every other employee works the day after the window
+    closed = np.zeros((E, 7), dtype=bool)
+    closed[0, :3] = True  # a call-off
+    boundary = BoundaryState(
+        day_offset=7,
+        history=np.zeros((E, HISTORY_DAYS)),
+        weekend_days_off=np.full(E, 2.0),
+        shifts_worked=np.zeros(E),
+        work_center=np.full(E, -1),
+        delta=20.0,
+        future=future,
+    )
+    model = build_hesm_matrix_model(1, employees, 7, work_centers, np.zeros((7, 3, 3)), boundary=boundary, closed_days=closed)
+    assert (model.x_index[0, :3] < 0).all()
+    assert (model.x_index[future[:, 0] == 1, -1] < 0).all()
+
+    result = solve_model(model, SolverOptions())
+    assert result.optimal
+    x = np.round(model.x_values(result.x)).astype(int)
+    assert x[0, :3].sum() == 0 and x[future[:, 0] == 1, -1].sum() == 0
@@ -0,0 +1,42 @@
+from datetime import date, datetime
+
+import numpy as np
+
+from app.scheduling.coverage import CoverageIndex
+from app.scheduling.rolling_horizon import BoundaryTracker
+from app.scheduling.schedule_array import ScheduleArray
+
+START = date(2024, 1, 1)
+
+
+def test_from_x_round_trips_through_rows():
+    x = np.zeros((3, 7, 2, 3))
+    x[0, 1, 1, 2] = 1.0
+    x[2, 0, 0, 0] = 0.9999  # solver values are rounded
+    x[1, 4, 0, 1] = 0.2
+    shifts = ScheduleArray.from_x(x, [10, 11, 12], [5, 6], START, day_offset=7)
+
+    assert shifts.employee_id.dtype == np.int32
+    assert sorted(shifts.rows()) == [(10, 6, datetime(2024, 1, 9, 22)), (12, 5, datetime(2024, 1, 8, 6))]
+    parsed = ScheduleArray.from_rows(shifts.rows(), START)
+    assert all((getattr(parsed, c) == getattr(shifts, c)).all() for c in ("employee_id", "day", "work_center_id", "shift"))
+
+    both = ScheduleArray.concatenate([shifts, parsed], START)
+    assert len(both) == 4 and len(ScheduleArray.concatenate([], START)) == 0
+
+
+def test_coverage_and_boundaries_read_schedule_arrays():
+    rows = [(10, 5, datetime(2024, 1, 1, 6)), (11, 6, datetime(2024, 1, 6, 14)), (10, 5, datetime(2024, 1, 3, 6)), (11, 9, datetime(2024, 1, 2, 6))]
+    shifts = ScheduleArray.from_rows(rows, START)
+
+    coverage = CoverageIndex(START, 7, [5, 6], [1, 2])
+    coverage.add_array(shifts, 2)
+    assert coverage.counts[..., 1].sum() == 3 and coverage.counts[5, 1, 1, 1] == 1
+    assert coverage.assigned_employees == {10, 11}
+
+    boundaries = BoundaryTracker(START, 7, [5, 6])
+    boundaries.add(shifts)
+    assert boundaries.recent_days == {10: [0, 2], 11: [1, 5]}
+    assert boundaries.shifts_worked == {10: 2, 11: 2}
+    assert boundaries.weekend_days_worked == {11: 1}
+    assert boundaries.work_center == {10: 0, 11: 1}
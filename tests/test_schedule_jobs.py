@@ -0,0 +1,129 @@
+import pytest
+
+from app.api import routes
+from app.core.jobs import SQLiteJobStore
+
+
+@pytest.fixture
+def jobs(monkeypatch, tmp_path):
+    """The routes' job store in a temporary file, with Celery's enqueue and revoke recorded instead of sent."""
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    sent, revoked = [], []
+    monkeypatch.setattr(routes, "job_store", store)
+    monkeypatch.setattr(routes.generate_schedule_task, "apply_async", lambda args, task_id: sent.append(task_id))
+    monkeypatch.setattr(routes.celery.control, "revoke", revoked.append)
+    store.sent, store.revoked = sent, revoked
+    return store
+
+
+REQUEST = {"start_date": "2024-01-01", "end_date": "2024-01-14"}
+
+
+@pytest.mark.asyncio
+async def test_create_and_get_schedule_job(authenticated_client, jobs):
+    response = await authenticated_client.post("/schedule-jobs", json=REQUEST)
+    assert response.status_code == 202, response.text
+    job = response.json()
+    assert job["status"] == "queued" and job["start_date"] == REQUEST["start_date"]
+    assert response.headers["Location"] == f"/schedule-jobs/{job['id']}"
+    assert jobs.sent == [job["id"]]
+
+    response = await authenticated_client.get(f"/schedule-jobs/{job['id']}")
+    assert response.status_code == 200 and response.json()["id"] == job["id"]
+    response = await authenticated_client.get(f"/schedule-jobs/{job['id']}/result")
+    assert response.status_code == 409
+
+    assert (await authenticated_client.get("/schedule-jobs/missing")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_create_schedule_job_rejects_reversed_dates(authenticated_client, jobs):
+    response = await authenticated_client.post("/schedule-jobs", json={"start_date": "2024-01-14", "end_date": "2024-01-01"})
+    assert response.status_code == 400
+    assert jobs.sent == []
+
+
+@pytest.mark.asyncio
+async def test_cancel_queued_schedule_job(authenticated_client, jobs):
+    job = (await authenticated_client.post("/schedule-jobs", json=REQUEST)).json()
+
+    response = await authenticated_client.delete(f"/schedule-jobs/{job['id']}")
+    assert response.status_code == 202
+    assert response.json()["status"] == "cancelled" and response.json()["cancel_requested"] is True
+    assert jobs.revoked == [job["id"]]
+
+    response = await authenticated_client.delete(f"/schedule-jobs/{job['id']}")
+    assert response.status_code == 409
+    assert (await authenticated_client.delete("/schedule-jobs/missing")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_cancel_running_schedule_job(authenticated_client, jobs):
+    job = (await authenticated_client.post("/schedule-jobs", json=REQUEST)).json()
+    jobs.update(job["id"], status="running")
+
+    # The worker stops the running solve when it sees the flag
+    response = await authenticated_client.delete(f"/schedule-jobs/{job['id']}")
+    assert response.status_code == 202
+    assert response.json()["status"] == "running" and response.json()["cancel_requested"] is True
+    assert jobs.revoked == []
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_join_the_queued_job(authenticated_client, jobs):
+    first = (await authenticated_client.post("/schedule-jobs", json=REQUEST)).json()
+    response = await authenticated_client.post("/schedule-jobs", json=REQUEST)
+    assert response.status_code == 202 and response.json()["id"] == first["id"]
+    assert jobs.sent == [first["id"]]
+
+    other = (await authenticated_client.post("/schedule-jobs", json={**REQUEST, "end_date": "2024-01-21"})).json()
+    assert other["id"] != first["id"] and len(jobs.sent) == 2
+
+
+@pytest.mark.asyncio
+async def test_finished_job_answers_identical_requests(authenticated_client, jobs):
+    first = (await authenticated_client.post("/schedule-jobs", json=REQUEST)).json()
+    jobs.update(first["id"], status="succeeded", result={"schedule_id": 1})
+    response = await authenticated_client.post("/schedule-jobs", json=REQUEST)
+    assert response.status_code == 200 and response.json()["id"] == first["id"]
+
+    # A failed job does not: the request gets a new job
+    jobs.update(first["id"], status="failed")
+    response = await authenticated_client.post("/schedule-jobs", json=REQUEST)
+    assert response.status_code == 202 and response.json()["id"] != first["id"]
+    assert jobs.sent == [first["id"], response.json()["id"]]
+
+
+@pytest.mark.asyncio
+async def test_stale_job_no_longer_answers_identical_requests(authenticated_client, jobs, monkeypatch):
+    first = (await authenticated_client.post("/schedule-jobs", json=REQUEST)).json()
+    jobs.update(first["id"], status="running")
+    monkeypatch.setattr(routes.settings, "JOB_STALE_SECONDS", 0)
+
+    response = await authenticated_client.post("/schedule-jobs", json=REQUEST)
+    assert response.status_code == 202 and response.json()["id"] != first["id"]
+    assert jobs.get(first["id"])["status"] == "failed"
+
+
+@pytest.mark.asyncio
+async def test_enqueue_failure_releases_the_request(authenticated_client, jobs, monkeypatch):
+    def unavailable(args, task_id):
+        raise ConnectionError("broker unavailable")
+
+    monkeypatch.setattr(routes.generate_schedule_task, "apply_async", unavailable)
+    response = await authenticated_client.post("/schedule-jobs", json=REQUEST)
+    assert response.status_code == 503
+
+    # The failed job does not hold the request, so the next one is queued
+    monkeypatch.setattr(routes.generate_schedule_task, "apply_async", lambda args, task_id: jobs.sent.append(task_id))
+    response = await authenticated_client.post("/schedule-jobs", json=REQUEST)
+    assert response.status_code == 202 and jobs.sent == [response.json()["id"]]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("setting, value", [("SCHEDULE_ENGINE", "genetic"), ("GENETIC_POPULATION", 8), ("LNS_TIME_LIMIT", 5.0)])
+async def test_engine_settings_are_part_of_the_request(authenticated_client, jobs, monkeypatch, setting, value):
+    first = (await authenticated_client.post("/schedule-jobs", json=REQUEST)).json()
+    monkeypatch.setattr(routes.settings, setting, value)
+    response = await authenticated_client.post("/schedule-jobs", json=REQUEST)
+    assert response.status_code == 202 and response.json()["id"] != first["id"]
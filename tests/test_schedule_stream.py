@@ -0,0 +1,75 @@
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.db.models import Employee, EmployeeCategory, Schedule, ScheduleAssignment, Shift, WorkCenter
+
+
+async def add_schedule(session, unique_id, n_shifts):
+    category = EmployeeCategory(name=f"Stream {unique_id}", level=1, hourly_rate=10.0)
+    work_center = WorkCenter(name=f"Stream {unique_id}", demand={"weekday": {}, "weekend": {}})
+    session.add_all([category, work_center])
+    await session.commit()
+    employee = Employee(name=f"Stream {unique_id}", category_id=category.id, off_day_preferences={}, shift_preferences=[1],
+                        work_center_preferences=[work_center.id], delta=0.5)
+    schedule = Schedule(start_date=date(2024, 1, 1), end_date=date(2024, 1, 31))
+    session.add_all([employee, schedule])
+    await session.commit()
+    shifts = [
+        Shift(start_time=datetime(2024, 1, 1, 6) + timedelta(days=d), end_time=datetime(2024, 1, 1, 14) + timedelta(days=d),
+              employee_id=employee.id, work_center_id=work_center.id)
+        for d in range(n_shifts)
+    ]
+    session.add_all(shifts)
+    await session.commit()
+    session.add_all([ScheduleAssignment(schedule_id=schedule.id, shift_id=shift.id) for shift in shifts])
+    await session.commit()
+    return schedule, shifts
+
+
+@pytest.mark.asyncio
+async def test_get_schedule_json_and_ndjson(client, test_session, unique_id):
+    schedule, shifts = await add_schedule(test_session, unique_id, 3)
+
+    response = await client.get(f"/schedules/{schedule.id}")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/json")
+    data = response.json()
+    assert data["id"] == schedule.id and data["start_date"] == "2024-01-01" and data["end_date"] == "2024-01-31"
+    assert [a["shift_id"] for a in data["assignments"]] == [shift.id for shift in shifts]
+    assert data["assignments"][0]["start_time"] == "2024-01-01T06:00:00"
+    assert data["assignments"][0]["employee_id"] == shifts[0].employee_id
+
+    response = await client.get(f"/schedules/{schedule.id}", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0] == {k: v for k, v in data.items() if k != "assignments"}
+    assert lines[1:] == data["assignments"]
+
+
+@pytest.mark.asyncio
+async def test_get_schedule_empty_and_missing(client, test_session, unique_id):
+    schedule, _ = await add_schedule(test_session, unique_id, 0)
+
+    response = await client.get(f"/schedules/{schedule.id}")
+    assert response.status_code == 200
+    assert response.json()["assignments"] == []
+
+    response = await client.get(f"/schedules/{schedule.id + 1000000}")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_unsent_schedule_body_releases_its_connection(test_engine, test_session, unique_id):
+    from app.api.routes import get_schedule
+
+    schedule, _ = await add_schedule(test_session, unique_id, 3)
+    checked_out = test_engine.pool.checkedout()
+
+    # A response whose body never runs, e.g. the client left before it started
+    response = await get_schedule(schedule.id, format="json", db=test_session)
+    assert test_engine.pool.checkedout() == checked_out + 1
+    await response.background()
+    assert test_engine.pool.checkedout() == checked_out
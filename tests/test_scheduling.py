@@ -43,11 +43,13 @@ async def test_end_to_end(test_session: AsyncSession, client: AsyncClient):
             logger.exception("Error in generate_schedule")
             raise
 
+        # The scheduler loads plain rows, so the shifts come back without their employee objects
+        employees = {e.id: e for e in (await test_session.execute(select(Employee))).scalars()}
+
         # Print debug information
         for assignment in assignments:
-            employee = assignment.shift.employee
-            work_center = assignment.shift.work_center
-            logger.debug(f"Employee {employee.id} (preferences: {employee.work_center_preferences}) assigned to work center {work_center.id}")
+            employee = employees[assignment.shift.employee_id]
+            logger.debug(f"Employee {employee.id} (preferences: {employee.work_center_preferences}) assigned to work center {assignment.shift.work_center_id}")
 
         # Verify the generated schedule
         assert schedule is not None
@@ -67,11 +69,11 @@ async def test_end_to_end(test_session: AsyncSession, client: AsyncClient):
 
         # Verify schedule constraints
         for assignment in assignments:
-            employee = assignment.shift.employee
-            work_center = assignment.shift.work_center
+            employee = employees[assignment.shift.employee_id]
+            work_center_id = assignment.shift.work_center_id
             
             # Check if the employee is assigned to a preferred work center
-            assert work_center.id in employee.work_center_preferences, f"Employee {employee.id} assigned to non-preferred work center {work_center.id}. Preferences: {employee.work_center_preferences}"
+            assert work_center_id in employee.work_center_preferences, f"Employee {employee.id} assigned to non-preferred work center {work_center_id}. Preferences: {employee.work_center_preferences}"
             
             # Check if the employee is not working more than 5 days in a week
             employee_shifts = [a for a in assignments if a.shift.employee_id == employee.id]
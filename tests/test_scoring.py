@@ -0,0 +1,84 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.scheduling.model_builder import N_SHIFTS
+from app.scheduling.schedule_array import ScheduleArray
+from app.scheduling.scoring import (
+    category_scoring_tables, encode_assignments, encode_schedule, encode_x, score_schedules, scoring_tables,
+)
+from tests.test_model_builder import make_instance
+
+
+def make_tables():
+    employees, work_centers = make_instance(n_employees=6)
+    for e in employees:
+        e.category_id = 1
+    return employees, work_centers, scoring_tables(employees, work_centers, 7)
+
+
+def test_single_schedule_components():
+    employees, work_centers, tables = make_tables()
+    codes = np.zeros((6, 7), dtype=np.int16)
+    # Employee 1 (shift preferences [2, 3, 1], work center 2) works shift 2 at work center 2 on Monday,
+    # its first-choice day off; employee 2 works shift 1 at work center 3 on Tuesday
+    codes[0, 0] = 1 * N_SHIFTS + 1 + 1
+    codes[1, 1] = 2 * N_SHIFTS + 0 + 1
+    scores = score_schedules(tables, codes)
+
+    assert scores.cost.tolist() == [2 * 15.0 * 8]
+    assert scores.preference.tolist() == [(3 + 1 - 5) + (2 + 1)]
+    assert scores.fairness.tolist() == [-0.5]
+    demanded = np.nansum(tables.demand)
+    assert scores.shortfall.tolist() == [demanded - 2]
+    assert scores.surplus.tolist() == [0]
+    assert np.isclose(scores.coverage[0], 2 / demanded)
+
+
+def test_batch_matches_single_scores():
+    employees, work_centers, tables = make_tables()
+    rng = np.random.default_rng(0)
+    batch = rng.integers(0, len(work_centers) * N_SHIFTS + 1, (5, 6, 7)).astype(np.int16)
+    scores = score_schedules(tables, batch)
+    for i in range(5):
+        single = score_schedules(tables, batch[i])
+        assert single.summary() == scores.summary(i)
+
+
+def test_encoders_agree():
+    employees, work_centers, tables = make_tables()
+    x = np.zeros((6, 7, 3, N_SHIFTS), dtype=bool)
+    x[2, 3, 1, 2] = True
+    x[4, 6, 0, 0] = True
+    rows = [(3, 2, datetime(2024, 1, 4, 22)), (5, 1, datetime(2024, 1, 7, 6)), (99, 1, datetime(2024, 1, 2, 6))]
+    assert (encode_x(x) == encode_assignments(tables, rows, date(2024, 1, 1))).all()
+    assert (encode_x(x) == encode_schedule(tables, ScheduleArray.from_rows(rows, date(2024, 1, 1)))).all()
+
+
+def test_coverage_follows_the_cumulative_demand_rows():
+    # Category 2's demand includes what category 1 covers
+    work_centers = [SimpleNamespace(id=1, demand={"weekday": {"1": [1, 0, 0], "2": [2, 0, 0]}, "weekend": {"1": [0, 0, 0], "2": [0, 0, 0]}})]
+    employees = [
+        SimpleNamespace(id=i, category_id=k, category=SimpleNamespace(hourly_rate=10.0), shift_preferences=[1, 2, 3],
+                        off_day_preferences={"Sunday": 1}, work_center_preferences=[1])
+        for i, k in ((1, 1), (2, 2), (3, 2))
+    ]
+    tables = scoring_tables(employees, work_centers, 7)
+    codes = np.zeros((3, 7), dtype=np.int16)
+    codes[:2, 0] = 1
+    # One shift per category meets both rows on Monday; the other weekdays are short by 1 and 2
+    scores = score_schedules(tables, codes)
+    assert scores.shortfall.tolist() == [4 * 3] and scores.surplus.tolist() == [0]
+
+    # A second category-2 shift overshoots category 2's row
+    codes[2, 0] = 1
+    assert score_schedules(tables, codes).surplus.tolist() == [1]
+
+    # The category-2 pass sees category 1's shift as existing coverage
+    existing = np.zeros((7, 1, N_SHIFTS))
+    existing[0, 0, 0] = 1
+    category = category_scoring_tables(2, employees[1:], 7, work_centers, existing)
+    scores = score_schedules(category, codes[1:])
+    assert scores.surplus.tolist() == [1] and scores.shortfall.tolist() == [4 * 2]
+    assert np.isclose(scores.coverage[0], 1 - 8 / (1 + 4 * 2))
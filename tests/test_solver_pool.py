@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from app.scheduling.solver_pool import SolverPool
+from app.scheduling.solvers import SolverOptions, solve_model
+from tests.test_solvers import model  # noqa: F401
+
+
+@pytest.mark.asyncio
+async def test_pool_matches_in_process_solve(model):
+    pool = SolverPool(size=2)
+    try:
+        options = SolverOptions(backend="highs")
+        results = await asyncio.gather(pool.solve(model, options), pool.solve(model, options))
+        reference = solve_model(model, options)
+        assert [r.objective for r in results] == pytest.approx([reference.objective] * 2, abs=1e-6)
+        assert pool.stats()["idle"] == 2 and pool.solves == 2
+    finally:
+        pool.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_solve_restarts_its_worker(model):
+    pool = SolverPool(size=1)
+    try:
+        options = SolverOptions(backend="highs")
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pool.solve(model, options), timeout=0.01)
+        assert pool.cancelled == 1
+        assert pool.stats()["busy"] == 0 and pool.stats()["idle"] == 1
+
+        result = await pool.solve(model, options)
+        assert result.optimal
+    finally:
+        pool.close()
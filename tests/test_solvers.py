@@ -0,0 +1,113 @@
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.scheduling.model_builder import HISTORY_DAYS, BoundaryState, build_hesm_matrix_model
+from app.scheduling.solvers import SolverOptions, get_backend, solve_model
+from app.scheduling.warm_start import build_mip_start
+
+
+def instance():
+    category = SimpleNamespace(hourly_rate=15.0)
+    work_centers = [
+        SimpleNamespace(id=l, demand={"weekday": {"1": [1, 0, 1]}, "weekend": {"1": [0, 1, 0]}})
+        for l in (1, 2)
+    ]
+    employees = [
+        SimpleNamespace(id=i, category=category, shift_preferences=[1 + (i + j) % 3 for j in range(3)],
+                        off_day_preferences={"Monday": 1 + i % 7}, work_center_preferences=[1 + i % 2])
+        for i in range(1, 17)
+    ]
+    return employees, work_centers
+
+
+@pytest.fixture
+def model():
+    employees, work_centers = instance()
+    return build_hesm_matrix_model(1, employees, 14, work_centers, np.zeros((14, 2, 3)))
+
+
+def prior_rows(model, x, start_date):
+    return [
+        SimpleNamespace(
+            employee_id=int(model.employee_ids[e]),
+            work_center_id=int(model.work_center_ids[l]),
+            shift_start=datetime.combine(start_date + timedelta(days=int(d)), time(6 + 8 * int(t))),
+        )
+        for e, d, l, t in np.argwhere(x > 0.5)
+    ]
+
+
+@pytest.mark.parametrize("options", [
+    SolverOptions(backend="highs"),
+    SolverOptions(backend="highs", in_memory=False),
+    SolverOptions(backend="highs", threads=2, time_limit=30, mip_gap=0.0),
+    SolverOptions(backend="scipy"),
+    SolverOptions(backend="cbc", in_memory=False),
+])
+def test_backends_agree_on_objective(model, options):
+    reference = solve_model(model, SolverOptions(backend="scipy"))
+    result = solve_model(model, options)
+
+    assert result.optimal and result.has_solution
+    assert result.objective == pytest.approx(reference.objective, abs=1e-6)
+    assert result.solve_time >= 0
+    activity = model.A @ result.x
+    assert np.all(activity >= model.row_lower - 1e-6) and np.all(activity <= model.row_upper + 1e-6)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        get_backend("gurobi")
+
+
+def test_options_merge_request_overrides():
+    deployment = SolverOptions(backend="highs", threads=4, time_limit=60)
+    merged = deployment.merged(time_limit=5, mip_gap=None)
+    assert (merged.backend, merged.threads, merged.time_limit, merged.mip_gap) == ("highs", 4, 5, None)
+
+
+def test_warm_start_from_previous_solution(model):
+    start_date = date(2024, 1, 1)
+    first = solve_model(model, SolverOptions(backend="highs"))
+    prior = prior_rows(model, model.x_values(first.x), start_date)
+    # Shifts outside the horizon cannot be mapped
+    prior.append(SimpleNamespace(employee_id=int(model.employee_ids[0]), work_center_id=1, shift_start=datetime(2024, 2, 1, 6)))
+
+    mip_start, report = build_mip_start(model, prior, start_date)
+    assert report.prior_shifts == len(prior)
+    assert report.mapped == report.retained == len(prior) - 1
+    assert report.feasible
+
+    result = solve_model(model, SolverOptions(backend="highs"), mip_start)
+    assert result.optimal
+    assert result.objective == pytest.approx(first.objective, abs=1e-6)
+
+
+def test_warm_start_respects_the_window_boundary():
+    # A later rolling-horizon window: shifts, work centers and worked days committed before it
+    employees, work_centers = instance()
+    E = len(employees)
+    history = np.zeros((E, HISTORY_DAYS))
+    history[::4, -1] = 1
+    boundary = BoundaryState(
+        day_offset=7,
+        history=history,
+        weekend_days_off=np.ones(E),
+        shifts_worked=np.full(E, 3.0),
+        work_center=np.array([i % 2 for i in range(1, E + 1)]),
+        delta=40,  # C4.1 rows measure against delta - shifts_worked, not the default Delta
+    )
+    model = build_hesm_matrix_model(1, employees, 14, work_centers, np.zeros((14, 2, 3)), boundary=boundary)
+    start_date = date(2024, 1, 8)
+    first = solve_model(model, SolverOptions(backend="highs"))
+    prior = prior_rows(model, model.x_values(first.x), start_date)
+
+    mip_start, report = build_mip_start(model, prior, start_date, boundary)
+    assert report.feasible
+    assert report.retained == len(prior)
+
+    result = solve_model(model, SolverOptions(backend="highs"), mip_start)
+    assert result.objective == pytest.approx(first.objective, abs=1e-6)
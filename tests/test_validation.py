@@ -0,0 +1,58 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from app.scheduling.validation import validate_work, work_array
+
+START = date(2024, 1, 1)  # a Monday
+
+
+def shift(employee_id, day, work_center_id=1, hour=6):
+    return employee_id, work_center_id, datetime.combine(START + timedelta(days=day), datetime.min.time()) + timedelta(hours=hour)
+
+
+def test_validate_work_locates_each_rule():
+    rows = [
+        shift(1, 0), shift(1, 2), shift(1, 4),  # valid
+        shift(2, 0), shift(2, 0, hour=14),  # C2.1
+        shift(3, 0), shift(3, 1),  # C3
+        *(shift(4, d) for d in range(7)),  # C2.2, C2.3 and C3 over a week
+        shift(5, 5), shift(5, 8, work_center_id=2),  # C2.5
+    ]
+    work = work_array(rows, START, 14)
+    violations = validate_work(work)
+    records = violations.records(START)
+
+    assert violations.counts() == {"C2.1": 1, "C2.2": 2, "C2.3": 2, "C2.5": 1, "C3": 7}
+    assert {(r["rule"], r["employee_id"]) for r in records} >= {("C2.1", 2), ("C3", 3), ("C2.5", 5)}
+    assert 1 not in violations.employee
+    assert records[0] == {"rule": "C2.1", "employee_id": 2, "count": 2, "first_day": "2024-01-01", "last_day": "2024-01-01"}
+    assert {"rule": "C2.5", "employee_id": 5, "count": 2} in records
+    week = next(r for r in records if r["rule"] == "C2.2")
+    assert (week["first_day"], week["last_day"], week["count"]) == ("2024-01-01", "2024-01-07", 7)
+
+    # A single week leaves no weekend day to work after the two days off
+    assert validate_work(work_array([shift(6, 5)], START, 7)).counts() == {"C2.4": 1}
+
+    # Shifts outside the horizon are skipped, and only new violations remain after a difference
+    assert len(validate_work(work_array([shift(1, -1), shift(1, 14)], START, 14))) == 0
+    added = validate_work(work_array(rows + [shift(1, 5)], START, 14)).difference(violations)
+    assert added.records(START) == [{"rule": "C3", "employee_id": 1, "count": 2, "first_day": "2024-01-05", "last_day": "2024-01-06"}]
+
+
+def test_weekend_days_count_from_the_schedule_start():
+    # As in the model, days 5 and 6 of the schedule are its weekend whatever the start date
+    wednesday = START + timedelta(days=2)
+    assert work_array([], wednesday, 14).weekend.nonzero()[0].tolist() == [5, 6, 12, 13]
+    rows = [shift(1, 7)]  # day 5 from the Wednesday
+    assert validate_work(work_array(rows, wednesday, 7)).counts() == {"C2.4": 1}
+
+
+def test_validate_work_on_a_large_month():
+    rng = np.random.default_rng(0)
+    n = 10_000 * 16
+    days, employees = rng.integers(0, 31, n), rng.integers(1, 10_001, n)
+    rows = [shift(int(e), int(d)) for e, d in zip(employees, days)]
+
+    violations = validate_work(work_array(rows, START, 31))
+    assert len(violations) > 0
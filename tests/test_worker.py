@@ -0,0 +1,95 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+import worker
+from app.core.jobs import SQLiteJobStore
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(worker, "job_store", store)
+    monkeypatch.setattr(worker, "CANCEL_POLL_SECONDS", 0.01)
+
+    @asynccontextmanager
+    async def session():
+        yield None
+
+    async def dispose():
+        pass
+
+    monkeypatch.setattr(worker, "async_session_maker", session)
+    monkeypatch.setattr(worker, "engine", SimpleNamespace(dispose=dispose))
+    return store
+
+
+def generation(monkeypatch, during):
+    """Replace the generation with one that runs ``during`` and then waits to be cancelled."""
+    async def generate_schedule(session, start_date, end_date, **kwargs):
+        during()
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(worker, "generate_schedule", generate_schedule)
+
+
+@pytest.mark.asyncio
+async def test_missing_job_is_not_started(store, monkeypatch):
+    generation(monkeypatch, lambda: pytest.fail("generation started"))
+    await asyncio.wait_for(worker.run_schedule_job("gone", date(2024, 1, 1), date(2024, 1, 14)), timeout=5)
+    # No partial record is written back
+    assert store.get("gone") is None
+
+
+@pytest.mark.asyncio
+async def test_running_job_stops_when_cancelled(store, monkeypatch):
+    store.create("a", status="queued")
+    generation(monkeypatch, lambda: store.update("a", cancel_requested=True))
+    await asyncio.wait_for(worker.run_schedule_job("a", date(2024, 1, 1), date(2024, 1, 14)), timeout=5)
+    assert store.get("a")["status"] == "cancelled"
+
+
+@pytest.mark.asyncio
+async def test_running_job_stops_when_its_record_expires(store, monkeypatch):
+    store.create("a", status="queued")
+    generation(monkeypatch, lambda: store.delete("a"))
+    await asyncio.wait_for(worker.run_schedule_job("a", date(2024, 1, 1), date(2024, 1, 14)), timeout=5)
+    assert store.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_job_failed_as_stale_keeps_its_status(store, monkeypatch):
+    store.create("a", status="queued")
+
+    async def generate_schedule(session, start_date, end_date, **kwargs):
+        # The API gives up on the job while it runs
+        store.update("a", status="failed", error="No heartbeat from the worker")
+        return SimpleNamespace(id=1), []
+
+    monkeypatch.setattr(worker, "generate_schedule", generate_schedule)
+    await asyncio.wait_for(worker.run_schedule_job("a", date(2024, 1, 1), date(2024, 1, 14)), timeout=5)
+    job = store.get("a")
+    assert job["status"] == "failed" and "result" not in job
+
+
+@pytest.mark.asyncio
+async def test_running_job_sends_heartbeats(store, monkeypatch):
+    monkeypatch.setattr(worker, "HEARTBEAT_SECONDS", 0.0)
+    updates = []
+    update = store.update
+    monkeypatch.setattr(store, "update", lambda job_id, unless_status=(), **fields: (updates.append(fields), update(job_id, unless_status, **fields))[1])
+    store.create("a", status="queued")
+    # A heartbeat only refreshes updated_at, then the job is cancelled
+    generation(monkeypatch, lambda: None)
+    run = asyncio.ensure_future(worker.run_schedule_job("a", date(2024, 1, 1), date(2024, 1, 14)))
+    for _ in range(500):
+        if {} in updates:
+            break
+        await asyncio.sleep(0.01)
+    assert {} in updates
+    update("a", cancel_requested=True)
+    await asyncio.wait_for(run, timeout=5)
+    assert store.get("a")["status"] == "cancelled"
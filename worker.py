@@ -1,9 +1,96 @@
+import asyncio
+import logging
+import time
+from datetime import date
+
 from celery import Celery
 from app.core.config import settings
+from app.core.jobs import job_store_from_settings
+from app.db.database import async_session_maker, engine
+from app.db.models import FINISHED_JOB_STATUSES, ScheduleJobStatus
 from app.scheduling.algorithm import generate_schedule
 
+logger = logging.getLogger(__name__)
+
 celery = Celery('tasks', broker=settings.CELERY_BROKER_URL)
+job_store = job_store_from_settings(settings)
+
+CANCEL_POLL_SECONDS = 1.0
+HEARTBEAT_SECONDS = 30.0  # well below JOB_STALE_SECONDS, after which the API stops joining the job
+
+
+def report(job_id: str, **fields) -> bool:
+    """Update the job unless its record is gone or it already finished, e.g. failed as stale by the API."""
+    return job_store.update(job_id, unless_status=FINISHED_JOB_STATUSES, **fields)
+
+
+def cancel_requested(job_id: str) -> bool:
+    """Whether the job was cancelled; a job whose record expired or was deleted counts as cancelled."""
+    job = job_store.get(job_id)
+    return job is None or bool(job.get("cancel_requested"))
+
+
+async def run_schedule_job(job_id: str, start_date: date, end_date: date, window_days=None, window_overlap=None):
+    """Generate the schedule of job ``job_id``, reporting status and progress to the job store.
+
+    The job store is polled for a cancellation request while the generation
+    runs; cancelling the generation stops the solve that is in progress.
+    Every ``HEARTBEAT_SECONDS`` the record's ``updated_at`` is refreshed.
+    A job whose record is gone is not started, and its record is not
+    written again.
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        logger.info(f"Schedule job {job_id} no longer exists")
+        return
+    if job.get("cancel_requested"):
+        report(job_id, status=ScheduleJobStatus.CANCELLED.value, message="Cancelled before it started")
+        return
+
+    def progress(fraction, message):
+        report(job_id, progress=round(fraction, 4), message=message)
+
+    async def generate():
+        async with async_session_maker() as session:
+            schedule, assignments = await generate_schedule(
+                session, start_date, end_date, window_days=window_days, window_overlap=window_overlap, progress=progress
+            )
+            return {
+                "job_id": job_id,
+                "schedule_id": schedule.id,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "assignments": len(assignments),
+            }
+
+    if not report(job_id, status=ScheduleJobStatus.RUNNING.value, message="Loading employees and work centers"):
+        return
+    generation = asyncio.create_task(generate())
+    last_heartbeat = time.monotonic()
+    try:
+        while not generation.done():
+            await asyncio.wait({generation}, timeout=CANCEL_POLL_SECONDS)
+            if not generation.done() and cancel_requested(job_id):
+                generation.cancel()
+            elif time.monotonic() - last_heartbeat >= HEARTBEAT_SECONDS:
+                # Refreshes updated_at, so long solves without progress are not taken for stale
+                report(job_id)
+                last_heartbeat = time.monotonic()
+        try:
+            result = generation.result()
+        except asyncio.CancelledError:
+            logger.info(f"Schedule job {job_id} cancelled")
+            report(job_id, status=ScheduleJobStatus.CANCELLED.value, message="Cancelled")
+            return
+        except Exception as e:
+            report(job_id, status=ScheduleJobStatus.FAILED.value, error=f"{type(e).__name__}: {e}", message="Failed")
+            raise
+        report(job_id, status=ScheduleJobStatus.SUCCEEDED.value, progress=1.0, message="Done", result=result)
+    finally:
+        # Pooled connections belong to this task's event loop
+        await engine.dispose()
+
 
-@celery.task
-def generate_schedule_task(start_date, end_date):
-    return generate_schedule(start_date, end_date)
+@celery.task(name="generate_schedule", ignore_result=True)
+def generate_schedule_task(job_id, start_date, end_date, window_days=None, window_overlap=None):
+    asyncio.run(run_schedule_job(job_id, date.fromisoformat(start_date), date.fromisoformat(end_date), window_days, window_overlap))